@@ -0,0 +1,206 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from cipher import active_ciphers
+from datestore import default_date_store, store_path_for
+from scoring import MatchupScorer
+from teams import default_store
+import numpy as np
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+# Significance thresholds evaluated by default, create_tables highlights numbers counted more than twice
+THRESHOLDS = [2, 3, 4, 5]
+
+
+def read_games(path: str) -> list[tuple]:
+    """
+    Reads historical results, one game per row: date (YYYY-MM-DD), home, away, winner.
+    A header row is skipped, teams may be given by any alias unique to them. A malformed row raises a
+    ValueError naming its line
+
+    Arguments:
+    path -- path of the results CSV
+
+    Returns:
+    list[tuple] -- (date, home, away, winner) per game, in file order
+    """
+    games = []
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        for row in reader:
+            if not row or row[0].strip().lower() == 'date':
+                continue
+            if len(row) < 4:
+                raise ValueError(f'{path}, line {reader.line_num}: expected date, home, away, winner, got {row}')
+            day, home, away, winner = (field.strip() for field in row[:4])
+            try:
+                day = date.fromisoformat(day)
+            except ValueError:
+                raise ValueError(f'{path}, line {reader.line_num}: date must be YYYY-MM-DD, got {day!r}') from None
+            games.append((day, home, away, winner))
+    return games
+
+
+def _score_dates(dates: list[tuple], ciphers: list[str], thresholds: list[int], store_path: str) -> list[tuple]:
+    """
+    Scores the games of a batch of dates, run in a worker process
+
+    Arguments:
+    dates -- (date, home team indices, away team indices) per date
+    ciphers -- list of ciphers to be added
+    thresholds -- significance thresholds
+    store_path -- path of the precomputed date store, None to compute every date
+
+    Returns:
+    list[tuple] -- (date, scores of shape (thresholds, games, 2)) per date
+    """
+    from web import WebScraper
+
+    store = default_date_store(ciphers, store_path) if store_path is not None else None
+    teams = default_store(ciphers)
+    results = []
+    for day, home, away in dates:
+        ws = WebScraper(datetime(day.year, day.month, day.day), backend='local', teams=teams, store=store)
+        ws.run(None, None, ciphers)
+        scorer = MatchupScorer(ws.phrase_results, ws.date_stats, teams)
+        results.append((day, scorer.team_scores(home, away, thresholds)))
+    return results
+
+
+def backtest(games: list[tuple], ciphers: list[str] = ['chaldean'], thresholds: list[int] = THRESHOLDS,
+             workers: int = None, store_path: str = None) -> dict:
+    """
+    Replays the matchup reports of past games and measures how often the team scoring higher on the
+    displayed numbers won. Dates are scored in parallel across worker processes, each date's games at once
+
+    Arguments:
+    games -- (date, home, away, winner) per game, see read_games
+    ciphers -- list of ciphers to be added
+    thresholds -- significance thresholds evaluated
+    workers -- number of worker processes, defaults to the number of cores, 1 to score in process
+    store_path -- path of the precomputed date store, defaults to the one for the ciphers.
+                  Dates it covers skip computing their phrases
+
+    Returns:
+    dict -- games scored and skipped, the home win rate, and picks, correct picks, hit rate and coverage per threshold.
+            'picks' holds each scored game's pick per threshold: 1 home, -1 away, 0 for a tie
+    """
+    workers = workers or os.cpu_count() or 1
+    teams = default_store(ciphers)
+
+    # Games grouped by date, with their teams as indices
+    by_date = dict()
+    scored = []
+    skipped = []
+    for game in games:
+        day, home, away, winner = game
+        try:
+            home_index, away_index, winner_index = teams.lookup(home), teams.lookup(away), teams.lookup(winner)
+        except KeyError as error:
+            skipped.append((game, error.args[0]))
+            continue
+        if winner_index not in (home_index, away_index) or home_index == away_index:
+            skipped.append((game, f'{winner} did not play {home} vs {away}'))
+            continue
+        by_date.setdefault(day, []).append(len(scored))
+        scored.append((game, home_index, away_index, winner_index == home_index))
+
+    dates = [
+        (day, np.array([scored[i][1] for i in indices]), np.array([scored[i][2] for i in indices]))
+        for day, indices in sorted(by_date.items())
+    ]
+    store_path = store_path if store_path is not None else store_path_for(ciphers)
+    if not os.path.exists(store_path):
+        store_path = None
+
+    scores = np.zeros((len(thresholds), len(scored), 2), dtype=np.int64)
+
+    def collect(results: list[tuple]) -> None:
+        for day, date_scores in results:
+            scores[:, by_date[day]] = date_scores
+
+    if workers == 1:
+        collect(_score_dates(dates, ciphers, thresholds, store_path))
+    else:
+        # Several batches per worker, so a slow batch doesn't leave the other workers idle
+        batch_size = max(-(-len(dates) // (workers * 4)), 1)
+        batches = [dates[i:i + batch_size] for i in range(0, len(dates), batch_size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_score_dates, batch, ciphers, thresholds, store_path) for batch in batches]
+            for future in as_completed(futures):
+                collect(future.result())
+
+    home_won = np.array([game[3] for game in scored], dtype=bool)
+    picks = np.sign(scores[..., 0] - scores[..., 1])
+    correct = ((picks == 1) & home_won) | ((picks == -1) & ~home_won)
+
+    summary = []
+    for i, threshold in enumerate(thresholds):
+        n_picks = int((picks[i] != 0).sum())
+        n_correct = int(correct[i].sum())
+        summary.append({
+            'significance': threshold,
+            'picks': n_picks,
+            'correct': n_correct,
+            'hit_rate': n_correct / n_picks if n_picks else None,
+            'coverage': n_picks / len(scored) if scored else None,
+        })
+
+    return {
+        'games': len(scored),
+        'dates': len(dates),
+        'skipped': len(skipped),
+        'home_win_rate': float(home_won.mean()) if scored else None,
+        'thresholds': summary,
+        'picks': [(game, picks[:, i].tolist()) for i, (game, _, _, _) in enumerate(scored)],
+        'skipped_games': skipped,
+    }
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Backtests the significant numbers against historical results')
+    parser.add_argument('results', help='CSV of past games: date (YYYY-MM-DD), home, away, winner')
+    parser.add_argument('--cipher', action='append', dest='ciphers', help='cipher to add (repeatable), defaults to the active ciphers in ciphers.json')
+    parser.add_argument('--significance', action='append', type=int, dest='thresholds',
+                        help=f'significance threshold to evaluate (repeatable), defaults to {THRESHOLDS}')
+    parser.add_argument('--workers', type=int, help='worker processes, defaults to the number of cores')
+    parser.add_argument('--store', help='precomputed date store read for the dates it covers, defaults to the one for the ciphers')
+    parser.add_argument('--picks', help='writes each game and its pick per threshold (home, away or tie) to this CSV')
+    parser.add_argument('--output', help='writes the summary as JSON to this file, stdout otherwise')
+    args = parser.parse_args(argv)
+
+    thresholds = sorted(set(args.thresholds or THRESHOLDS))
+    try:
+        games = read_games(args.results)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    start = time.perf_counter()
+    result = backtest(games, args.ciphers or active_ciphers(), thresholds, args.workers, args.store)
+    elapsed = time.perf_counter() - start
+
+    for (day, home, away, winner), reason in result['skipped_games']:
+        print(f'Skipped {day} {home} vs {away}: {reason}', file=sys.stderr)
+    if args.picks:
+        with open(args.picks, 'w', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(['date', 'home', 'away', 'winner'] + [f'pick_{threshold}' for threshold in thresholds])
+            for (day, home, away, winner), picks in result['picks']:
+                writer.writerow([day.isoformat(), home, away, winner] + [{1: home, -1: away}.get(pick, '') for pick in picks])
+
+    summary = {key: value for key, value in result.items() if key not in ('picks', 'skipped_games')}
+    summary['seconds'] = elapsed
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+    else:
+        print(json.dumps(summary, indent=2))
+    print(f"Scored {result['games']} games on {result['dates']} dates in {elapsed:.1f} s", file=sys.stderr)
+    return 0
+
+
+if __name__=="__main__":
+    sys.exit(main())
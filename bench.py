@@ -0,0 +1,382 @@
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+from typing import Callable
+from cipher import active_ciphers
+from fake import fake_factory
+from pool import DriverPool
+from replay import PageCache, replay_factory
+from teams import default_store
+from web import NumberCounter, WebScraper
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+DATE = datetime(2024, 5, 1)
+TEAM1 = 'New York Yankees'
+TEAM2 = 'Boston Red Sox'
+
+# Regular season the season-range scenarios cover
+SEASON_START = date(2024, 3, 28)
+SEASON_END = date(2024, 9, 29)
+
+# A benchmark is a regression once its median is this much slower than the baseline's
+THRESHOLD = 0.25
+
+# Seconds importing ui.py may take in a fresh interpreter, the window can't appear before it has
+IMPORT_BUDGET = 0.1
+
+
+class Benchmark():
+
+    def __init__(self, name: str, run: Callable, setup: Callable = None, repeat: int = 20,
+                 teardown: Callable = None) -> None:
+        """
+        Benchmark class, a timed function and the untimed setup it is given fresh state by
+
+        Arguments:
+        name -- name reported in the results
+        run -- function timed, called with the result of setup
+        setup -- function called before every run, None to call run without arguments
+        repeat -- number of timed runs
+        teardown -- function called with the result of setup after every run, untimed
+
+        Returns:
+        None
+        """
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.repeat = repeat
+        self.teardown = teardown
+
+    def measure(self, scale: float = 1.0) -> dict:
+        """
+        Times the benchmark after one warm-up run
+
+        Arguments:
+        scale -- multiplies the number of runs (at least one)
+
+        Returns:
+        dict -- runs, median, mean, min, max and p95 in seconds
+        """
+        times = []
+        for i in range(max(int(self.repeat * scale), 1) + 1):
+            state = self.setup() if self.setup is not None else None
+            start = time.perf_counter()
+            self.run(state) if self.setup is not None else self.run()
+            elapsed = time.perf_counter() - start
+            if self.teardown is not None:
+                self.teardown(state)
+            if i:
+                times.append(elapsed)
+
+        times.sort()
+        return {
+            'runs': len(times),
+            'median': statistics.median(times),
+            'mean': statistics.fmean(times),
+            'min': times[0],
+            'max': times[-1],
+            'p95': times[min(int(0.95 * len(times)), len(times) - 1)],
+        }
+
+
+def _scraper(backend: str = 'browser', pool: DriverPool = None, **kwargs) -> WebScraper:
+    return WebScraper(DATE, backend=backend, pool=pool, **kwargs)
+
+
+def _entering(pool: DriverPool) -> WebScraper:
+    """
+    Setup of enter_phrases, a scraper with its phrases generated and a borrowed session
+
+    Arguments:
+    pool -- pool of sessions
+
+    Returns:
+    WebScraper -- the scraper, holding its session until its results are read
+    """
+    ws = _scraper(pool=pool)
+    ws.generate_phrases()
+    ws.driver = pool.acquire()
+    return ws
+
+
+def _entered(pool: DriverPool) -> WebScraper:
+    """
+    Setup of read_phrase_results, a scraper whose phrases have been entered in a borrowed session
+
+    Arguments:
+    pool -- pool of sessions
+
+    Returns:
+    WebScraper -- the scraper, holding its session until its results are read
+    """
+    ws = _entering(pool)
+    ws.enter_phrases(active_ciphers())
+    return ws
+
+
+def _read(ws: WebScraper) -> None:
+    try:
+        ws.read_phrase_results(TEAM1, TEAM2)
+    finally:
+        ws.pool.release(ws.driver)
+        ws.driver = None
+
+
+def _date_stats(ws: WebScraper) -> None:
+    with ws.session():
+        ws.get_date_stats()
+
+
+def _report(backend: str, pool: DriverPool = None, day: datetime = DATE) -> list[tuple]:
+    """
+    End-to-end report of one matchup, as the UI generates it
+
+    Arguments:
+    backend -- 'browser' or 'local'
+    pool -- pool of sessions for the browser backend
+    day -- date of the report
+
+    Returns:
+    list[tuple] -- ranked numbers
+    """
+    ws = WebScraper(day, backend=backend, pool=pool)
+    ws.run(TEAM1, TEAM2, active_ciphers())
+    return NumberCounter.from_report(ws.report).display_nums()
+
+
+def _season(backend: str, pool: DriverPool = None) -> int:
+    """
+    Reports of one matchup on every date of a season, as cli.py produces them
+
+    Arguments:
+    backend -- 'browser' or 'local'
+    pool -- pool of sessions for the browser backend
+
+    Returns:
+    int -- number of reports
+    """
+    from cli import iter_reports
+
+    kwargs = {'pool': pool} if pool is not None else {}
+    return sum(1 for _ in iter_reports(SEASON_START, SEASON_END, [(TEAM1, TEAM2)], backend, active_ciphers(), **kwargs))
+
+
+def _season_all_matchups() -> int:
+    """
+    Ranks every matchup on every date of a season with the vectorized scorer
+
+    Arguments:
+    None
+
+    Returns:
+    int -- number of dates scored
+    """
+    from scoring import score_date
+
+    days = (SEASON_END - SEASON_START).days + 1
+    for offset in range(days):
+        day = SEASON_START + timedelta(days=offset)
+        score_date(datetime(day.year, day.month, day.day), ciphers=active_ciphers())
+    return days
+
+
+def _tables() -> Callable:
+    """
+    Creates the UI tables create_tables renders into, in a hidden window
+
+    Arguments:
+    None
+
+    Returns:
+    Callable -- function rendering a report into the tables
+    """
+    import tkinter as tk
+    import ui
+    from cipher import column_labels
+    from index import NumberIndex
+    from widgets import GridTable
+
+    window = tk.Tk()
+    window.withdraw()
+    ui.cipher_table = GridTable(window, ['Phrase'] + column_labels(active_ciphers()))
+    ui.stats_table = GridTable(window, ['Statistic', 'No.1', 'No.2'], visible_rows=10)
+    ui.ranked_table = GridTable(window, ['Number', 'Freq.'])
+    ui.matches_table = GridTable(window, ['Number', 'Team', 'Alias', 'Cipher'])
+    ui.number_index = NumberIndex.build(active_ciphers())
+
+    ws = _scraper('local')
+    ws.run(TEAM1, TEAM2, active_ciphers())
+    ranked = NumberCounter.from_report(ws.report).display_nums()
+
+    def render() -> None:
+        ui.create_tables(ws, ranked)
+        window.update_idletasks()
+
+    return render
+
+
+def import_time(module: str = 'ui', repeat: int = 5) -> dict:
+    """
+    Times importing a module in fresh interpreters, as a cold start does
+
+    Arguments:
+    module -- module imported
+    repeat -- number of interpreters started
+
+    Returns:
+    dict -- runs, median, mean, min, max and p95 in seconds, as Benchmark.measure reports them
+    """
+    script = f'import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)'
+    times = sorted(
+        float(subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                             capture_output=True, text=True, check=True).stdout)
+        for _ in range(repeat)
+    )
+    return {
+        'runs': len(times),
+        'median': statistics.median(times),
+        'mean': statistics.fmean(times),
+        'min': times[0],
+        'max': times[-1],
+        'p95': times[min(int(0.95 * len(times)), len(times) - 1)],
+    }
+
+
+def benchmarks(pages: str = None) -> list[Benchmark]:
+    """
+    Builds the benchmarks, all offline: the browser backend runs on fake sessions or recorded pages
+
+    Arguments:
+    pages -- directory of recorded pages to replay instead of the fake sessions, None for the fake sessions
+
+    Returns:
+    list[Benchmark] -- every benchmark
+    """
+    factory = fake_factory
+    if pages is not None:
+        factory = replay_factory(PageCache(pages), 'replay')
+    pool = DriverPool(factory, size=2)
+
+    local = _scraper('local')
+    local.run(TEAM1, TEAM2, active_ciphers())
+    teams = default_store()
+
+    suite = [
+        Benchmark('generate_phrases', lambda ws: ws.generate_phrases(), lambda: _scraper('local'), 200),
+        Benchmark('enter_phrases', lambda ws: ws.enter_phrases(active_ciphers()), lambda: _entering(pool), 100, _read),
+        Benchmark('read_phrase_results', _read, lambda: _entered(pool), 100),
+        Benchmark('get_date_stats/browser', _date_stats, lambda: _scraper(pool=pool), 100),
+        Benchmark('get_date_stats/local', lambda ws: ws.get_date_stats(), lambda: _scraper('local'), 200),
+        Benchmark('number_counter', lambda: NumberCounter(local.date, local.phrase_results, local.date_stats), None, 500),
+        Benchmark('number_counter/report', lambda: NumberCounter.from_report(local.report), None, 500),
+        Benchmark('build_report', lambda: local.build_report(), None, 500),
+        Benchmark('display_nums', lambda nc: nc.display_nums(), lambda: NumberCounter.from_report(local.report), 500),
+        Benchmark('team_lookup', lambda: teams.matchup(TEAM1, TEAM2), None, 2000),
+        Benchmark('report/browser', lambda: _report('browser', pool), None, 50),
+        Benchmark('report/local', lambda: _report('local'), None, 100),
+        Benchmark('season/browser', lambda: _season('browser', pool), None, 2),
+        Benchmark('season/local', lambda: _season('local'), None, 3),
+        Benchmark('season/all_matchups', _season_all_matchups, None, 1),
+    ]
+
+    try:
+        render = _tables()
+        suite.append(Benchmark('create_tables', lambda: render(), None, 50))
+    except Exception as error:
+        # No display (e.g. on a server), rendering is skipped
+        print(f'create_tables skipped: {error}', file=sys.stderr)
+    return suite
+
+
+def compare(results: dict, baseline: dict, threshold: float = THRESHOLD) -> list[dict]:
+    """
+    Compares medians against a baseline
+
+    Arguments:
+    results -- benchmark name -> measurements
+    baseline -- earlier results in the same format
+    threshold -- fraction a median may grow by before it counts as a regression
+
+    Returns:
+    list[dict] -- name, baseline and current medians, ratio and whether it regressed, per shared benchmark
+    """
+    comparison = []
+    for name, measurement in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['median'], measurement['median']
+        ratio = after / before if before else float('inf')
+        comparison.append({
+            'name': name,
+            'baseline': before,
+            'median': after,
+            'ratio': ratio,
+            'regressed': ratio > 1 + threshold,
+        })
+    return comparison
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks every stage of a report, offline')
+    parser.add_argument('--only', action='append', default=[], help='run benchmarks whose name starts with this (repeatable)')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplies the number of runs')
+    parser.add_argument('--pages', help='replay recorded pages from this directory instead of the fake sessions')
+    parser.add_argument('--output', help='writes the results as JSON to this file, stdout otherwise')
+    parser.add_argument('--baseline', help='results to compare against')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='fraction a median may grow by before the run fails')
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET,
+                        help='seconds importing ui.py may take before the run fails')
+    args = parser.parse_args(argv)
+
+    results = dict()
+    # web.py prints while it scrapes, kept out of the JSON
+    with redirect_stdout(io.StringIO()):
+        for benchmark in benchmarks(args.pages):
+            if args.only and not any(benchmark.name.startswith(prefix) for prefix in args.only):
+                continue
+            results[benchmark.name] = benchmark.measure(args.scale)
+            print(f"{benchmark.name:<24} {results[benchmark.name]['median'] * 1000:10.3f} ms", file=sys.stderr)
+    if not args.only or any('import/ui'.startswith(prefix) for prefix in args.only):
+        results['import/ui'] = import_time('ui', max(int(5 * args.scale), 1))
+        print(f"{'import/ui':<24} {results['import/ui']['median'] * 1000:10.3f} ms", file=sys.stderr)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    regressed = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        report['comparison'] = compare(results, baseline, args.threshold)
+        regressed = [entry['name'] for entry in report['comparison'] if entry['regressed']]
+        report['regressed'] = regressed
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    failed = bool(regressed)
+    if regressed:
+        print(f'Regressed by more than {args.threshold:.0%}: {", ".join(regressed)}', file=sys.stderr)
+    if 'import/ui' in results and results['import/ui']['median'] > args.import_budget:
+        print(f"Importing ui.py took {results['import/ui']['median'] * 1000:.1f} ms, "
+              f"over the {args.import_budget * 1000:.0f} ms budget", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__=="__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+from collections import OrderedDict
+from cipher import letters_key
+import sqlite3
+import threading
+
+CACHE_PATH = 'phrase_cache.sqlite'
+
+
+class PhraseCache():
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = 4096) -> None:
+        """
+        PhraseCache class, stores cipher results of phrases in SQLite,
+        with a bounded in-memory LRU in front of it
+
+        Arguments:
+        path -- path of the SQLite database (':memory:' for no persistence)
+        max_entries -- maximum number of results kept in memory
+
+        Returns:
+        None
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'phrase TEXT NOT NULL, ciphers TEXT NOT NULL, result TEXT NOT NULL, '
+            'PRIMARY KEY (phrase, ciphers))'
+        )
+        self.connection.commit()
+
+    def get(self, phrase: str, ciphers: list[str]) -> list[str] | None:
+        """
+        Obtains the cached result of a phrase
+
+        Arguments:
+        phrase -- phrase to be looked up
+        ciphers -- cipher columns the result was computed for
+
+        Returns:
+        list[str] | None -- cipher values in string format, None on a miss
+        """
+        key = (phrase, _cipher_key(ciphers))
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return list(self.memory[key])
+
+            row = self.connection.execute(
+                'SELECT result FROM results WHERE phrase = ? AND ciphers = ?', key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            result = row[0].split(',')
+            self._remember(key, result)
+            return list(result)
+
+    def put_many(self, phrases: list[str], results: list[list[str]], ciphers: list[str]) -> None:
+        """
+        Stores the results of phrases
+
+        Arguments:
+        phrases -- phrases to be stored
+        results -- a 2d array of numbers in string format, one row per phrase
+        ciphers -- cipher columns the results were computed for
+
+        Returns:
+        None
+        """
+        cipher_key = _cipher_key(ciphers)
+        with self.lock:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO results (phrase, ciphers, result) VALUES (?, ?, ?)',
+                [(phrase, cipher_key, ','.join(result)) for phrase, result in zip(phrases, results)]
+            )
+            self.connection.commit()
+            for phrase, result in zip(phrases, results):
+                self._remember((phrase, cipher_key), list(result))
+
+    def stats(self) -> dict:
+        """
+        Obtains hit and miss statistics
+
+        Arguments:
+        None
+
+        Returns:
+        dict -- counts of memory hits, disk hits and misses, plus the hit rate
+        """
+        with self.lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'memory_entries': len(self.memory),
+            }
+
+    def close(self) -> None:
+        """
+        Closes the SQLite connection
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        with self.lock:
+            self.connection.close()
+
+    def _remember(self, key: tuple, result: list[str]) -> None:
+        """
+        Adds a result to the in-memory LRU, evicting the least recently used entry when full
+
+        Arguments:
+        key -- (phrase, cipher key) tuple
+        result -- cipher values in string format
+
+        Returns:
+        None
+        """
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+
+def _cipher_key(ciphers: list[str]) -> str:
+    """
+    Obtains the key results are stored under, the cipher columns and a digest of their letter values
+
+    Arguments:
+    ciphers -- cipher columns the results are computed for
+
+    Returns:
+    str -- e.g. 'ordinal|reduction|reverse|reverse reduction|chaldean@1f0c...'
+    """
+    return f"{'|'.join(ciphers)}@{letters_key(ciphers)}"
@@ -0,0 +1,342 @@
+import numpy as np
+import hashlib
+import json
+import os
+import string
+
+LETTERS = string.ascii_lowercase
+
+# Only ascii digits count, others such as '²' pass isdigit() but are worth nothing, as in byte_table
+DIGITS = string.digits
+
+# User-defined ciphers and the active cipher set, see load_ciphers
+CIPHERS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ciphers.json')
+
+# How a cipher's letter values are reduced before being summed
+REDUCTIONS = ('none', 'single digit')
+
+# Default columns gematrinator shows before any ciphers are added
+DEFAULT_CIPHERS = ['ordinal', 'reduction', 'reverse', 'reverse reduction']
+
+NUMBER_MODES = ('off', 'full', 'reduced')
+
+# Where cipher values come from, gematrinator in a browser or this module
+BACKENDS = ('browser', 'local')
+
+
+def _reduce(number: int) -> int:
+    """
+    Reduces a number to a single digit by repeatedly summing its digits
+
+    Arguments:
+    number -- a non-negative integer
+
+    Returns:
+    int -- the reduced single digit
+    """
+    while number > 9:
+        number = sum(int(digit) for digit in str(number))
+    return number
+
+
+def cipher_columns(ciphers: list[str]) -> list[str]:
+    """
+    Obtains the columns gematrinator shows once ciphers are added
+
+    Arguments:
+    ciphers -- list of ciphers to be added to the default ciphers
+
+    Returns:
+    list[str] -- the default ciphers followed by the added ciphers
+    """
+    return DEFAULT_CIPHERS + [cipher for cipher in ciphers if cipher not in DEFAULT_CIPHERS]
+
+
+_ORDINAL = list(range(1, 27))
+_REVERSE = list(range(26, 0, -1))
+
+# Letter values for each cipher, in alphabetical order
+CIPHERS = {
+    'ordinal': _ORDINAL,
+    'reduction': [_reduce(value) for value in _ORDINAL],
+    'reverse': _REVERSE,
+    'reverse reduction': [_reduce(value) for value in _REVERSE],
+    'chaldean': [1, 2, 3, 4, 5, 8, 3, 5, 1, 1, 2, 3, 4, 5, 7, 8, 1, 2, 3, 4, 6, 6, 6, 5, 1, 7],
+}
+
+# Letter values of the built-in ciphers, ciphers.json may replace any of them
+BUILTIN_CIPHERS = dict(CIPHERS)
+
+# Column names shown in the UI
+LABELS = {
+    'ordinal': 'Ordinal',
+    'reduction': 'Reduction',
+    'reverse': 'Reverse',
+    'reverse reduction': 'Rev. Red',
+    'chaldean': 'Chaldean',
+}
+
+# Ciphers added to the defaults when none are configured
+ACTIVE_CIPHERS = ['chaldean']
+
+
+def register_cipher(name: str, letters, reduction: str = 'none', label: str = None) -> None:
+    """
+    Adds a cipher to the registry, replacing any cipher of the same name
+
+    Arguments:
+    name -- lowercase cipher name, as gematrinator's cipher box shows it for ciphers the site has
+    letters -- letter -> value mapping, or a list of 26 values in alphabetical order
+    reduction -- 'none' or 'single digit' to reduce each letter value to a single digit
+    label -- column name shown in the UI, defaults to the name in title case
+
+    Returns:
+    None
+    """
+    if isinstance(letters, dict):
+        unknown = [letter for letter in letters if letter.lower() not in LETTERS]
+        if unknown:
+            raise ValueError(f'Unknown letters in cipher {name}: {unknown}')
+        lowered = {letter.lower(): value for letter, value in letters.items()}
+        values = [lowered.get(letter, 0) for letter in LETTERS]
+    else:
+        values = list(letters)
+        if len(values) != len(LETTERS):
+            raise ValueError(f'Cipher {name} needs {len(LETTERS)} letter values, got {len(values)}')
+    if not all(isinstance(value, int) and value >= 0 for value in values):
+        raise ValueError(f'Letter values of cipher {name} must be non-negative integers')
+    if reduction not in REDUCTIONS:
+        raise ValueError(f'Unknown reduction for cipher {name}: {reduction}')
+
+    if reduction == 'single digit':
+        values = [_reduce(value) for value in values]
+    CIPHERS[name] = values
+    _letters_keys.clear()
+    LABELS[name] = label if label is not None else name.title()
+
+
+_letters_keys = dict()
+
+
+def letters_key(columns: list[str]) -> str:
+    """
+    Obtains a short digest of the letter values of cipher columns, stored alongside results
+    so they are recomputed once ciphers.json changes a cipher's letters
+
+    Arguments:
+    columns -- cipher columns
+
+    Returns:
+    str -- 12 hex digits, the same for the same columns and letter values
+    """
+    key = tuple(columns)
+    if key not in _letters_keys:
+        letters = json.dumps([[column, CIPHERS[column]] for column in columns])
+        _letters_keys[key] = hashlib.sha1(letters.encode()).hexdigest()[:12]
+    return _letters_keys[key]
+
+
+def cipher_set_path(path: str, ciphers: list[str], default: list[str]) -> str:
+    """
+    Obtains the path of a file built for a set of ciphers, so each set has a file of its own and
+    changing a cipher's letters in ciphers.json builds a new file rather than reusing stale values
+
+    Arguments:
+    path -- path of the file built for the default set
+    ciphers -- list of ciphers to be added
+    default -- ciphers the file at path is built with
+
+    Returns:
+    str -- path itself for the default set with its built-in letters, otherwise named after the added ciphers
+           and a digest of their letters (e.g. team_nums_chaldean_sumerian_<letters key>.csv for team_nums.csv)
+    """
+    columns = cipher_columns(ciphers)
+    if columns == cipher_columns(default) and all(CIPHERS[column] == BUILTIN_CIPHERS.get(column) for column in columns):
+        return path
+    stem, extension = os.path.splitext(path)
+    added = [column.replace(' ', '-') for column in columns[len(DEFAULT_CIPHERS):]] or ['default']
+    return f"{stem}_{'_'.join(added)}_{letters_key(columns)}{extension}"
+
+
+def load_ciphers(path: str = CIPHERS_PATH) -> list[str]:
+    """
+    Registers the ciphers declared in a config file and makes its cipher set active.
+    The file is JSON: {"active": [names], "ciphers": {name: {"letters": ..., "reduction": ..., "label": ...}}}
+
+    Arguments:
+    path -- path of the config file, nothing is loaded if it does not exist
+
+    Returns:
+    list[str] -- the active ciphers
+    """
+    global ACTIVE_CIPHERS
+    try:
+        with open(path) as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        return ACTIVE_CIPHERS
+
+    for name, cipher in config.get('ciphers', {}).items():
+        register_cipher(name.lower(), cipher['letters'], cipher.get('reduction', 'none'), cipher.get('label'))
+
+    active = [name.lower() for name in config.get('active', ACTIVE_CIPHERS)]
+    unknown = [name for name in active if name not in CIPHERS]
+    if unknown:
+        raise ValueError(f'Unknown active ciphers in {path}: {unknown}')
+    ACTIVE_CIPHERS = active
+    return ACTIVE_CIPHERS
+
+
+def active_ciphers() -> list[str]:
+    """
+    Obtains the ciphers added to the defaults, as configured in ciphers.json
+
+    Arguments:
+    None
+
+    Returns:
+    list[str] -- the active ciphers
+    """
+    return list(ACTIVE_CIPHERS)
+
+
+def column_labels(ciphers: list[str]) -> list[str]:
+    """
+    Obtains the UI column names of the columns shown once ciphers are added
+
+    Arguments:
+    ciphers -- list of ciphers to be added to the default ciphers
+
+    Returns:
+    list[str] -- a label per column
+    """
+    return [LABELS.get(cipher, cipher.title()) for cipher in cipher_columns(ciphers)]
+
+
+class CipherEngine():
+
+    def __init__(self, ciphers: list[str] = ['chaldean'], numbers: str = 'reduced') -> None:
+        """
+        CipherEngine class, computes cipher values locally in place of gematrinator.
+        Mirrors the calculator's columns: the default ciphers followed by any added ciphers
+
+        Arguments:
+        ciphers -- list of ciphers to be added to the default ciphers
+        numbers -- how digits in a phrase are counted ('off', 'full' or 'reduced')
+
+        Returns:
+        None
+        """
+        unknown = [cipher for cipher in ciphers if cipher not in CIPHERS]
+        if unknown:
+            raise ValueError(f'Unknown ciphers: {unknown}')
+        if numbers not in NUMBER_MODES:
+            raise ValueError(f'Unknown number mode: {numbers}')
+
+        self.ciphers = cipher_columns(ciphers)
+        self.numbers = numbers
+
+        # Letter -> tuple of values, one per cipher
+        self.table = {
+            letter: tuple(CIPHERS[cipher][i] for cipher in self.ciphers)
+            for i, letter in enumerate(LETTERS)
+        }
+
+        # Both cases of each letter, lower() would also map non-ascii characters such as the Kelvin sign onto letters
+        self.case_table = dict(self.table)
+        self.case_table.update((letter.upper(), values) for letter, values in self.table.items())
+
+        # The same values as a byte translation table, utf-8 byte -> value per cipher.
+        # Other bytes (including those of non-ascii characters) are worth nothing, as in compute
+        self.byte_table = np.zeros((256, len(self.ciphers)), dtype=np.int64)
+        for letter, values in self.table.items():
+            self.byte_table[ord(letter)] = values
+            self.byte_table[ord(letter.upper())] = values
+        if numbers == 'reduced':
+            for digit in range(10):
+                self.byte_table[ord(str(digit))] = digit
+
+    def compute(self, phrase: str) -> list[str]:
+        """
+        Computes the values of a phrase for every cipher
+
+        Arguments:
+        phrase -- phrase to be computed
+
+        Returns:
+        list[str] -- cipher values in string format, same as read from gematrinator
+        """
+        totals = [0] * len(self.ciphers)
+        table = self.case_table
+        for char in phrase:
+            values = table.get(char)
+            if values is not None:
+                for i, value in enumerate(values):
+                    totals[i] += value
+
+        number_value = self._number_value(phrase)
+        return [str(total + number_value) for total in totals]
+
+    def compute_all(self, phrases: list[str]) -> list[list[str]]:
+        """
+        Computes the values of many phrases
+
+        Arguments:
+        phrases -- phrases to be computed
+
+        Returns:
+        list[list[str]] -- a 2d array of numbers in string format
+        """
+        return [[str(value) for value in row] for row in self.compute_values(phrases).tolist()]
+
+    def compute_values(self, phrases: list[str]) -> np.ndarray:
+        """
+        Computes the values of a batch of phrases at once, by translating all their bytes through byte_table
+
+        Arguments:
+        phrases -- phrases to be computed
+
+        Returns:
+        np.ndarray -- values with one row per phrase and one column per cipher
+        """
+        encoded = [phrase.encode() for phrase in phrases]
+        lengths = np.array([len(phrase) for phrase in encoded], dtype=np.int64)
+        ends = np.cumsum(lengths)
+        codes = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+        # Running totals, a phrase's values are the difference between its end and start
+        totals = np.zeros((len(codes) + 1, len(self.ciphers)), dtype=np.int64)
+        np.cumsum(self.byte_table[codes], axis=0, out=totals[1:])
+        values = totals[ends] - totals[ends - lengths]
+
+        if self.numbers == 'full':
+            values += np.array([self._number_value(phrase) for phrase in phrases], dtype=np.int64)[:, None]
+        return values
+
+    def _number_value(self, phrase: str) -> int:
+        """
+        Obtains the value contributed by the digits of a phrase
+
+        Arguments:
+        phrase -- phrase to be computed
+
+        Returns:
+        int -- value added to every cipher
+        """
+        if self.numbers == 'off':
+            return 0
+        if self.numbers == 'reduced':
+            return sum(int(char) for char in phrase if char in DIGITS)
+        # Full, each run of digits counts as its whole number
+        total = 0
+        digits = ''
+        for char in phrase + ' ':
+            if char in DIGITS:
+                digits += char
+            elif digits:
+                total += int(digits)
+                digits = ''
+        return total
+
+
+load_ciphers()
@@ -0,0 +1,153 @@
+from datetime import date, datetime, timedelta
+from itertools import combinations
+from cipher import BACKENDS, active_ciphers
+from cache import PhraseCache
+from datestore import DateStore
+from instrument import TraceWriter, enable
+from pool import DriverPool, chrome_factory
+from replay import PAGES_PATH, REPLAY_MODES, PageCache, replay_factory
+from teams import default_store
+from web import WebScraper
+import argparse
+import json
+import sys
+
+
+def iter_dates(start: date, end: date):
+    """
+    Iterates over every date from start to end (inclusive)
+
+    Arguments:
+    start -- first date
+    end -- last date
+
+    Returns:
+    generator of dates
+    """
+    for offset in range((end - start).days + 1):
+        yield start + timedelta(days=offset)
+
+
+def iter_reports(start: date, end: date, matchups: list[tuple] = None, backend: str = 'local',
+                 ciphers: list[str] = ['chaldean'], significance: int = 2, **kwargs):
+    """
+    Iterates over the reports of every matchup on every date, one date in memory at a time.
+    The date's phrases and stats are obtained once and shared by all its matchups
+
+    Arguments:
+    start -- first date
+    end -- last date
+    matchups -- (team1, team2) tuples, every pairing of teams.csv if None
+    backend -- 'browser' to use gematrinator, 'local' to compute everything in process
+    ciphers -- list of ciphers to be added
+    significance -- minimum count for a number to be ranked
+    kwargs -- passed on to WebScraper (e.g. cache, pool, teams, store)
+
+    Returns:
+    generator of report dicts, see WebScraper.matchup_report
+    """
+    for day in iter_dates(start, end):
+        ws = WebScraper(datetime(day.year, day.month, day.day), backend=backend, **kwargs)
+        ws.run(None, None, ciphers)
+
+        pairs = matchups if matchups is not None else combinations(ws.teams.teams, 2)
+        for team1, team2 in pairs:
+            yield ws.matchup_report(team1, team2, significance)
+
+
+def parse_matchup(text: str) -> tuple:
+    """
+    Parses a matchup argument
+
+    Arguments:
+    text -- 'team1:team2'
+
+    Returns:
+    tuple -- (team1, team2)
+    """
+    teams = [name.strip() for name in text.split(':')]
+    if len(teams) != 2 or not all(teams):
+        raise argparse.ArgumentTypeError(f"Matchup must be 'team1:team2', got {text!r}")
+    return tuple(teams)
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description='Streams one JSON line per (date, matchup) report')
+    parser.add_argument('--start', required=True, type=date.fromisoformat, help='first date, YYYY-MM-DD')
+    parser.add_argument('--end', type=date.fromisoformat, help='last date, YYYY-MM-DD (defaults to --start)')
+    parser.add_argument('--matchup', action='append', default=[],
+                        help="'team1:team2' (repeatable), or 'all' for every pairing")
+    parser.add_argument('--backend', choices=BACKENDS, default='local')
+    parser.add_argument('--cipher', action='append', dest='ciphers', help='cipher to add (repeatable), defaults to the active ciphers in ciphers.json')
+    parser.add_argument('--significance', type=int, default=2)
+    parser.add_argument('--exec-path', default='chromedriver.exe')
+    parser.add_argument('--sessions', type=int, default=2, help='browser sessions to keep open')
+    parser.add_argument('--pages', choices=('off',) + REPLAY_MODES, default='off',
+                        help="record and replay scraped pages, 'replay' works offline")
+    parser.add_argument('--pages-dir', default=PAGES_PATH, help='directory the recorded pages are kept in')
+    parser.add_argument('--no-cache', action='store_true', help='skip the phrase result cache')
+    parser.add_argument('--store', action='store_true', help='read dates from the precomputed date store, building it if stale')
+    parser.add_argument('--trace', help='writes a JSON trace of every stage to this file')
+    parser.add_argument('--metrics', help='writes the stage, command and wait counters to this file in the Prometheus text format')
+    args = parser.parse_args(argv)
+
+    if not args.matchup:
+        parser.error("at least one --matchup is required ('all' for every pairing)")
+    if 'all' in args.matchup and set(args.matchup) != {'all'}:
+        parser.error("'all' already covers every pairing, it cannot be combined with named matchups")
+    if args.end is not None and args.end < args.start:
+        parser.error(f'--end {args.end} is earlier than --start {args.start}')
+    ciphers = args.ciphers or active_ciphers()
+
+    # Every team is checked before the first report is written, rather than failing part way through
+    teams = default_store(ciphers)
+    matchups = None
+    if 'all' not in args.matchup:
+        matchups = []
+        for text in args.matchup:
+            try:
+                matchup = parse_matchup(text)
+                for name in matchup:
+                    teams.lookup(name)
+            except argparse.ArgumentTypeError as error:
+                parser.error(str(error))
+            except KeyError as error:
+                parser.error(error.args[0])
+            matchups.append(matchup)
+
+    # Traces are streamed to the file as each report ends, the counters alone need none kept
+    writer = TraceWriter(args.trace) if args.trace else None
+    tracer = enable(max_traces=0, sink=writer) if args.trace or args.metrics else None
+
+    kwargs = {'teams': teams}
+    pool = None
+    if args.backend == 'browser':
+        factory = chrome_factory(args.exec_path, headless=True)
+        if args.pages != 'off':
+            factory = replay_factory(PageCache(args.pages_dir), args.pages, factory)
+        pool = DriverPool(factory, size=args.sessions)
+        kwargs['pool'] = pool
+    if not args.no_cache:
+        kwargs['cache'] = PhraseCache()
+    if args.store:
+        kwargs['store'] = DateStore.load(ciphers)
+
+    try:
+        for report in iter_reports(args.start, args.end or args.start, matchups, args.backend,
+                                   ciphers, args.significance, **kwargs):
+            sys.stdout.write(json.dumps(report) + '\n')
+            sys.stdout.flush()
+    except BrokenPipeError:
+        pass
+    finally:
+        if pool is not None:
+            pool.close()
+        if writer is not None:
+            writer.close()
+        if args.metrics:
+            with open(args.metrics, 'w') as f:
+                f.write(tracer.prometheus())
+
+
+if __name__=="__main__":
+    main()
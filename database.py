@@ -1,28 +1,38 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from extract import SELECT_CIPHERS_SCRIPT, element_html, parse_history_table
+from cipher import BACKENDS, CIPHERS, DEFAULT_CIPHERS, CipherEngine, active_ciphers, cipher_columns
+from pool import DriverPool, default_pool
+from teams import nums_path_for
+from instrument import TimedWait, span, wrap_driver
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import csv
-import time
+import os
 
 class WebScraperDatabase():
 
-    def __init__(self, exec_path: str = 'chromedriver.exe') -> None:
+    def __init__(self, exec_path: str = 'chromedriver.exe', backend: str = 'browser', pool: DriverPool = None) -> None:
         """
         WebScraper class, takes path for browser driver executable
 
         Arguments:
-        date -- date which the scraper will scrape for
         exec_path -- path of the driver's executable
+        backend -- 'browser' to use gematrinator, 'local' to compute cipher values in process
+        pool -- pool browser sessions are borrowed from, defaults to the shared pool for exec_path
 
         Returns:
         None
         """
-
-        self.service = Service(executable_path=exec_path)
-        self.driver = webdriver.Chrome(service=self.service)
+        if backend not in BACKENDS:
+            raise ValueError(f'Unknown backend: {backend}')
+
+        self.backend = backend
+        self.driver = None
+        self.pool = None
+        if backend == 'browser':
+            self.pool = pool if pool is not None else default_pool(exec_path)
+        self.engine = None
         self.phrases = []
 
     def generate_phrases(self) -> None:
@@ -54,7 +64,7 @@ class WebScraperDatabase():
         Returns:
         None
         """
-        WebDriverWait(self.driver, 10).until(
+        TimedWait(self.driver, 10).until(
             EC.element_to_be_clickable((By.CLASS_NAME, "calcMenuItem"))
         )
 
@@ -65,98 +75,298 @@ class WebScraperDatabase():
             if element.text.lower() == 'ciphers ':
                 element.click()
 
-                WebDriverWait(self.driver, 10).until(
+                TimedWait(self.driver, 10).until(
                     EC.element_to_be_clickable((By.ID, 'CancelCiphers'))
                 )
                 self.driver.find_element(By.ID, 'CancelCiphers').click()
 
-                WebDriverWait(self.driver, 10).until(
+                TimedWait(self.driver, 10).until(
                     EC.element_to_be_clickable((By.CLASS_NAME, "calcMenuItem"))
                 )
                 element.click()
 
         # Applying all ciphers
         
-        WebDriverWait(self.driver, 10).until(
+        TimedWait(self.driver, 10).until(
             EC.element_to_be_clickable((By.ID, 'cipherBox'))
         )
 
-        li_elements = self.driver.find_element(By.ID, 'cipherBox').find_elements(By.TAG_NAME, 'li')
-        for li in li_elements:
-            text = li.find_element(By.TAG_NAME, 'font').text
-            if text.lower() in ciphers:
-                li.find_element(By.TAG_NAME, 'input').click()
-        
-        #Update Click
-        self.driver.find_element(By.ID, 'SaveCiphers').click()        
+        # Ticking ciphers and saving in one round-trip. A reused session may still have other ciphers ticked
+        wanted = [cipher.lower() for cipher in ciphers]
+        unwanted = [cipher for cipher in CIPHERS if cipher not in DEFAULT_CIPHERS and cipher not in wanted]
+        ticked = self.driver.execute_script(SELECT_CIPHERS_SCRIPT, wanted, unwanted)
+
+        # A cipher only defined in ciphers.json would leave its column out and misalign the rest
+        missing = [cipher for cipher in wanted if cipher not in DEFAULT_CIPHERS and cipher not in ticked]
+        if missing:
+            raise ValueError(f"gematrinator has no {', '.join(missing)} cipher, use the local backend")
+
+    def read_phrase_results(self, ciphers: list[str] = ['chaldean'], batch_size: int = 5,
+                            path: str = None) -> None:
+        """
+        Reads the results of the phrases from gematrinator and writes them to team_nums.csv.
+        Phrases already stored are skipped, and progress is checkpointed after every batch
+        so an interrupted build resumes where it stopped
+
+        Arguments:
+        ciphers -- list of ciphers to be added
+        batch_size -- number of phrases entered before the results are read back
+        path -- path of the file being built, defaults to the team_nums file of the ciphers
+
+        Returns:
+        None
+        """
+        if batch_size < 1:
+            raise ValueError('Batch size must be at least 1')
+        path = path if path is not None else nums_path_for(ciphers)
+
+        stored, missing = self.missing_phrases(ciphers, path)
+        if missing:
+            with span('start_entry'):
+                self.start_entry(ciphers)
+            with open(path + '.partial', 'a', newline='') as f:
+                writer = csv.writer(f, lineterminator='\n')
+                for i in range(0, len(missing), batch_size):
+                    batch = missing[i:i + batch_size]
+                    with span('read_batch', phrases=len(batch)):
+                        results = self.read_batch(batch)
+                    writer.writerows([phrase] + result for phrase, result in zip(batch, results))
+                    f.flush()
+                    stored.update(zip(batch, results))
+
+        with span('write_results'):
+            self.write_results(stored, path)
+
+    def missing_phrases(self, ciphers: list[str], path: str) -> tuple[dict, list[str]]:
+        """
+        Obtains the results already stored and the phrases still to be read
+
+        Arguments:
+        ciphers -- list of ciphers to be added
+        path -- path of the file being built, its checkpoint is read too
+
+        Returns:
+        tuple -- (phrase -> cipher values in string format, unique phrases without results)
+        """
+        n_columns = len(cipher_columns(ciphers))
+        stored = _read_results(path, n_columns)
+        stored.update(_read_results(path + '.partial', n_columns))
+        missing = list(dict.fromkeys(phrase for phrase in self.phrases if phrase not in stored))
+        return stored, missing
 
-    def read_phrase_results(self, ciphers: list[str] = ['chaldean']) -> None:
+    def write_results(self, stored: dict, path: str) -> None:
         """
-        Reads the results of the phrases from gematrinator
+        Writes the results of every phrase in teams.csv order and swaps the file in atomically.
+        The checkpoint is removed once the file is complete
 
         Arguments:
+        stored -- phrase -> cipher values in string format
+        path -- path of the file being built
+
+        Returns:
         None
+        """
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerows([phrase] + stored[phrase] for phrase in self.phrases)
+        os.replace(temp_path, path)
+        if os.path.exists(path + '.partial'):
+            os.remove(path + '.partial')
+
+    def start_entry(self, ciphers: list[str]) -> None:
+        """
+        Prepares the backend for entering phrases
+
+        Arguments:
+        ciphers -- list of ciphers to be added
 
         Returns:
         None
         """
+        if self.backend == 'local':
+            self.engine = CipherEngine(ciphers)
+            return
 
         self.driver.get("https://gematrinator.com/calculator")
         self.add_ciphers(ciphers)
 
-        WebDriverWait(self.driver, 10).until(
+        TimedWait(self.driver, 10).until(
             EC.element_to_be_clickable((By.ID, "EntryField"))
         )
 
+    def read_batch(self, phrases: list[str]) -> list[list[str]]:
+        """
+        Enters a batch of phrases and reads their results back
+
+        Arguments:
+        phrases -- phrases to be entered
+
+        Returns:
+        list[list[str]] -- a 2d array of numbers in string format, one row per phrase
+        """
+        if self.backend == 'local':
+            return self.engine.compute_all(phrases)
+
         input_element = self.driver.find_element(By.ID, "EntryField")
+        for phrase in phrases:
+            input_element.clear()
+            input_element.send_keys(phrase + Keys.ENTER)
 
-        for i in range(1,(len(self.phrases) // 5)+1):
-            
-            for j in range((i-1)*5, i*5):
-                input_element.clear()
-                phrase = self.phrases[j]
-                input_element.send_keys(phrase + Keys.ENTER)
-
-
-            WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "printHistoryTable"))
-            )
-
-            results = []
-            tr_elements = self.driver.find_element(By.ID, 'printHistoryTable').find_elements(By.TAG_NAME, 'tr')[1:]
-            for j in range(5):
-                td_elements = tr_elements[j].find_elements(By.TAG_NAME, 'td')
-                cipher_results = []
-                for td in td_elements:
-                    if td.get_attribute('class') == 'HistorySum':
-                        cipher_result = td.find_element(By.ID, 'finalBreakNum').text
-                        cipher_results.append(cipher_result)
-                results.append(cipher_results)
-            
-            results.reverse()
-
-            with open('team_nums.csv', 'a', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerows([phrase] + result for phrase, result in zip(self.phrases[(i-1)*5: i*5], results))
-            
-            
-
-    def run(self, ciphers: list[str] = ['chaldean']) -> None:
+        TimedWait(self.driver, 10).until(
+            EC.element_to_be_clickable((By.ID, "printHistoryTable"))
+        )
+
+        # History table lists the newest phrase first
+        results = parse_history_table(element_html(self.driver, 'printHistoryTable'), len(phrases))
+        results.reverse()
+        return results
+
+    def run(self, ciphers: list[str] = ['chaldean'], batch_size: int = 5) -> None:
         """
         Runs the scraper class
 
         Arguments:
-        None
+        ciphers -- list of ciphers to be added
+        batch_size -- number of phrases entered before the results are read back
 
         Returns:
         None
         """
-        self.generate_phrases()
-        self.read_phrase_results(ciphers)
+        with span('team_nums', backend=self.backend, ciphers=list(ciphers)):
+            self.generate_phrases()
+            if self.pool is None:
+                self.read_phrase_results(ciphers, batch_size)
+                return
+
+            with self.pool.session() as driver:
+                self.driver = wrap_driver(driver)
+                try:
+                    self.read_phrase_results(ciphers, batch_size)
+                finally:
+                    self.driver = None
+
+
+def build_parallel(workers: int = None, ciphers: list[str] = ['chaldean'], backend: str = 'browser',
+                   exec_path: str = 'chromedriver.exe', batch_size: int = 5, retries: int = 2,
+                   path: str = None, headless: bool = True) -> None:
+    """
+    Builds team_nums.csv with the missing phrases sharded across worker processes,
+    each owning its own backend. Shards are checkpointed as they finish and
+    failed shards are retried, the merged file is always in teams.csv order
+
+    Arguments:
+    workers -- number of worker processes, defaults to the number of cores
+    ciphers -- list of ciphers to be added
+    backend -- 'browser' to use gematrinator, 'local' to compute cipher values in process
+    exec_path -- path of the driver's executable
+    batch_size -- number of phrases entered before the results are read back
+    retries -- times a failed shard is retried before the build gives up
+    path -- path of the file being built, defaults to the team_nums file of the ciphers
+    headless -- runs each worker's Chrome without a window if True
+
+    Returns:
+    None
+    """
+    workers = workers or os.cpu_count() or 1
+    path = path if path is not None else nums_path_for(ciphers)
+    builder = WebScraperDatabase(exec_path, backend)
+    builder.generate_phrases()
+    stored, missing = builder.missing_phrases(ciphers, path)
+
+    shard_size = -(-len(missing) // workers) if missing else 1
+    shards = [missing[i:i + shard_size] for i in range(0, len(missing), shard_size)]
+    attempts = [0] * len(shards)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(path + '.partial', 'a', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        futures = {
+            executor.submit(_build_shard, shard, ciphers, backend, exec_path, batch_size, headless): i
+            for i, shard in enumerate(shards)
+        }
+        done_count = 0
+        while futures:
+            for future in as_completed(list(futures)):
+                i = futures.pop(future)
+                try:
+                    results = future.result()
+                except Exception as error:
+                    attempts[i] += 1
+                    if attempts[i] > retries:
+                        raise RuntimeError(f'Shard {i + 1} failed {attempts[i]} times') from error
+                    print(f'Shard {i + 1}/{len(shards)} failed ({error}), retrying')
+                    future = executor.submit(_build_shard, shards[i], ciphers, backend, exec_path, batch_size, headless)
+                    futures[future] = i
+                    continue
+
+                writer.writerows([phrase] + result for phrase, result in zip(shards[i], results))
+                f.flush()
+                stored.update(zip(shards[i], results))
+                done_count += 1
+                print(f'Shard {i + 1}/{len(shards)} done ({len(shards[i])} phrases, {done_count}/{len(shards)} shards)')
+
+    builder.write_results(stored, path)
+
+
+def _build_shard(phrases: list[str], ciphers: list[str], backend: str, exec_path: str,
+                 batch_size: int, headless: bool) -> list[list[str]]:
+    """
+    Reads the results of one shard of phrases, run in a worker process
+
+    Arguments:
+    phrases -- phrases of the shard
+    ciphers -- list of ciphers to be added
+    backend -- 'browser' to use gematrinator, 'local' to compute cipher values in process
+    exec_path -- path of the driver's executable
+    batch_size -- number of phrases entered before the results are read back
+    headless -- runs Chrome without a window if True
+
+    Returns:
+    list[list[str]] -- a 2d array of numbers in string format, one row per phrase
+    """
+    pool = DriverPool(size=1, headless=headless, exec_path=exec_path) if backend == 'browser' else None
+    builder = WebScraperDatabase(exec_path, backend, pool=pool)
+
+    results = []
+    if pool is None:
+        builder.start_entry(ciphers)
+        for i in range(0, len(phrases), batch_size):
+            results.extend(builder.read_batch(phrases[i:i + batch_size]))
+        return results
+
+    try:
+        with pool.session() as driver:
+            builder.driver = driver
+            builder.start_entry(ciphers)
+            for i in range(0, len(phrases), batch_size):
+                results.extend(builder.read_batch(phrases[i:i + batch_size]))
+    finally:
+        pool.close()
+    return results
+
+
+def _read_results(path: str, n_columns: int) -> dict:
+    """
+    Reads stored phrase results, ignoring rows built for a different set of ciphers
+
+    Arguments:
+    path -- path of a team_nums.csv style file
+    n_columns -- number of cipher columns expected
+
+    Returns:
+    dict -- phrase -> cipher values in string format
+    """
+    results = dict()
+    try:
+        with open(path, newline='') as f:
+            for row in csv.reader(f):
+                if len(row) == n_columns + 1:
+                    results.setdefault(row[0], row[1:])
+    except FileNotFoundError:
+        pass
+    return results
 
-        time.sleep(15)
-        self.driver.quit()
 
 if __name__=="__main__":
     a = WebScraperDatabase()
-    a.run()
\ No newline at end of file
+    a.run(active_ciphers())
\ No newline at end of file
@@ -0,0 +1,394 @@
+from datetime import date, datetime, timedelta
+from cipher import CIPHERS, CipherEngine, active_ciphers, cipher_columns, cipher_set_path
+from moon import TABLE_END, TABLE_START, ZODIAC_SIGNS, moon_sign
+from numerology import date_stats
+from teams import NUMS_CIPHERS
+import numpy as np
+import argparse
+import json
+import os
+import threading
+
+# Store of NUMS_CIPHERS, other cipher sets have a file of their own, see store_path_for
+STORE_PATH = 'date_store.bin'
+
+MAGIC = b'DATESTOR'
+
+# Bumped whenever the file layout or the way phrases and stats are generated changes
+STORE_VERSION = 1
+
+# Stored in place of a value that is 'NA'
+NA = -1
+
+
+class DateStore():
+
+    def __init__(self, path: str) -> None:
+        """
+        DateStore class, a precomputed columnar file of every per-date input of a report
+        (phrases, their cipher values, moon sign and date stats) from TABLE_START to TABLE_END.
+        The file is memory-mapped, a date's inputs are read straight from it by day offset.
+        Use DateStore.load to open a store, building it first if it is missing or stale
+
+        Arguments:
+        path -- path of the store file
+
+        Returns:
+        None
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path} is not a date store')
+            header_size = int.from_bytes(f.read(8), 'little')
+            self.header = json.loads(f.read(header_size))
+
+        self.signature = self.header['signature']
+        self.columns = self.signature['columns']
+        self.start = date.fromisoformat(self.signature['start'])
+        self.days = self.header['days']
+
+        self.arrays = dict()
+        for name, (offset, dtype, shape) in self.header['arrays'].items():
+            self.arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=tuple(shape))
+
+        # Vocabulary of phrases and stat names, as one utf-8 blob
+        self.text = self.arrays['text']
+        self.text_offsets = self.arrays['text_offsets']
+        self.phrase_ids = self.arrays['phrase_ids']
+        self.stat_ids = self.arrays['stat_ids']
+        self.values = self.arrays['values']
+        self.stats = self.arrays['stats']
+        self.moon = self.arrays['moon']
+
+    @classmethod
+    def load(cls, ciphers: list[str] = ['chaldean'], path: str = None, build: bool = True) -> 'DateStore':
+        """
+        Opens the store, rebuilding it if it is missing or was built for other ciphers or another version
+
+        Arguments:
+        ciphers -- list of ciphers to be added
+        path -- path of the store file, defaults to the one for the ciphers
+        build -- rebuild a missing or stale store, otherwise return None
+
+        Returns:
+        DateStore -- the opened store, None if it is missing or stale and build is False
+        """
+        path = path if path is not None else store_path_for(ciphers)
+        try:
+            store = cls(path)
+            if store.signature == signature(ciphers):
+                return store
+            # Unmapped before the file is rebuilt, Windows can't replace a mapped file
+            store.close()
+        except (OSError, ValueError, KeyError):
+            pass
+
+        if not build:
+            return None
+        build_store(ciphers, path)
+        return cls(path)
+
+    def close(self) -> None:
+        """
+        Unmaps the file, the store can't be read afterwards.
+        Arrays obtained from the store keep their own mapping until they are released
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        self.arrays = dict()
+        self.text = self.text_offsets = self.phrase_ids = self.stat_ids = None
+        self.values = self.stats = self.moon = None
+
+    def covers(self, day: datetime.date, ciphers: list[str]) -> bool:
+        """
+        Checks whether a date's inputs can be read from the store
+
+        Arguments:
+        day -- date of the report
+        ciphers -- list of ciphers to be added
+
+        Returns:
+        bool -- True if the date is in range and the store has the ciphers' columns
+        """
+        return 0 <= self.offset(day) < self.days and cipher_columns(ciphers) == self.columns
+
+    def offset(self, day: datetime.date) -> int:
+        return day.toordinal() - self.start.toordinal()
+
+    def _text(self, index: int) -> str:
+        return bytes(self.text[self.text_offsets[index]:self.text_offsets[index + 1]]).decode()
+
+    def moon_sign(self, day: datetime.date) -> str:
+        """
+        Obtains the moon sign of a date
+
+        Arguments:
+        day -- date in range
+
+        Returns:
+        str -- lowercase zodiac sign (e.g. gemini)
+        """
+        return ZODIAC_SIGNS[self.moon[self.offset(day)]]
+
+    def phrase_values(self, day: datetime.date) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Obtains the vocabulary indices and cipher values of a date's phrases, without copying
+
+        Arguments:
+        day -- date in range
+
+        Returns:
+        tuple -- (phrase indices, values with one row per phrase)
+        """
+        ids = self.phrase_ids[self.offset(day)]
+        ids = ids[ids != NA]
+        return ids, self.values[ids]
+
+    def phrases(self, day: datetime.date) -> tuple[list[str], list[list[str]]]:
+        """
+        Obtains a date's phrases and their cipher values, as generate_phrases and read_phrase_results produce them
+
+        Arguments:
+        day -- date in range
+
+        Returns:
+        tuple -- (phrases, a 2d array of numbers in string format)
+        """
+        ids, values = self.phrase_values(day)
+        results = [[str(value) if value != NA else 'NA' for value in row] for row in values.tolist()]
+        return self.texts(ids), results
+
+    def texts(self, ids: np.ndarray) -> list[str]:
+        """
+        Obtains the phrases or statistic names of vocabulary indices
+
+        Arguments:
+        ids -- vocabulary indices, e.g. from phrase_values or stat_values
+
+        Returns:
+        list[str] -- the text of each index
+        """
+        return [self._text(i) for i in ids.tolist()]
+
+    def vocabulary(self) -> tuple[list[str], np.ndarray]:
+        """
+        Obtains every phrase generated for any date in the store, with its cipher values
+
+        Arguments:
+        None
+
+        Returns:
+        tuple -- (phrases, values with one row per phrase)
+        """
+        ids = np.unique(self.phrase_ids)
+        ids = ids[ids != NA]
+        return [self._text(i) for i in ids.tolist()], self.values[ids]
+
+    def stat_values(self, day: datetime.date) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Obtains the vocabulary indices of a date's statistic names and their values, without copying
+
+        Arguments:
+        day -- date in range
+
+        Returns:
+        tuple -- (name indices, values with two per statistic, NA where missing)
+        """
+        offset = self.offset(day)
+        return self.stat_ids[offset], self.stats[offset]
+
+    def date_stats(self, day: datetime.date) -> dict:
+        """
+        Obtains a date's statistics, as get_date_stats produces them
+
+        Arguments:
+        day -- date in range
+
+        Returns:
+        dict -- statistic -> [value, value or 'NA']
+        """
+        ids, values = self.stat_values(day)
+        return {
+            name: [str(value) if value != NA else 'NA' for value in row]
+            for name, row in zip(self.texts(ids), values.tolist())
+        }
+
+def signature(ciphers: list[str]) -> dict:
+    """
+    Obtains what a store built for ciphers depends on, a store with any other signature is stale
+
+    Arguments:
+    ciphers -- list of ciphers to be added
+
+    Returns:
+    dict -- version, range, columns and their letter values
+    """
+    columns = cipher_columns(ciphers)
+    return {
+        'version': STORE_VERSION,
+        'start': TABLE_START.isoformat(),
+        'end': TABLE_END.isoformat(),
+        'columns': columns,
+        'letters': [list(CIPHERS[column]) for column in columns],
+        'numbers': 'reduced',
+    }
+
+
+def store_path_for(ciphers: list[str]) -> str:
+    """
+    Obtains the path of the store built with a set of ciphers, so switching between cipher sets
+    doesn't rebuild a single store each time
+
+    Arguments:
+    ciphers -- list of ciphers to be added
+
+    Returns:
+    str -- date_store.bin for NUMS_CIPHERS, see cipher_set_path for other sets
+    """
+    return cipher_set_path(STORE_PATH, ciphers, NUMS_CIPHERS)
+
+
+def build_store(ciphers: list[str] = ['chaldean'], path: str = None) -> None:
+    """
+    Computes every date's inputs from TABLE_START to TABLE_END and writes the store.
+    Stores open on the path must be closed first on Windows, see DateStore.close
+
+    Arguments:
+    ciphers -- list of ciphers to be added
+    path -- path of the store file, defaults to the one for the ciphers
+
+    Returns:
+    None
+    """
+    path = path if path is not None else store_path_for(ciphers)
+    from web import WebScraper
+
+    engine = CipherEngine(ciphers)
+    days = (TABLE_END - TABLE_START).days + 1
+
+    vocabulary = dict()
+    day_phrases = []
+    day_stats = []
+    moon = np.zeros(days, dtype=np.uint8)
+    for offset in range(days):
+        day = TABLE_START + timedelta(days=offset)
+        ws = WebScraper(datetime(day.year, day.month, day.day), backend='local')
+        ws.generate_phrases()
+        day_phrases.append([vocabulary.setdefault(phrase, len(vocabulary)) for phrase in ws.phrases])
+        day_stats.append([(vocabulary.setdefault(name, len(vocabulary)), stat) for name, stat in date_stats(day).items()])
+        moon[offset] = ZODIAC_SIGNS.index(moon_sign(day))
+
+    words = list(vocabulary)
+    encoded = [word.encode() for word in words]
+    text_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    text_offsets[1:] = np.cumsum([len(word) for word in encoded])
+
+    phrase_ids = np.full((days, max(map(len, day_phrases))), NA, dtype=np.int32)
+    for offset, ids in enumerate(day_phrases):
+        phrase_ids[offset, :len(ids)] = ids
+
+    n_stats = max(map(len, day_stats))
+    stat_ids = np.full((days, n_stats), NA, dtype=np.int32)
+    stats = np.full((days, n_stats, 2), NA, dtype=np.int32)
+    for offset, day_stat in enumerate(day_stats):
+        for j, (i, stat) in enumerate(day_stat):
+            stat_ids[offset, j] = i
+            stats[offset, j] = [int(value) if value.isdigit() else NA for value in stat]
+
+    # Values are pure functions of the phrase, so they are stored once per vocabulary entry
+    values = np.full((len(words), len(engine.ciphers)), NA, dtype=np.int32)
+    phrase_rows = sorted({i for ids in day_phrases for i in ids})
+    for i, result in zip(phrase_rows, engine.compute_all([words[i] for i in phrase_rows])):
+        values[i] = [int(value) if value.isdigit() else NA for value in result]
+
+    arrays = {
+        'text': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+        'text_offsets': text_offsets,
+        'phrase_ids': phrase_ids,
+        'stat_ids': stat_ids,
+        'values': values,
+        'stats': stats,
+        'moon': moon,
+    }
+    _write(path, {'signature': signature(ciphers), 'days': days}, arrays)
+
+
+def _write(path: str, header: dict, arrays: dict[str, np.ndarray]) -> None:
+    """
+    Writes the header and arrays, each array aligned to 64 bytes so it can be mapped in place.
+    The file is replaced atomically, elsewhere than on Windows open stores keep reading the old one
+
+    Arguments:
+    path -- path of the store file
+    header -- header fields, 'arrays' is added with each array's offset, dtype and shape
+    arrays -- name -> array
+
+    Returns:
+    None
+    """
+    def align(offset: int) -> int:
+        return (offset + 63) // 64 * 64
+
+    # The header holds the offsets, so its size is fixed by laying out once with placeholder offsets
+    layout = {name: [0, array.dtype.str, list(array.shape)] for name, array in arrays.items()}
+    header = dict(header, arrays=layout)
+    reserved = align(len(MAGIC) + 8 + len(json.dumps(header)) + 32 * len(arrays))
+    offset = reserved
+    for name, array in arrays.items():
+        layout[name][0] = offset
+        offset = align(offset + array.nbytes)
+    encoded = json.dumps(header).encode()
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(MAGIC + len(encoded).to_bytes(8, 'little') + encoded)
+        for name, array in arrays.items():
+            f.seek(layout[name][0])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(offset)
+    os.replace(temp_path, path)
+
+
+_default_stores = dict()
+_default_lock = threading.Lock()
+
+
+def default_date_store(ciphers: list[str] = ['chaldean'], path: str = None, build: bool = False) -> DateStore:
+    """
+    Obtains the process-wide store of a cipher set, opened on first use
+
+    Arguments:
+    ciphers -- list of ciphers to be added
+    path -- path of the store file, defaults to the one for the ciphers
+    build -- rebuild a missing or stale store instead of returning None
+
+    Returns:
+    DateStore -- the shared store, None if it is missing or stale and build is False
+    """
+    path = path if path is not None else store_path_for(ciphers)
+    key = (path, tuple(cipher_columns(ciphers)))
+    with _default_lock:
+        if _default_stores.get(key) is None:
+            _default_stores[key] = DateStore.load(ciphers, path, build)
+        return _default_stores[key]
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=f'Precomputes every date from {TABLE_START} to {TABLE_END}')
+    parser.add_argument('--cipher', action='append', dest='ciphers', help='cipher to add (repeatable), defaults to the active ciphers in ciphers.json')
+    parser.add_argument('--path', help='path of the store file, defaults to the one for the ciphers')
+    args = parser.parse_args(argv)
+
+    ciphers = args.ciphers or active_ciphers()
+    path = args.path or store_path_for(ciphers)
+    build_store(ciphers, path)
+    print(f'Wrote {path} ({os.path.getsize(path)} bytes)')
+
+
+if __name__=="__main__":
+    main()
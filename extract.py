@@ -0,0 +1,252 @@
+from html.parser import HTMLParser
+
+# Returns the outer HTML of an element by id, or the whole page if it does not exist
+OUTER_HTML_SCRIPT = (
+    "var element = document.getElementById(arguments[0]);"
+    "return element ? element.outerHTML : document.documentElement.outerHTML;"
+)
+
+# Ticks every cipher in gematrinator's cipher box listed in the first argument and unticks those listed
+# in the second, only clicking boxes in the other state (a reused session keeps its earlier choice), then saves.
+# Returns the names ticked once saved, so ciphers the site doesn't have can be detected
+SELECT_CIPHERS_SCRIPT = (
+    "var wanted = arguments[0], unwanted = arguments[1], boxes = [];"
+    "document.querySelectorAll('#cipherBox li').forEach(function (li) {"
+    "  var font = li.querySelector('font'), input = li.querySelector('input');"
+    "  if (font && input) {"
+    "    boxes.push([font.textContent.trim().toLowerCase(), input]);"
+    "  }"
+    "});"
+    "boxes.forEach(function (box) {"
+    "  if ((wanted.indexOf(box[0]) !== -1 && !box[1].checked) || (unwanted.indexOf(box[0]) !== -1 && box[1].checked)) {"
+    "    box[1].click();"
+    "  }"
+    "});"
+    "document.getElementById('SaveCiphers').click();"
+    "return boxes.filter(function (box) { return box[1].checked; }).map(function (box) { return box[0]; });"
+)
+
+# Elements which never have a closing tag
+_VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+
+class Node():
+
+    __slots__ = ('tag', 'attrs', 'children', 'parent', 'text_parts')
+
+    def __init__(self, tag: str, attrs: dict, parent: 'Node' = None) -> None:
+        """
+        Node class, a single element of a parsed page
+
+        Arguments:
+        tag -- tag name
+        attrs -- attributes of the element
+        parent -- enclosing element
+
+        Returns:
+        None
+        """
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+        self.parent = parent
+        self.text_parts = []
+
+    @property
+    def classes(self) -> list[str]:
+        return (self.attrs.get('class') or '').split()
+
+    @property
+    def text(self) -> str:
+        """
+        Text of the element and its descendants, whitespace collapsed as a browser would show it
+        """
+        parts = []
+        self._collect_text(parts)
+        return ' '.join(''.join(parts).split())
+
+    def _collect_text(self, parts: list[str]) -> None:
+        # Text and children are interleaved in document order
+        for part in self.text_parts:
+            if isinstance(part, Node):
+                part._collect_text(parts)
+            else:
+                parts.append(part)
+
+    def iter(self):
+        """
+        Iterates over the element's descendants in document order
+        """
+        for child in self.children:
+            yield child
+            yield from child.iter()
+
+    def find_all(self, tag: str = None, id: str = None, class_name: str = None) -> list['Node']:
+        """
+        Finds all descendants matching every given criteria
+
+        Arguments:
+        tag -- tag name
+        id -- id attribute
+        class_name -- one of the element's classes
+
+        Returns:
+        list[Node] -- matching elements in document order
+        """
+        return [
+            node for node in self.iter()
+            if (tag is None or node.tag == tag)
+            and (id is None or node.attrs.get('id') == id)
+            and (class_name is None or class_name in node.classes)
+        ]
+
+    def find(self, tag: str = None, id: str = None, class_name: str = None) -> 'Node':
+        """
+        Finds the first descendant matching every given criteria
+
+        Arguments:
+        tag -- tag name
+        id -- id attribute
+        class_name -- one of the element's classes
+
+        Returns:
+        Node -- the matching element, None if there is none
+        """
+        for node in self.iter():
+            if ((tag is None or node.tag == tag)
+                    and (id is None or node.attrs.get('id') == id)
+                    and (class_name is None or class_name in node.classes)):
+                return node
+        return None
+
+
+class _TreeBuilder(HTMLParser):
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.root = Node('document', {})
+        self.current = self.root
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        node = Node(tag, dict(attrs), self.current)
+        self.current.children.append(node)
+        self.current.text_parts.append(node)
+        if tag not in _VOID_TAGS:
+            self.current = node
+
+    def handle_startendtag(self, tag: str, attrs: list) -> None:
+        node = Node(tag, dict(attrs), self.current)
+        self.current.children.append(node)
+        self.current.text_parts.append(node)
+
+    def handle_endtag(self, tag: str) -> None:
+        # Closing the nearest open element with this tag, tolerating unclosed children
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self.current = node.parent
+
+    def handle_data(self, data: str) -> None:
+        self.current.text_parts.append(data)
+
+
+def parse(html: str) -> Node:
+    """
+    Parses a page into a tree of nodes
+
+    Arguments:
+    html -- page source
+
+    Returns:
+    Node -- document root
+    """
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def element_html(driver, element_id: str) -> str:
+    """
+    Obtains the HTML of one element with a single driver round-trip
+
+    Arguments:
+    driver -- browser session
+    element_id -- id of the element
+
+    Returns:
+    str -- outer HTML of the element, or of the whole page if it does not exist
+    """
+    return driver.execute_script(OUTER_HTML_SCRIPT, element_id)
+
+
+def parse_history_table(html: str, expected: int = None) -> list[list[str]]:
+    """
+    Parses gematrinator's phrase history table.
+    Raises a ValueError if the table or a value is missing, as find_element would
+
+    Arguments:
+    html -- HTML containing the printHistoryTable element
+    expected -- number of phrases just entered, only the newest rows are kept if given.
+                A reused session still lists the phrases entered for earlier reports below them
+
+    Returns:
+    list[list[str]] -- cipher values of each row, newest phrase first as on the page
+    """
+    table = parse(html).find(id='printHistoryTable')
+    if table is None:
+        raise ValueError('No printHistoryTable on the page')
+
+    results = []
+    for tr in table.find_all('tr')[1:]:
+        cipher_results = []
+        for td in tr.find_all('td'):
+            if td.attrs.get('class') == 'HistorySum':
+                number = td.find(id='finalBreakNum')
+                if number is None:
+                    raise ValueError(f'No finalBreakNum in history row {len(results) + 1}')
+                cipher_results.append(number.text)
+        results.append(cipher_results)
+
+    if expected is not None:
+        if len(results) < expected:
+            raise ValueError(f'Expected {expected} history rows, read {len(results)}')
+        results = results[:expected]
+    return results
+
+
+def parse_date_stats(html: str) -> dict:
+    """
+    Parses gematrinator's date calculator results.
+    Raises a ValueError if the sums table or a duration is missing, as find_element would
+
+    Arguments:
+    html -- page source of the date calculator
+
+    Returns:
+    dict -- statistic -> [value, value or 'NA'], same as WebScraper.date_stats
+    """
+    root = parse(html)
+    stats = dict()
+
+    tables = root.find_all(class_name='ClassicDateTable')
+    if len(tables) < 2:
+        raise ValueError(f'Expected 2 ClassicDateTable tables, found {len(tables)}')
+    tbody = tables[1].find('tbody') or tables[1]
+    for tr in tbody.find_all('tr'):
+        key = tr.find(class_name='NumString')
+        value = tr.find(class_name='SumString')
+        if key is None or value is None:
+            raise ValueError(f'No NumString or SumString in date sums row {len(stats) + 1}')
+        stats[key.text] = [value.text, 'NA']
+    if not stats:
+        raise ValueError('No date sums in the ClassicDateTable table')
+
+    durations = [node.text for node in root.find_all(class_name='DurNum')]
+    if len(durations) < 13:
+        raise ValueError(f'Expected 13 DurNum durations, found {len(durations)}')
+    stats['Months Days'] = [durations[8], durations[9]]
+    stats['Weeks Days'] = [durations[10], durations[11]]
+    stats['Days'] = [durations[12], 'NA']
+    return stats
@@ -0,0 +1,239 @@
+from datetime import date
+from html import escape
+from cipher import CIPHERS, CipherEngine
+from extract import OUTER_HTML_SCRIPT, SELECT_CIPHERS_SCRIPT
+from moon import moon_sign
+from numerology import date_stats
+import re
+
+ENTER = '\ue007' # selenium's Keys.ENTER
+
+MONTHS = ['january', 'february', 'march', 'april', 'may', 'june', 'july',
+          'august', 'september', 'october', 'november', 'december']
+
+
+class FakeElement():
+
+    def __init__(self, driver: 'FakeDriver', locator: str, text: str = '', attrs: dict = None) -> None:
+        """
+        FakeElement class, an element of a FakeDriver page
+
+        Arguments:
+        driver -- session the element belongs to
+        locator -- id, class or tag the element was found by
+        text -- visible text
+        attrs -- attributes returned by get_attribute
+
+        Returns:
+        None
+        """
+        self.driver = driver
+        self.locator = locator
+        self.text = text
+        self.attrs = attrs or dict()
+
+    def clear(self) -> None:
+        self.driver.fields[self.locator] = ''
+
+    def send_keys(self, keys: str) -> None:
+        value = self.driver.fields.get(self.locator, '') + keys
+        if self.locator == 'EntryField' and value.endswith(ENTER):
+            self.driver.history.insert(0, value[:-1])
+            value = ''
+        self.driver.fields[self.locator] = value
+
+    def click(self) -> None:
+        self.driver.commands += 1
+
+    def is_displayed(self) -> bool:
+        return True
+
+    def is_enabled(self) -> bool:
+        return True
+
+    def get_attribute(self, name: str) -> str:
+        return self.attrs.get(name)
+
+    def find_element(self, by: str, value: str) -> 'FakeElement':
+        return self.driver.find_element(by, value)
+
+    def find_elements(self, by: str, value: str) -> list['FakeElement']:
+        return self.driver.find_elements(by, value)
+
+
+class FakeDriver():
+
+    def __init__(self) -> None:
+        """
+        FakeDriver class, stands in for a browser session without Chrome or network access.
+        Simulates the gematrinator calculator, date calculator and astro-seek pages using the local engines
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        self.url = 'about:blank'
+        self.visited = []
+        self.closed = False
+        self.commands = 0
+
+        self.fields = dict()
+        self.history = [] # newest phrase first, as gematrinator lists them. Kept across pages like the site's
+        self.added_ciphers = []
+
+    @property
+    def current_url(self) -> str:
+        self._command()
+        return self.url
+
+    @property
+    def title(self) -> str:
+        self._command()
+        return self.url
+
+    @property
+    def page_source(self) -> str:
+        self._command()
+        if 'date-calculator' in self.url:
+            return self._date_calculator_html()
+        if 'gematrinator.com/calculator' in self.url:
+            return f'<html><body>{self._history_html()}</body></html>'
+        if 'astro-seek' in self.url:
+            return self._moon_html()
+        return '<html><body></body></html>'
+
+    def get(self, url: str) -> None:
+        self._command()
+        self.url = url
+        self.visited.append(url)
+        self.fields = dict()
+
+    def find_element(self, by: str, value: str) -> FakeElement:
+        self._command()
+        if value == 'calcMenuItem':
+            return FakeElement(self, value, 'Ciphers ')
+        if value == 'astro_symbol':
+            return FakeElement(self, value, attrs={'alt': self._moon_sign().capitalize()})
+        return FakeElement(self, value, self.fields.get(value, ''))
+
+    def find_elements(self, by: str, value: str) -> list[FakeElement]:
+        return [self.find_element(by, value)]
+
+    def execute_script(self, script: str, *args):
+        self._command()
+        if script == SELECT_CIPHERS_SCRIPT:
+            # Every registered cipher is on the simulated site, ticked ones stay ticked across pages
+            wanted, unwanted = args
+            kept = [cipher for cipher in self.added_ciphers if cipher not in wanted and cipher not in unwanted]
+            self.added_ciphers = [cipher for cipher in wanted if cipher in CIPHERS] + kept
+            return list(self.added_ciphers)
+        if script == OUTER_HTML_SCRIPT:
+            if args[0] == 'printHistoryTable':
+                return self._history_html()
+            return self.page_source
+        raise NotImplementedError('FakeDriver only runs the scripts in extract.py')
+
+    def quit(self) -> None:
+        self.closed = True
+
+    def _command(self) -> None:
+        """
+        Counts a round-trip, failing like a dead session once quit
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        if self.closed:
+            raise RuntimeError('Session has been quit')
+        self.commands += 1
+
+    def _history_html(self) -> str:
+        """
+        Renders the phrase history table
+
+        Arguments:
+        None
+
+        Returns:
+        str -- HTML of printHistoryTable
+        """
+        engine = CipherEngine([cipher for cipher in self.added_ciphers if cipher in CIPHERS])
+        rows = ['<tr><th>Phrase</th></tr>']
+        for phrase in self.history:
+            cells = ''.join(
+                f'<td class="HistorySum"><span id="finalBreakNum">{value}</span></td>'
+                for value in engine.compute(phrase)
+            )
+            rows.append(f'<tr><td class="HistoryPhrase">{escape(phrase)}</td>{cells}</tr>')
+        return f'<table id="printHistoryTable">{"".join(rows)}</table>'
+
+    def _date_calculator_html(self) -> str:
+        """
+        Renders the date calculator results for the entered dates
+
+        Arguments:
+        None
+
+        Returns:
+        str -- page source
+        """
+        day = date(int(self.fields.get('Year2', 2000)), int(self.fields.get('Month2', 1)), int(self.fields.get('Day2', 1)))
+        stats = date_stats(day)
+        rows = ''.join(
+            f'<tr><td class="NumString">{escape(key)}</td><td class="SumString">{values[0]}</td></tr>'
+            for key, values in stats.items() if values[1] == 'NA' and key != 'Days'
+        )
+        durations = ['0'] * 8 + stats['Months Days'] + stats['Weeks Days'] + [stats['Days'][0]]
+        duration_html = ''.join(f'<span class="DurNum">{value}</span>' for value in durations)
+        return (
+            '<html><body>'
+            '<table class="ClassicDateTable"><tbody></tbody></table>'
+            f'<table class="ClassicDateTable"><tbody>{rows}</tbody></table>'
+            f'{duration_html}</body></html>'
+        )
+
+    def _moon_html(self) -> str:
+        """
+        Renders the astro-seek moon phase page
+
+        Arguments:
+        None
+
+        Returns:
+        str -- page source
+        """
+        return f'<html><body><img class="astro_symbol" alt="{self._moon_sign().capitalize()}"></body></html>'
+
+    def _moon_sign(self) -> str:
+        """
+        Obtains the moon sign for the astro-seek url currently loaded
+
+        Arguments:
+        None
+
+        Returns:
+        str -- lowercase zodiac sign, empty if the url has no date
+        """
+        match = re.search(r'moon-phase-day-(\d+)-([a-z]+)-(\d+)', self.url)
+        if match is None:
+            return ''
+        day = date(int(match.group(3)), MONTHS.index(match.group(2)) + 1, int(match.group(1)))
+        return moon_sign(day)
+
+
+def fake_factory() -> FakeDriver:
+    """
+    Factory for DriverPool returning fake sessions
+
+    Arguments:
+    None
+
+    Returns:
+    FakeDriver -- a new fake session
+    """
+    return FakeDriver()
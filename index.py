@@ -0,0 +1,173 @@
+from cipher import cipher_columns
+from datestore import DateStore
+from teams import NA, TeamStore, default_store
+
+# Sources of indexed phrases
+TEAM = 'team'
+DATE = 'date'
+
+
+class NumberIndex():
+
+    def __init__(self, columns: list[str]) -> None:
+        """
+        NumberIndex class, an inverted index from cipher value to the phrases producing it.
+        Values are also indexed zero-stripped, as assign_colour and add_additional_numbers match them,
+        so looking up 12 finds phrases worth 102 or 120 too
+
+        Arguments:
+        columns -- cipher columns of the indexed values
+
+        Returns:
+        None
+        """
+        self.columns = list(columns)
+        self.postings = {TEAM: dict(), DATE: dict()} # source -> number -> [(phrase, cipher, stripped)]
+        self.values = dict() # phrase -> values in string format, to remove or update a phrase
+        self.sources = dict() # phrase -> (source, team names)
+
+    @classmethod
+    def build(cls, ciphers: list[str] = ['chaldean'], teams: TeamStore = None, store: DateStore = None) -> 'NumberIndex':
+        """
+        Builds the index from the team aliases in team_nums.csv and the date phrase vocabulary
+
+        Arguments:
+        ciphers -- list of ciphers to be added
+        teams -- team aliases and their cipher values, defaults to the shared store of the ciphers
+        store -- precomputed date inputs whose phrases are indexed, None for team aliases only
+
+        Returns:
+        NumberIndex -- the built index
+        """
+        index = cls(cipher_columns(ciphers))
+        teams = teams if teams is not None else default_store(ciphers)
+        for i, team_aliases in enumerate(teams.aliases):
+            rows = teams.values[teams.offsets[i]:teams.offsets[i + 1]]
+            for alias, row in zip(team_aliases, rows.tolist()):
+                index.add_phrase(alias, _strings(row), TEAM, [teams.teams[i]])
+
+        if store is not None and store.columns == index.columns:
+            phrases, values = store.vocabulary()
+            for phrase, row in zip(phrases, values.tolist()):
+                index.add_phrase(phrase, _strings(row), DATE)
+        return index
+
+    def add_phrase(self, phrase: str, result: list[str], source: str = DATE, teams: list[str] = []) -> None:
+        """
+        Indexes a phrase, replacing its previous values if it is already indexed.
+        An alias shared by several teams is indexed once and attributed to all of them
+
+        Arguments:
+        phrase -- phrase to be indexed
+        result -- cipher values in string format, one per column
+        source -- TEAM or DATE
+        teams -- teams the phrase is an alias of
+
+        Returns:
+        None
+        """
+        if phrase in self.values:
+            if self.values[phrase] == list(result):
+                old_source, old_teams = self.sources[phrase]
+                self.sources[phrase] = (old_source, old_teams + [team for team in teams if team not in old_teams])
+                return
+            self.remove_phrase(phrase)
+
+        self.values[phrase] = list(result)
+        self.sources[phrase] = (source, list(teams))
+        postings = self.postings[source]
+        for cipher, num in zip(self.columns, result):
+            if num == 'NA':
+                continue
+            postings.setdefault(num, []).append((phrase, cipher, False))
+            stripped = num.replace('0', '')
+            if stripped and stripped != num:
+                postings.setdefault(stripped, []).append((phrase, cipher, True))
+
+    def add_phrases(self, phrases: list[str], results: list[list[str]], source: str = DATE) -> None:
+        """
+        Indexes many phrases, e.g. a scraper's phrases and phrase_results
+
+        Arguments:
+        phrases -- phrases to be indexed
+        results -- a 2d array of numbers in string format
+        source -- TEAM or DATE
+
+        Returns:
+        None
+        """
+        for phrase, result in zip(phrases, results):
+            self.add_phrase(phrase, result, source)
+
+    def remove_phrase(self, phrase: str) -> None:
+        """
+        Removes a phrase from the index, does nothing if it isn't indexed
+
+        Arguments:
+        phrase -- phrase to be removed
+
+        Returns:
+        None
+        """
+        result = self.values.pop(phrase, None)
+        if result is None:
+            return
+        source, _ = self.sources.pop(phrase)
+        source_postings = self.postings[source]
+        for num in set(result + [num.replace('0', '') for num in result]):
+            postings = source_postings.get(num)
+            if postings is None:
+                continue
+            postings[:] = [posting for posting in postings if posting[0] != phrase]
+            if not postings:
+                del source_postings[num]
+
+    def lookup(self, number, source: str = None) -> list[tuple]:
+        """
+        Obtains the phrases producing a number
+
+        Arguments:
+        number -- number as an int or in string format
+        source -- TEAM or DATE to only return phrases from there, None for all
+
+        Returns:
+        list[tuple] -- (phrase, cipher, stripped) postings, stripped if the value only matches without its zeros.
+                       Lists for a single source are the index's own, don't modify them
+        """
+        number = str(number)
+        if source is not None:
+            return self.postings[source].get(number, [])
+        return self.postings[TEAM].get(number, []) + self.postings[DATE].get(number, [])
+
+    def teams(self, number) -> dict[str, list[tuple]]:
+        """
+        Obtains the teams whose aliases produce a number
+
+        Arguments:
+        number -- number as an int or in string format
+
+        Returns:
+        dict -- team -> (alias, cipher, stripped) postings, in teams.csv order
+        """
+        matches = dict()
+        for posting in self.lookup(number, TEAM):
+            for team in self.sources[posting[0]][1]:
+                matches.setdefault(team, []).append(posting)
+        return matches
+
+    def matches(self, numbers: list[str], source: str = None) -> dict[str, list[tuple]]:
+        """
+        Obtains the phrases producing each of many numbers, e.g. a report's significant numbers
+
+        Arguments:
+        numbers -- numbers as ints or in string format
+        source -- TEAM or DATE to only return phrases from there, None for all
+
+        Returns:
+        dict -- number -> postings, see lookup
+        """
+        return {str(number): self.lookup(number, source) for number in numbers}
+
+
+def _strings(row: list[int]) -> list[str]:
+    return [str(value) if value != NA else 'NA' for value in row]
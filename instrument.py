@@ -0,0 +1,450 @@
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+import contextvars
+import json
+import threading
+import time
+
+# Driver methods and properties counted as commands, each is a round-trip to the browser
+DRIVER_COMMANDS = ('get', 'find_element', 'find_elements', 'execute_script', 'quit')
+DRIVER_PROPERTIES = ('page_source', 'current_url', 'title')
+ELEMENT_COMMANDS = ('click', 'clear', 'send_keys', 'get_attribute', 'is_displayed', 'is_enabled', 'find_element', 'find_elements')
+ELEMENT_PROPERTIES = ('text',)
+
+# Prefix of the Prometheus metric names
+METRIC_PREFIX = 'baseball'
+
+# Environment variable naming the trace file of a UI session, instrumentation is enabled while it is set
+TRACE_ENV = 'BASEBALL_TRACE'
+
+# Innermost open span of the current thread or task
+_current = contextvars.ContextVar('span', default=None)
+
+# Returned by span() while instrumentation is disabled, entering it does nothing
+_DISABLED = nullcontext()
+
+_tracer = None
+
+
+class Span():
+
+    __slots__ = ('name', 'attrs', 'start', 'duration', 'children', 'commands', 'waits')
+
+    def __init__(self, name: str, attrs: dict) -> None:
+        """
+        Span class, a timed stage with the driver commands and waits made directly within it
+
+        Arguments:
+        name -- name of the stage
+        attrs -- extra fields recorded with the span
+
+        Returns:
+        None
+        """
+        self.name = name
+        self.attrs = attrs
+        self.start = time.time()
+        self.duration = None
+        self.children = []
+        self.commands = defaultdict(int)
+        self.waits = []
+
+    def to_dict(self) -> dict:
+        """
+        Converts the span and its children for the JSON trace
+
+        Arguments:
+        None
+
+        Returns:
+        dict -- name, attrs, start, duration, commands, waits and children
+        """
+        return {
+            'name': self.name,
+            'attrs': self.attrs,
+            'start': self.start,
+            'duration': self.duration,
+            'commands': dict(self.commands),
+            'waits': self.waits,
+            'children': [child.to_dict() for child in self.children],
+        }
+
+
+class Tracer():
+
+    def __init__(self, max_traces: int = 1000, sink=None) -> None:
+        """
+        Tracer class, records stage spans, driver commands and waits.
+        Spans opened outside any other span are kept as traces, e.g. one per WebScraper.run
+
+        Arguments:
+        max_traces -- number of finished traces kept, the oldest are dropped first, None to keep all
+        sink -- called with the dict of each finished trace, e.g. a TraceWriter
+
+        Returns:
+        None
+        """
+        self.traces = deque(maxlen=max_traces)
+        self.sink = sink
+        self.lock = threading.Lock()
+
+        self.stage_seconds = defaultdict(float)
+        self.stage_calls = defaultdict(int)
+        self.commands = defaultdict(int)
+        self.wait_seconds = 0.0
+        self.waits = 0
+        self.wait_timeouts = 0
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """
+        Times a with block as a stage, nested within the span open around it
+
+        Arguments:
+        name -- name of the stage
+        attrs -- extra fields recorded with the span
+
+        Returns:
+        Span -- the open span
+        """
+        span = Span(name, attrs)
+        parent = _current.get()
+        token = _current.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter() - start
+            _current.reset(token)
+            with self.lock:
+                self.stage_seconds[name] += span.duration
+                self.stage_calls[name] += 1
+                if parent is not None:
+                    parent.children.append(span)
+                else:
+                    self.traces.append(span)
+                    if self.sink is not None:
+                        self.sink(span.to_dict())
+
+    def command(self, name: str) -> None:
+        """
+        Counts a driver command
+
+        Arguments:
+        name -- command, e.g. find_element or element.click
+
+        Returns:
+        None
+        """
+        with self.lock:
+            self.commands[name] += 1
+            span = _current.get()
+            if span is not None:
+                span.commands[name] += 1
+
+    def wait(self, seconds: float, timed_out: bool) -> None:
+        """
+        Records a WebDriverWait
+
+        Arguments:
+        seconds -- time waited
+        timed_out -- whether the condition was never met
+
+        Returns:
+        None
+        """
+        with self.lock:
+            self.wait_seconds += seconds
+            self.waits += 1
+            self.wait_timeouts += timed_out
+            span = _current.get()
+            if span is not None:
+                span.waits.append(seconds)
+
+    def trace(self) -> list[dict]:
+        """
+        Obtains the finished traces
+
+        Arguments:
+        None
+
+        Returns:
+        list[dict] -- one nested span dict per trace, oldest first
+        """
+        with self.lock:
+            return [span.to_dict() for span in self.traces]
+
+    def write_trace(self, path: str) -> None:
+        """
+        Writes the finished traces as JSON
+
+        Arguments:
+        path -- path of the trace file
+
+        Returns:
+        None
+        """
+        with open(path, 'w') as f:
+            json.dump(self.trace(), f, indent=2)
+
+    def prometheus(self) -> str:
+        """
+        Renders the counters in the Prometheus text format
+
+        Arguments:
+        None
+
+        Returns:
+        str -- exposition text
+        """
+        with self.lock:
+            lines = [
+                f'# HELP {METRIC_PREFIX}_stage_seconds_total Time spent in each stage',
+                f'# TYPE {METRIC_PREFIX}_stage_seconds_total counter',
+            ]
+            lines += [f'{METRIC_PREFIX}_stage_seconds_total{{stage="{name}"}} {seconds:.6f}'
+                      for name, seconds in sorted(self.stage_seconds.items())]
+            lines += [
+                f'# HELP {METRIC_PREFIX}_stage_calls_total Times each stage ran',
+                f'# TYPE {METRIC_PREFIX}_stage_calls_total counter',
+            ]
+            lines += [f'{METRIC_PREFIX}_stage_calls_total{{stage="{name}"}} {calls}'
+                      for name, calls in sorted(self.stage_calls.items())]
+            lines += [
+                f'# HELP {METRIC_PREFIX}_driver_commands_total Browser round-trips by command',
+                f'# TYPE {METRIC_PREFIX}_driver_commands_total counter',
+            ]
+            lines += [f'{METRIC_PREFIX}_driver_commands_total{{command="{name}"}} {count}'
+                      for name, count in sorted(self.commands.items())]
+            lines += [
+                f'# HELP {METRIC_PREFIX}_wait_seconds_total Time spent in WebDriverWait',
+                f'# TYPE {METRIC_PREFIX}_wait_seconds_total counter',
+                f'{METRIC_PREFIX}_wait_seconds_total {self.wait_seconds:.6f}',
+                f'# HELP {METRIC_PREFIX}_waits_total WebDriverWait calls',
+                f'# TYPE {METRIC_PREFIX}_waits_total counter',
+                f'{METRIC_PREFIX}_waits_total {self.waits}',
+                f'# HELP {METRIC_PREFIX}_wait_timeouts_total WebDriverWait calls that timed out',
+                f'# TYPE {METRIC_PREFIX}_wait_timeouts_total counter',
+                f'{METRIC_PREFIX}_wait_timeouts_total {self.wait_timeouts}',
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+class TraceWriter():
+
+    def __init__(self, path: str) -> None:
+        """
+        TraceWriter class, streams finished traces into a JSON file as they end,
+        so a long run's traces need not be kept in memory
+
+        Arguments:
+        path -- path of the trace file, written in the same format as Tracer.write_trace
+
+        Returns:
+        None
+        """
+        self.file = open(path, 'w')
+        self.file.write('[')
+        self.count = 0
+
+    def __call__(self, trace: dict) -> None:
+        """
+        Appends a finished trace to the file
+
+        Arguments:
+        trace -- dict of the trace's root span
+
+        Returns:
+        None
+        """
+        self.file.write((',\n' if self.count else '\n') + json.dumps(trace, indent=2))
+        self.file.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        """
+        Ends the JSON array and closes the file
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        self.file.write('\n]\n' if self.count else ']\n')
+        self.file.close()
+
+
+class InstrumentedElement():
+
+    def __init__(self, element, tracer: Tracer) -> None:
+        """
+        InstrumentedElement class, counts the commands sent to a web element
+
+        Arguments:
+        element -- wrapped element
+        tracer -- tracer the commands are counted by
+
+        Returns:
+        None
+        """
+        self._element = element
+        self._tracer = tracer
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._element, name)
+        if name in ELEMENT_PROPERTIES:
+            self._tracer.command(f'element.{name}')
+        elif name in ELEMENT_COMMANDS:
+            return _counted(attr, f'element.{name}', self._tracer)
+        return attr
+
+
+class InstrumentedDriver():
+
+    def __init__(self, driver, tracer: Tracer) -> None:
+        """
+        InstrumentedDriver class, counts the commands sent to a browser session by type.
+        Elements it finds are wrapped too, so their clicks and reads are counted
+
+        Arguments:
+        driver -- wrapped driver
+        tracer -- tracer the commands are counted by
+
+        Returns:
+        None
+        """
+        self._driver = driver
+        self._tracer = tracer
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._driver, name)
+        if name in DRIVER_PROPERTIES:
+            self._tracer.command(name)
+        elif name in DRIVER_COMMANDS:
+            return _counted(attr, name, self._tracer)
+        return attr
+
+
+def _counted(method, name: str, tracer: Tracer):
+    """
+    Wraps a driver or element method so each call is counted and found elements are wrapped
+
+    Arguments:
+    method -- bound method
+    name -- command name counted
+    tracer -- tracer the command is counted by
+
+    Returns:
+    the wrapped method
+    """
+    def call(*args, **kwargs):
+        tracer.command(name)
+        result = method(*args, **kwargs)
+        if name.endswith('find_elements'):
+            return [InstrumentedElement(element, tracer) for element in result]
+        if name.endswith('find_element'):
+            return InstrumentedElement(result, tracer)
+        return result
+
+    return call
+
+
+class TimedWait():
+
+    def __init__(self, driver, timeout: float, **kwargs) -> None:
+        """
+        TimedWait class, a WebDriverWait whose waits are recorded while instrumentation is enabled
+
+        Arguments:
+        driver -- driver waited on
+        timeout -- seconds before giving up
+        kwargs -- passed on to WebDriverWait
+
+        Returns:
+        None
+        """
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        self.wait = WebDriverWait(driver, timeout, **kwargs)
+
+    def until(self, condition, message: str = ''):
+        tracer = _tracer
+        if tracer is None:
+            return self.wait.until(condition, message)
+
+        start = time.perf_counter()
+        timed_out = True
+        try:
+            result = self.wait.until(condition, message)
+            timed_out = False
+            return result
+        finally:
+            tracer.wait(time.perf_counter() - start, timed_out)
+
+
+def enable(max_traces: int = 1000, sink=None) -> Tracer:
+    """
+    Turns instrumentation on, replacing any earlier tracer
+
+    Arguments:
+    max_traces -- number of finished traces kept, None to keep all
+    sink -- called with the dict of each finished trace
+
+    Returns:
+    Tracer -- the new tracer
+    """
+    global _tracer
+    _tracer = Tracer(max_traces, sink)
+    return _tracer
+
+
+def disable() -> None:
+    global _tracer
+    _tracer = None
+
+
+def tracer() -> Tracer:
+    """
+    Obtains the current tracer
+
+    Arguments:
+    None
+
+    Returns:
+    Tracer -- the tracer, None while instrumentation is disabled
+    """
+    return _tracer
+
+
+def span(name: str, **attrs):
+    """
+    Times a with block as a stage while instrumentation is enabled, does nothing otherwise
+
+    Arguments:
+    name -- name of the stage
+    attrs -- extra fields recorded with the span
+
+    Returns:
+    context manager
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _DISABLED
+    return tracer.span(name, **attrs)
+
+
+def wrap_driver(driver):
+    """
+    Wraps a driver so its commands are counted while instrumentation is enabled
+
+    Arguments:
+    driver -- driver borrowed from a pool
+
+    Returns:
+    the instrumented driver, or driver itself while instrumentation is disabled
+    """
+    tracer = _tracer
+    if tracer is None or driver is None:
+        return driver
+    return InstrumentedDriver(driver, tracer)
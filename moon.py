@@ -0,0 +1,161 @@
+from datetime import date, datetime, timedelta
+import math
+import os
+
+ZODIAC_SIGNS = (
+    'aries', 'taurus', 'gemini', 'cancer', 'leo', 'virgo',
+    'libra', 'scorpio', 'sagittarius', 'capricorn', 'aquarius', 'pisces'
+)
+
+# Years offered by the ui.py year combobox
+TABLE_START = date(2024, 1, 1)
+TABLE_END = date(2050, 12, 31)
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'moon_signs.bin')
+
+# Hour (UTC) of the day at which the sign is taken
+SIGN_HOUR = 12
+
+# Approximate difference between terrestrial and universal time, in seconds
+DELTA_T = 69.0
+
+# Periodic terms for the moon's longitude (Meeus, Astronomical Algorithms, table 47.A)
+# Multiples of D, M, M', F and the coefficient in millionths of a degree
+_LONGITUDE_TERMS = (
+    (0, 0, 1, 0, 6288774), (2, 0, -1, 0, 1274027), (2, 0, 0, 0, 658314),
+    (0, 0, 2, 0, 213618), (0, 1, 0, 0, -185116), (0, 0, 0, 2, -114332),
+    (2, 0, -2, 0, 58793), (2, -1, -1, 0, 57066), (2, 0, 1, 0, 53322),
+    (2, -1, 0, 0, 45758), (0, 1, -1, 0, -40923), (1, 0, 0, 0, -34720),
+    (0, 1, 1, 0, -30383), (2, 0, 0, -2, 15327), (0, 0, 1, 2, -12528),
+    (0, 0, 1, -2, 10980), (4, 0, -1, 0, 10675), (0, 0, 3, 0, 10034),
+    (4, 0, -2, 0, 8548), (2, 1, -1, 0, -7888), (2, 1, 0, 0, -6766),
+    (1, 0, -1, 0, -5163), (1, 1, 0, 0, 4987), (2, -1, 1, 0, 4036),
+    (2, 0, 2, 0, 3994), (4, 0, 0, 0, 3861), (2, 0, -3, 0, 3665),
+    (0, 1, -2, 0, -2689), (2, 0, -1, 2, -2602), (2, -1, -2, 0, 2390),
+    (1, 0, 1, 0, -2348), (2, -2, 0, 0, 2236), (0, 1, 2, 0, -2120),
+    (0, 2, 0, 0, -2069), (2, -2, -1, 0, 2048), (2, 0, 1, -2, -1773),
+    (2, 0, 0, 2, -1595), (4, -1, -1, 0, 1215), (0, 0, 2, 2, -1110),
+    (3, 0, -1, 0, -892), (2, 1, 1, 0, -810), (4, -1, -2, 0, 759),
+    (0, 2, -1, 0, -713), (2, 2, -1, 0, -700), (2, 1, -2, 0, 691),
+    (2, -1, 0, -2, 596), (4, 0, 1, 0, 549), (0, 0, 4, 0, 537),
+    (4, -1, 0, 0, 520), (1, 0, -2, 0, -487), (2, 1, 0, -2, -399),
+    (0, 0, 2, -2, -381), (1, 1, 1, 0, 351), (3, 0, -2, 0, -340),
+    (4, 0, -3, 0, 330), (2, -1, 2, 0, 327), (0, 2, 1, 0, -323),
+    (1, 1, -1, 0, 299), (2, 0, 3, 0, 294),
+)
+
+
+def moon_longitude(moment: datetime) -> float:
+    """
+    Calculates the apparent geocentric ecliptic longitude of the moon
+
+    Arguments:
+    moment -- naive datetime in UTC
+
+    Returns:
+    float -- longitude in degrees, between 0 and 360
+    """
+    days = (moment - datetime(2000, 1, 1, 12)).total_seconds() + DELTA_T
+    t = days / 86400 / 36525
+
+    mean_longitude = 218.3164477 + 481267.88123421 * t - 0.0015786 * t ** 2 + t ** 3 / 538841 - t ** 4 / 65194000
+    elongation = 297.8501921 + 445267.1114034 * t - 0.0018819 * t ** 2 + t ** 3 / 545868 - t ** 4 / 113065000
+    sun_anomaly = 357.5291092 + 35999.0502909 * t - 0.0001536 * t ** 2 + t ** 3 / 24490000
+    moon_anomaly = 134.9633964 + 477198.8675055 * t + 0.0087414 * t ** 2 + t ** 3 / 69699 - t ** 4 / 14712000
+    latitude_argument = 93.2720950 + 483202.0175233 * t - 0.0036539 * t ** 2 - t ** 3 / 3526000 + t ** 4 / 863310000
+    eccentricity = 1 - 0.002516 * t - 0.0000074 * t ** 2
+
+    d, m, mp, f = (math.radians(angle) for angle in (elongation, sun_anomaly, moon_anomaly, latitude_argument))
+
+    total = 0.0
+    for d_mult, m_mult, mp_mult, f_mult, coefficient in _LONGITUDE_TERMS:
+        term = coefficient * math.sin(d_mult * d + m_mult * m + mp_mult * mp + f_mult * f)
+        total += term * eccentricity ** abs(m_mult)
+
+    # Venus, Jupiter and flattening of the earth
+    a1 = math.radians(119.75 + 131.849 * t)
+    a2 = math.radians(53.09 + 479264.290 * t)
+    total += 3958 * math.sin(a1) + 1962 * math.sin(math.radians(mean_longitude) - f) + 318 * math.sin(a2)
+
+    # Nutation in longitude, arcseconds
+    node = math.radians(125.04452 - 1934.136261 * t)
+    sun_longitude = math.radians(280.4665 + 36000.7698 * t)
+    nutation = (-17.20 * math.sin(node) - 1.32 * math.sin(2 * sun_longitude)
+                - 0.23 * math.sin(2 * math.radians(mean_longitude)) + 0.21 * math.sin(2 * node))
+
+    return (mean_longitude + total / 1000000 + nutation / 3600) % 360
+
+
+def calculate_moon_sign(day: date, hour: int = SIGN_HOUR) -> str:
+    """
+    Calculates the zodiac sign of the moon on a day
+
+    Arguments:
+    day -- day to be calculated
+    hour -- hour (UTC) at which the moon's position is taken
+
+    Returns:
+    str -- lowercase zodiac sign (e.g. gemini)
+    """
+    moment = datetime(day.year, day.month, day.day, hour)
+    return ZODIAC_SIGNS[int(moon_longitude(moment) // 30)]
+
+
+def build_table(path: str = TABLE_PATH) -> None:
+    """
+    Writes the precomputed day -> sign table, one byte (sign index) per day
+
+    Arguments:
+    path -- path of the table file
+
+    Returns:
+    None
+    """
+    days = (TABLE_END - TABLE_START).days + 1
+    signs = bytes(
+        ZODIAC_SIGNS.index(calculate_moon_sign(TABLE_START + timedelta(days=i)))
+        for i in range(days)
+    )
+    with open(path, 'wb') as f:
+        f.write(signs)
+
+
+def _load_table(path: str = TABLE_PATH) -> bytes:
+    """
+    Loads the precomputed table, returns empty bytes if it does not exist
+
+    Arguments:
+    path -- path of the table file
+
+    Returns:
+    bytes -- sign index for each day from TABLE_START
+    """
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return b''
+
+
+_TABLE = _load_table()
+_TABLE_ORDINAL = TABLE_START.toordinal()
+
+
+def moon_sign(day: date) -> str:
+    """
+    Obtains the zodiac sign of the moon on a day.
+    Days covered by the precomputed table are a single lookup, others are calculated
+
+    Arguments:
+    day -- day to be looked up
+
+    Returns:
+    str -- lowercase zodiac sign (e.g. gemini)
+    """
+    offset = day.toordinal() - _TABLE_ORDINAL
+    if 0 <= offset < len(_TABLE):
+        return ZODIAC_SIGNS[_TABLE[offset]]
+    return calculate_moon_sign(day)
+
+
+if __name__ == "__main__":
+    build_table()
@@ -0,0 +1,114 @@
+from datetime import date
+import numpy as np
+
+# Stats computed for every date, in the order they appear in date_stats
+STAT_NAMES = (
+    'full', 'reduced_year', 'single_digits', 'short_year', 'short_single_digits',
+    'months', 'month_days', 'weeks', 'week_days', 'days'
+)
+
+
+def _digits(number: int) -> list[str]:
+    """
+    Splits a number into its digits
+
+    Arguments:
+    number -- a non-negative integer
+
+    Returns:
+    list[str] -- digits in string format
+    """
+    return list(str(number))
+
+
+def date_stats(day: date) -> dict:
+    """
+    Calculates the date statistics gematrinator's date calculator shows,
+    measured from the 1st of January of the same year (including the end date)
+
+    Arguments:
+    day -- date to be calculated
+
+    Returns:
+    dict -- statistic -> [value, value or 'NA'], same as WebScraper.date_stats
+    """
+    month, day_of_month = day.month, day.day
+    century, short_year = divmod(day.year, 100)
+    year_digits = _digits(day.year)
+    short_digits = list(f'{short_year:02d}')
+    single_digits = _digits(month) + _digits(day_of_month)
+
+    stats = dict()
+    stats[f'({month}) + ({day_of_month}) + ({century}) + ({short_year:02d})'] = \
+        [str(month + day_of_month + century + short_year), 'NA']
+    stats[f'({month}) + ({day_of_month}) + ' + ' + '.join(year_digits)] = \
+        [str(month + day_of_month + sum(map(int, year_digits))), 'NA']
+    stats[' + '.join(single_digits + year_digits)] = \
+        [str(sum(map(int, single_digits + year_digits))), 'NA']
+    stats[f'({month}) + ({day_of_month}) + ({short_year:02d})'] = \
+        [str(month + day_of_month + short_year), 'NA']
+    stats[' + '.join(single_digits + short_digits)] = \
+        [str(sum(map(int, single_digits + short_digits))), 'NA']
+
+    day_of_year = day.timetuple().tm_yday
+    stats['Months Days'] = [str(month - 1), str(day_of_month)]
+    stats['Weeks Days'] = [str(day_of_year // 7), str(day_of_year % 7)]
+    stats['Days'] = [str(day_of_year), 'NA']
+    return stats
+
+
+def date_stats_range(start: date, end: date) -> dict[str, np.ndarray]:
+    """
+    Calculates the date statistics for every date from start to end (inclusive) in one pass
+
+    Arguments:
+    start -- first date of the range
+    end -- last date of the range
+
+    Returns:
+    dict[str, np.ndarray] -- 'dates' and every name in STAT_NAMES -> array with one entry per date
+    """
+    dates = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+    years = dates.astype('datetime64[Y]')
+    months = dates.astype('datetime64[M]')
+
+    year = years.astype(np.int64) + 1970
+    month = (months - years).astype(np.int64) + 1
+    day_of_month = (dates - months).astype(np.int64) + 1
+    day_of_year = (dates - years).astype(np.int64) + 1
+
+    century, short_year = np.divmod(year, 100)
+    year_digit_sum = _digit_sum(year)
+    single_digit_sum = _digit_sum(month) + _digit_sum(day_of_month)
+
+    return {
+        'dates': dates,
+        'full': month + day_of_month + century + short_year,
+        'reduced_year': month + day_of_month + year_digit_sum,
+        'single_digits': single_digit_sum + year_digit_sum,
+        'short_year': month + day_of_month + short_year,
+        'short_single_digits': single_digit_sum + _digit_sum(short_year),
+        'months': month - 1,
+        'month_days': day_of_month,
+        'weeks': day_of_year // 7,
+        'week_days': day_of_year % 7,
+        'days': day_of_year,
+    }
+
+
+def _digit_sum(numbers: np.ndarray) -> np.ndarray:
+    """
+    Sums the digits of every number in an array
+
+    Arguments:
+    numbers -- array of non-negative integers
+
+    Returns:
+    np.ndarray -- digit sum of each number
+    """
+    numbers = numbers.copy()
+    total = np.zeros_like(numbers)
+    while numbers.any():
+        numbers, digit = np.divmod(numbers, 10)
+        total += digit
+    return total
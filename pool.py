@@ -0,0 +1,303 @@
+from contextlib import contextmanager
+from typing import Callable
+import threading
+import time
+
+from instrument import span
+
+
+def chrome_factory(exec_path: str = 'chromedriver.exe', headless: bool = False) -> Callable:
+    """
+    Creates a factory that launches Chrome sessions
+
+    Arguments:
+    exec_path -- path of the driver's executable
+    headless -- runs Chrome without a window if True
+
+    Returns:
+    Callable -- function returning a new webdriver.Chrome
+    """
+    def create():
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+
+        options = webdriver.ChromeOptions()
+        if headless:
+            options.add_argument('--headless=new')
+        return webdriver.Chrome(service=Service(executable_path=exec_path), options=options)
+
+    return create
+
+
+class DriverPool():
+
+    def __init__(self, factory: Callable = None, size: int = 2, headless: bool = False,
+                 exec_path: str = 'chromedriver.exe', idle_timeout: float = 300.0) -> None:
+        """
+        DriverPool class, keeps browser sessions alive so they can be reused between reports
+
+        Arguments:
+        factory -- function returning a new driver, defaults to Chrome
+        size -- maximum number of sessions open at once
+        headless -- runs Chrome without a window if True (default factory only)
+        exec_path -- path of the driver's executable (default factory only)
+        idle_timeout -- seconds an unused session is kept before it is quit
+
+        Returns:
+        None
+        """
+        if size < 1:
+            raise ValueError('Pool size must be at least 1')
+
+        self.factory = factory if factory is not None else chrome_factory(exec_path, headless)
+        self.size = size
+        self.idle_timeout = idle_timeout
+
+        self.idle = [] # (driver, time released), most recently released last
+        self.in_use = set()
+        self.condition = threading.Condition()
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def acquire(self, timeout: float = None):
+        """
+        Borrows a session, reusing an idle healthy one where possible.
+        Health checks and quits are driver round-trips, so they run without holding the lock
+
+        Arguments:
+        timeout -- seconds to wait for a free session, waits indefinitely if None
+
+        Returns:
+        the borrowed driver
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.condition:
+                while True:
+                    expired = self._evict_idle()
+                    if expired or self.idle or len(self.in_use) < self.size:
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError('No browser session became available')
+                    self.condition.wait(remaining)
+
+                # The slot is reserved before checking or launching, so other threads respect the size limit
+                placeholder = None
+                driver = None
+                if self.idle:
+                    driver, _ = self.idle.pop()
+                    self.in_use.add(driver)
+                elif len(self.in_use) < self.size:
+                    placeholder = object()
+                    self.in_use.add(placeholder)
+
+            for expired_driver in expired:
+                self._quit(expired_driver)
+            if placeholder is not None:
+                return self._create(placeholder)
+            if driver is None:
+                continue
+            if self._healthy(driver):
+                with self.condition:
+                    self.reused += 1
+                return driver
+
+            with self.condition:
+                self.in_use.discard(driver)
+                self.discarded += 1
+                self.condition.notify()
+            self._quit(driver)
+
+    def _create(self, placeholder: object):
+        """
+        Launches a session in a slot reserved by acquire
+
+        Arguments:
+        placeholder -- object holding the slot in in_use
+
+        Returns:
+        the new driver
+        """
+        try:
+            with span('chrome_start'):
+                driver = self.factory()
+        except Exception:
+            with self.condition:
+                self.in_use.discard(placeholder)
+                self.condition.notify()
+            raise
+
+        with self.condition:
+            self.in_use.discard(placeholder)
+            self.in_use.add(driver)
+            self.created += 1
+        return driver
+
+    def release(self, driver, discard: bool = False) -> None:
+        """
+        Returns a borrowed session to the pool
+
+        Arguments:
+        driver -- driver obtained from acquire
+        discard -- quits the session instead of keeping it (e.g. after an error)
+
+        Returns:
+        None
+        """
+        keep = not discard and self._healthy(driver)
+        with self.condition:
+            self.in_use.discard(driver)
+            if keep:
+                self.idle.append((driver, time.monotonic()))
+            else:
+                self.discarded += 1
+            self.condition.notify()
+        if not keep:
+            self._quit(driver)
+
+    @contextmanager
+    def session(self, timeout: float = None):
+        """
+        Borrows a session for the duration of a with block, timing the checkout as driver_session.
+        The session is discarded if the block raises
+
+        Arguments:
+        timeout -- seconds to wait for a free session, waits indefinitely if None
+
+        Returns:
+        the borrowed driver
+        """
+        with span('driver_session'):
+            driver = self.acquire(timeout)
+        try:
+            yield driver
+        except BaseException:
+            self.release(driver, discard=True)
+            raise
+        self.release(driver)
+
+    def evict_idle(self) -> None:
+        """
+        Quits sessions that have been idle for longer than idle_timeout
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        with self.condition:
+            expired = self._evict_idle()
+        for driver in expired:
+            self._quit(driver)
+
+    def stats(self) -> dict:
+        """
+        Obtains pool statistics
+
+        Arguments:
+        None
+
+        Returns:
+        dict -- counts of idle, in use, created, reused and discarded sessions
+        """
+        with self.condition:
+            return {
+                'idle': len(self.idle),
+                'in_use': len(self.in_use),
+                'created': self.created,
+                'reused': self.reused,
+                'discarded': self.discarded,
+            }
+
+    def close(self) -> None:
+        """
+        Quits every idle session. Sessions in use are quit when released
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        with self.condition:
+            idle = [driver for driver, _ in self.idle]
+            self.idle = []
+            self.discarded += len(idle)
+        for driver in idle:
+            self._quit(driver)
+
+    def _evict_idle(self) -> list:
+        """
+        Removes expired idle sessions, caller must hold the condition and quit them once it is released
+
+        Arguments:
+        None
+
+        Returns:
+        list -- the expired drivers
+        """
+        now = time.monotonic()
+        kept = []
+        expired = []
+        for driver, released in self.idle:
+            if now - released > self.idle_timeout:
+                expired.append(driver)
+            else:
+                kept.append((driver, released))
+        self.idle = kept
+        self.discarded += len(expired)
+        return expired
+
+    def _healthy(self, driver) -> bool:
+        """
+        Checks that a session still responds
+
+        Arguments:
+        driver -- driver to be checked
+
+        Returns:
+        bool -- True if the session can still be used
+        """
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, driver) -> None:
+        """
+        Quits a session, ignoring errors from sessions that already died
+
+        Arguments:
+        driver -- driver to be quit
+
+        Returns:
+        None
+        """
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+_pools = dict()
+_pools_lock = threading.Lock()
+
+
+def default_pool(exec_path: str = 'chromedriver.exe') -> DriverPool:
+    """
+    Obtains the process-wide Chrome pool for a driver executable
+
+    Arguments:
+    exec_path -- path of the driver's executable
+
+    Returns:
+    DriverPool -- the shared pool
+    """
+    with _pools_lock:
+        if exec_path not in _pools:
+            _pools[exec_path] = DriverPool(exec_path=exec_path)
+        return _pools[exec_path]
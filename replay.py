@@ -0,0 +1,422 @@
+from collections import OrderedDict
+from typing import Callable
+import hashlib
+import json
+import os
+import threading
+import time
+
+PAGES_PATH = 'page_cache'
+
+# 'auto' replays recorded pages and records missing ones, 'record' always fetches,
+# 'replay' never fetches so runs work offline
+REPLAY_MODES = ('auto', 'record', 'replay')
+
+# Bumped whenever the recorded key or value layout changes
+RECORD_VERSION = 1
+
+
+class PageNotRecorded(KeyError):
+    """
+    Raised in replay mode when a page read was never recorded
+    """
+
+
+class PageCache():
+
+    def __init__(self, directory: str = PAGES_PATH, ttl: float = 7 * 24 * 3600,
+                 max_bytes: int = 64 * 1024 * 1024) -> None:
+        """
+        PageCache class, stores what was read from scraped pages as one JSON file per read,
+        evicting the least recently used files once the directory grows past max_bytes
+
+        Arguments:
+        directory -- directory the recordings are kept in
+        ttl -- seconds a recording is replayed for before it is fetched again, None to keep them forever
+        max_bytes -- maximum total size of the recordings
+
+        Returns:
+        None
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.recorded = 0
+        self.evicted = 0
+
+        # File name -> size, least recently used first
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith('.json'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        self.sizes = OrderedDict((name, size) for _, name, size in sorted(entries))
+        self.total = sum(self.sizes.values())
+
+    def get(self, key: str, ignore_ttl: bool = False) -> tuple[bool, object]:
+        """
+        Obtains a recorded read
+
+        Arguments:
+        key -- page URL, inputs and read, see ReplayDriver
+        ignore_ttl -- replays expired recordings too
+
+        Returns:
+        tuple -- (True, value) on a hit, (False, None) otherwise
+        """
+        name = self._name(key)
+        path = os.path.join(self.directory, name)
+        with self.lock:
+            try:
+                with open(path) as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                self.misses += 1
+                return False, None
+
+            if record.get('key') != key:
+                self.misses += 1
+                return False, None
+            if not ignore_ttl and self.ttl is not None and time.time() - record['recorded'] > self.ttl:
+                self.expired += 1
+                return False, None
+
+            # Modification time doubles as last use, so eviction order survives restarts
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            if name in self.sizes:
+                self.sizes.move_to_end(name)
+            self.hits += 1
+            return True, record['value']
+
+    def put(self, key: str, value) -> None:
+        """
+        Records a read, replacing any earlier recording of it
+
+        Arguments:
+        key -- page URL, inputs and read, see ReplayDriver
+        value -- JSON serialisable value read from the page
+
+        Returns:
+        None
+        """
+        name = self._name(key)
+        path = os.path.join(self.directory, name)
+        data = json.dumps({'key': key, 'recorded': time.time(), 'value': value})
+        with self.lock:
+            temp_path = path + '.tmp'
+            with open(temp_path, 'w') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+
+            self.total += len(data) - self.sizes.pop(name, 0)
+            self.sizes[name] = len(data)
+            self.recorded += 1
+            self._evict()
+
+    def clear(self) -> None:
+        """
+        Removes every recording
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        with self.lock:
+            for name in self.sizes:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+            self.sizes.clear()
+            self.total = 0
+
+    def stats(self) -> dict:
+        """
+        Obtains usage statistics
+
+        Arguments:
+        None
+
+        Returns:
+        dict -- hits, misses, expired, recorded, evicted, entries and bytes
+        """
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'recorded': self.recorded,
+                'evicted': self.evicted,
+                'entries': len(self.sizes),
+                'bytes': self.total,
+            }
+
+    def _evict(self) -> None:
+        """
+        Removes the least recently used recordings until the total size fits, lock must be held
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        while self.total > self.max_bytes and len(self.sizes) > 1:
+            name, size = self.sizes.popitem(last=False)
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            self.total -= size
+            self.evicted += 1
+
+    def _name(self, key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest() + '.json'
+
+
+class ReplayElement():
+
+    def __init__(self, driver: 'ReplayDriver', locator: tuple) -> None:
+        """
+        ReplayElement class, an element of a ReplayDriver page located by (by, value, index).
+        Reads go through the page cache, interactions are logged as the page's input
+
+        Arguments:
+        driver -- driver the element belongs to
+        locator -- (by, value, index), index is None for find_element
+
+        Returns:
+        None
+        """
+        self.driver = driver
+        self.locator = locator
+
+    @property
+    def text(self) -> str:
+        return self.driver._read(['text', self.locator], lambda live: self.driver._resolve(live, self.locator).text)
+
+    def get_attribute(self, name: str) -> str:
+        return self.driver._read(['attribute', self.locator, name],
+                                 lambda live: self.driver._resolve(live, self.locator).get_attribute(name))
+
+    def clear(self) -> None:
+        self.driver._act(['clear', self.locator])
+
+    def send_keys(self, *keys) -> None:
+        self.driver._act(['send_keys', self.locator, ''.join(keys)])
+
+    def click(self) -> None:
+        self.driver._act(['click', self.locator])
+
+    def is_displayed(self) -> bool:
+        return not self.driver.synced or self.driver._resolve(self.driver.live, self.locator).is_displayed()
+
+    def is_enabled(self) -> bool:
+        return not self.driver.synced or self.driver._resolve(self.driver.live, self.locator).is_enabled()
+
+
+class ReplayDriver():
+
+    def __init__(self, pages: PageCache, factory: Callable = None, mode: str = 'auto',
+                 resolve_timeout: float = 10.0) -> None:
+        """
+        ReplayDriver class, a driver that records what is read from each page and replays it.
+        A read is keyed by everything done since the last get: the URL, the text typed, the clicks
+        and the scripts run. Interactions are only logged until a read misses, the real driver is
+        then started, the log is replayed onto it and the rest of the page is read live
+
+        Arguments:
+        pages -- cache the reads are recorded in
+        factory -- function returning the real driver, not needed in replay mode
+        mode -- 'auto', 'record' or 'replay', see REPLAY_MODES
+        resolve_timeout -- seconds to wait for a logged element to appear while the log is replayed
+
+        Returns:
+        None
+        """
+        if mode not in REPLAY_MODES:
+            raise ValueError(f'Unknown replay mode: {mode}')
+        if mode != 'replay' and factory is None:
+            raise ValueError(f'A driver factory is needed in {mode} mode')
+
+        self.pages = pages
+        self.factory = factory
+        self.mode = mode
+        self.resolve_timeout = resolve_timeout
+
+        self.live = None
+        self.synced = False # whether the live driver has performed everything in the log
+        self.log = []
+        self.url = 'about:blank'
+        self.replayed = 0
+        self.fetched = 0
+
+    @property
+    def current_url(self) -> str:
+        return self.url
+
+    @property
+    def title(self) -> str:
+        return self.url
+
+    @property
+    def page_source(self) -> str:
+        return self._read(['source'], lambda live: live.page_source)
+
+    def get(self, url: str) -> None:
+        self.log = [['get', url]]
+        self.url = url
+        self.synced = False
+        if self.mode == 'record':
+            self._go_live()
+
+    def find_element(self, by: str, value: str) -> ReplayElement:
+        if self.synced:
+            # Raises as the real driver does while the element is missing, so waits keep polling
+            self.live.find_element(by, value)
+        return ReplayElement(self, (by, value, None))
+
+    def find_elements(self, by: str, value: str) -> list[ReplayElement]:
+        count = self._read(['count', by, value], lambda live: len(live.find_elements(by, value)))
+        return [ReplayElement(self, (by, value, i)) for i in range(count)]
+
+    def execute_script(self, script: str, *args):
+        result = self._read(['script', script, list(args)], lambda live: live.execute_script(script, *args))
+        # Scripts may change the page, so they are part of the input of later reads
+        self.log.append(['script', script, list(args)])
+        return result
+
+    def quit(self) -> None:
+        if self.live is not None:
+            self.live.quit()
+        self.live = None
+        self.synced = False
+
+    def _act(self, action: list) -> None:
+        """
+        Logs an interaction, performing it straight away when the page is live
+
+        Arguments:
+        action -- ['clear' | 'click', locator] or ['send_keys', locator, text]
+
+        Returns:
+        None
+        """
+        self.log.append(action)
+        if self.synced:
+            self._apply(self.live, action)
+
+    def _read(self, read: list, fetch: Callable):
+        """
+        Replays a read, fetching and recording it from the live page on a miss
+
+        Arguments:
+        read -- what is read, appended to the log to form the key
+        fetch -- function reading the value from the live driver
+
+        Returns:
+        the value read
+        """
+        key = json.dumps([RECORD_VERSION, self.log, read])
+        if not self.synced and self.mode != 'record':
+            found, value = self.pages.get(key, ignore_ttl=self.mode == 'replay')
+            if found:
+                self.replayed += 1
+                return value
+        if self.mode == 'replay':
+            raise PageNotRecorded(f'{read[0]} of {self.url} was not recorded for these inputs')
+
+        self._go_live()
+        value = fetch(self.live)
+        self.fetched += 1
+        self.pages.put(key, value)
+        return value
+
+    def _go_live(self) -> None:
+        """
+        Starts the real driver if needed and replays the log onto it
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        if self.synced:
+            return
+        if self.live is None:
+            self.live = self.factory()
+        for action in self.log:
+            self._apply(self.live, action)
+        self.synced = True
+
+    def _apply(self, live, action: list) -> None:
+        """
+        Performs a logged action on the real driver
+
+        Arguments:
+        live -- real driver
+        action -- logged action
+
+        Returns:
+        None
+        """
+        kind = action[0]
+        if kind == 'get':
+            live.get(action[1])
+        elif kind == 'script':
+            live.execute_script(action[1], *action[2])
+        elif kind == 'send_keys':
+            self._resolve(live, action[1]).send_keys(action[2])
+        else:
+            getattr(self._resolve(live, action[1]), kind)()
+
+    def _resolve(self, live, locator: tuple):
+        """
+        Finds the real element of a locator, waiting for it to appear
+
+        Arguments:
+        live -- real driver
+        locator -- (by, value, index)
+
+        Returns:
+        the real element
+        """
+        by, value, index = locator
+        deadline = time.monotonic() + self.resolve_timeout
+        while True:
+            elements = live.find_elements(by, value)
+            if len(elements) > (index or 0):
+                return elements[index or 0]
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'Element {value} did not appear on {self.url}')
+            time.sleep(0.1)
+
+
+def replay_factory(pages: PageCache, mode: str = 'auto', factory: Callable = None) -> Callable:
+    """
+    Creates a factory of replaying sessions for DriverPool, all sharing one page cache
+
+    Arguments:
+    pages -- cache the reads are recorded in
+    mode -- 'auto', 'record' or 'replay', see REPLAY_MODES
+    factory -- function returning a real driver, e.g. pool.chrome_factory(...), not needed in replay mode
+
+    Returns:
+    Callable -- function returning a new ReplayDriver
+    """
+    def create():
+        return ReplayDriver(pages, factory, mode)
+
+    return create
@@ -0,0 +1,289 @@
+from datetime import datetime
+from itertools import chain
+from typing import Callable
+import numpy as np
+import json
+import sys
+
+MAGIC = b'REPORT01'
+
+# Stored in place of a value that is 'NA'
+NA = -1
+
+
+def strip_zeros(values: np.ndarray) -> np.ndarray:
+    """
+    Removes the zero digits of every number, as NumberCounter does with replace('0', '')
+
+    Arguments:
+    values -- array of positive integers
+
+    Returns:
+    np.ndarray -- numbers without their zero digits
+    """
+    values = values.astype(np.int64)
+    stripped = np.zeros_like(values)
+    scale = np.ones_like(values)
+    while values.any():
+        values, digit = np.divmod(values, 10)
+        nonzero = digit != 0
+        stripped += digit * scale * nonzero
+        scale *= np.where(nonzero, 10, 1)
+    return stripped
+
+
+class Memo(dict):
+
+    __slots__ = ('function',)
+
+    def __init__(self, function: Callable) -> None:
+        """
+        Memo class, a dict that computes and keeps the value of any key it is missing,
+        so cached lookups can be mapped over a list without a Python call per item
+
+        Arguments:
+        function -- called with a missing key to obtain its value
+
+        Returns:
+        None
+        """
+        self.function = function
+
+    def __missing__(self, key):
+        value = self[key] = self.function(key)
+        return value
+
+
+def _code(text: str) -> int:
+    return int(text) if text.isdigit() else NA
+
+
+def _variant(num: int) -> int:
+    text = str(num)
+    return int(text.replace('0', '') or 0) if '0' in text else 0
+
+
+# Number -> its zero-stripped variant (0 if it has no zeros, or only zeros), number -> string format and back.
+# Reports reuse the same few hundred values, so these stay small
+VARIANTS = Memo(_variant)
+TEXTS = Memo(lambda num: str(num) if num != NA else 'NA')
+CODES = Memo(_code)
+
+
+def encode(numbers) -> list[int]:
+    """
+    Encodes numbers in string format as integers, NA (and anything else non-numeric) as NA
+
+    Arguments:
+    numbers -- numbers in string format
+
+    Returns:
+    list[int] -- encoded numbers
+    """
+    return list(map(CODES.__getitem__, numbers))
+
+
+class GridView():
+
+    __slots__ = ('labels', 'values', 'colour')
+
+    def __init__(self, labels: list[str], values: np.ndarray, colour: Callable = None) -> None:
+        """
+        GridView class, the rows of a report section as GridTable reads them, [label] + values in string format.
+        Rows are only formatted as they are drawn, so scrolling a long report never formats the hidden ones
+
+        Arguments:
+        labels -- first cell of each row
+        values -- a view of the section's values, one row per label
+        colour -- called with each value in string format, the view then holds the cell backgrounds instead
+
+        Returns:
+        None
+        """
+        self.labels = labels
+        self.values = values
+        self.colour = colour
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __getitem__(self, index: int) -> list[str]:
+        texts = list(map(TEXTS.__getitem__, self.values[index].tolist()))
+        if self.colour is not None:
+            return [None] + [self.colour(text) for text in texts]
+        return [self.labels[index]] + texts
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class Report():
+
+    __slots__ = ('date', 'columns', 'phrases', 'stat_names', 'numbers', 'values', 'stats')
+
+    def __init__(self, date: datetime.date, columns: list[str], phrases: list[str], stat_names: list[str],
+                 numbers) -> None:
+        """
+        Report class, a date's (or matchup's) phrases and statistics with their values as one integer buffer.
+        values (phrases x columns) and stats (statistics x 2) are views of numbers, which lists every value in
+        NumberCounter's order, so the counter, the UI grids and serialisation all read the same memory
+
+        Arguments:
+        date -- date of the report
+        columns -- cipher column of each value
+        phrases -- phrases (and team aliases), interned
+        stat_names -- names of the date statistics, interned
+        numbers -- every value, the phrases' row by row then the statistics' two each, NA where missing
+
+        Returns:
+        None
+        """
+        self.date = date
+        self.columns = list(columns)
+        self.phrases = [sys.intern(phrase) for phrase in phrases]
+        self.stat_names = [sys.intern(name) for name in stat_names]
+
+        n_values = len(self.phrases) * len(self.columns)
+        self.numbers = np.asarray(numbers, dtype=np.int32)
+        if len(self.numbers) != n_values + 2 * len(self.stat_names):
+            raise ValueError(f'Expected {n_values + 2 * len(self.stat_names)} numbers, got {len(self.numbers)}')
+        self.values = self.numbers[:n_values].reshape(len(self.phrases), len(self.columns))
+        self.stats = self.numbers[n_values:].reshape(len(self.stat_names), 2)
+
+    @classmethod
+    def from_results(cls, date: datetime.date, columns: list[str], phrases: list[str],
+                     phrase_results: list[list[str]], date_stats: dict) -> 'Report':
+        """
+        Builds a report from the string results the scraper reads
+
+        Arguments:
+        date -- date of the report
+        columns -- cipher column of each value
+        phrases -- phrases (and team aliases)
+        phrase_results -- a 2d array of numbers in string format, one row per phrase
+        date_stats -- statistic -> [value, value or 'NA']
+
+        Returns:
+        Report -- the report
+        """
+        numbers = encode(chain.from_iterable(phrase_results))
+        numbers += encode(chain.from_iterable(date_stats.values()))
+        return cls(date, columns, phrases, list(date_stats), numbers)
+
+    @classmethod
+    def from_values(cls, date: datetime.date, columns: list[str], phrases: list[str], values: np.ndarray,
+                    stat_names: list[str], stats: np.ndarray) -> 'Report':
+        """
+        Builds a report from values already held as integers, e.g. read from the date store or computed locally
+
+        Arguments:
+        date -- date of the report
+        columns -- cipher column of each value
+        phrases -- phrases (and team aliases)
+        values -- their cipher values, one row per phrase, NA where missing
+        stat_names -- names of the date statistics
+        stats -- their values, two per statistic, NA where missing
+
+        Returns:
+        Report -- the report
+        """
+        numbers = np.concatenate((np.asarray(values, dtype=np.int32).ravel(), np.asarray(stats, dtype=np.int32).ravel()))
+        return cls(date, columns, phrases, stat_names, numbers)
+
+    def extend(self, phrases: list[str], values: np.ndarray) -> 'Report':
+        """
+        Obtains a copy of the report with more phrases, e.g. a matchup's team aliases added to a date's report
+
+        Arguments:
+        phrases -- phrases added after the report's own
+        values -- their cipher values, one row per phrase
+
+        Returns:
+        Report -- the extended report
+        """
+        numbers = np.concatenate((self.values.ravel(), np.asarray(values, dtype=np.int32).ravel(), self.stats.ravel()))
+        return Report(self.date, self.columns, self.phrases + list(phrases), self.stat_names, numbers)
+
+    def phrase_rows(self, colour: Callable = None) -> GridView:
+        """
+        Obtains the phrase grid, see GridView
+
+        Arguments:
+        colour -- called with each value in string format to obtain the cell backgrounds instead of the texts
+
+        Returns:
+        GridView -- one row per phrase
+        """
+        return GridView(self.phrases, self.values, colour)
+
+    def stat_rows(self, colour: Callable = None) -> GridView:
+        """
+        Obtains the date statistics grid, see GridView
+
+        Arguments:
+        colour -- called with each value in string format to obtain the cell backgrounds instead of the texts
+
+        Returns:
+        GridView -- one row per statistic
+        """
+        return GridView(self.stat_names, self.stats, colour)
+
+    def phrase_dict(self) -> dict:
+        """
+        Obtains the phrases and their values as WebScraper.phrase_dict holds them
+
+        Arguments:
+        None
+
+        Returns:
+        dict -- phrase -> cipher values in string format
+        """
+        return {phrase: list(map(TEXTS.__getitem__, row)) for phrase, row in zip(self.phrases, self.values.tolist())}
+
+    def date_stats(self) -> dict:
+        """
+        Obtains the statistics as WebScraper.date_stats holds them
+
+        Arguments:
+        None
+
+        Returns:
+        dict -- statistic -> [value, value or 'NA']
+        """
+        return {name: list(map(TEXTS.__getitem__, row)) for name, row in zip(self.stat_names, self.stats.tolist())}
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialises the report as a JSON header followed by the raw buffer
+
+        Arguments:
+        None
+
+        Returns:
+        bytes -- the serialised report
+        """
+        header = json.dumps({
+            'date': self.date.isoformat(),
+            'columns': self.columns,
+            'phrases': self.phrases,
+            'stat_names': self.stat_names,
+        }).encode()
+        return MAGIC + len(header).to_bytes(8, 'little') + header + self.numbers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Report':
+        """
+        Reads a report serialised by to_bytes
+
+        Arguments:
+        data -- the serialised report
+
+        Returns:
+        Report -- the report
+        """
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError('Not a serialised report')
+        header_end = len(MAGIC) + 8 + int.from_bytes(data[len(MAGIC):len(MAGIC) + 8], 'little')
+        header = json.loads(data[len(MAGIC) + 8:header_end])
+        return cls(datetime.fromisoformat(header['date']), header['columns'], header['phrases'], header['stat_names'],
+                   np.frombuffer(data, dtype=np.int32, offset=header_end))
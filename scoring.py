@@ -0,0 +1,193 @@
+from datetime import datetime
+from itertools import combinations
+from report import NA, encode, strip_zeros
+from teams import TeamStore, default_store
+import numpy as np
+
+
+class MatchupScorer():
+
+    def __init__(self, date_results: list[list[str]], date_stats: dict, teams: TeamStore = None) -> None:
+        """
+        MatchupScorer class, performs NumberCounter's counting and ranking for every matchup of a date at once.
+        Numbers are encoded as integers and counted in dense arrays indexed by value
+
+        Arguments:
+        date_results -- a 2d array of numbers in string format, for the date's phrases only
+        date_stats -- statistics of the date
+        teams -- team aliases and their cipher values, defaults to the shared store
+
+        Returns:
+        None
+        """
+        self.teams = teams if teams is not None else default_store()
+
+        date_values = np.array(encode([num for result in date_results for num in result]), dtype=np.int64)
+        stat_values = np.array(encode([num for stat in date_stats.values() for num in stat if num != '0']), dtype=np.int64)
+        team_values = self.teams.values.astype(np.int64)
+
+        self.size = int(max(date_values.max(initial=0), stat_values.max(initial=0), team_values.max(initial=0))) + 1
+
+        # Numbers are ranked by count, ties keep NumberCounter's first-occurrence order:
+        # (stripped, segment, position) with segments date results, team 1, team 2, date stats
+        self.segment = max(len(date_values), len(stat_values), int(np.diff(self.teams.offsets).max(initial=0)) * team_values.shape[1]) + 1
+        self.never = np.iinfo(np.int64).max
+
+        self.date_counts = np.zeros(self.size, dtype=np.int32)
+        self.date_first = np.full(self.size, self.never, dtype=np.int64)
+        self._add(self.date_counts, self.date_first, date_values, 0)
+        self._add(self.date_counts, self.date_first, stat_values, 3)
+
+        n_teams = len(self.teams.teams)
+        self.team_counts = np.zeros((n_teams, self.size), dtype=np.int32)
+        self.team_first = np.full((n_teams, self.size), self.never, dtype=np.int64)
+        for i in range(n_teams):
+            rows = team_values[self.teams.offsets[i]:self.teams.offsets[i + 1]].ravel()
+            self._add(self.team_counts[i], self.team_first[i], rows, 0)
+
+    def _add(self, counts: np.ndarray, first: np.ndarray, values: np.ndarray, segment: int) -> None:
+        """
+        Counts numbers and their zero-stripped variants, recording where each first occurs
+
+        Arguments:
+        counts -- counts indexed by number, updated in place
+        first -- first-occurrence keys indexed by number, updated in place
+        values -- encoded numbers in order of occurrence
+        segment -- which part of NumberCounter's list the numbers belong to
+
+        Returns:
+        None
+        """
+        positions = np.arange(len(values), dtype=np.int64)
+        valid = values != NA
+        stripped = strip_zeros(np.where(valid, values, 0))
+        changed = valid & (stripped != values) & (stripped > 0)
+
+        for numbers, keys in (
+            (values[valid], segment * self.segment + positions[valid]),
+            (stripped[changed], (4 + segment) * self.segment + positions[changed]),
+        ):
+            np.add.at(counts, numbers, 1)
+            np.minimum.at(first, numbers, keys)
+
+    def scores(self, significance: int = 2) -> dict:
+        """
+        Scores every matchup in one vectorized pass
+
+        Arguments:
+        significance -- minimum count for a number to be displayed
+
+        Returns:
+        dict -- 'pairs' (team indices), 'counts' and 'order' (numbers ranked as display_nums would),
+                'shown' (count of displayed numbers), 'hits' and 'weight' per matchup
+        """
+        pairs = np.array(list(combinations(range(len(self.teams.teams)), 2)), dtype=np.int64).reshape(-1, 2)
+        first_team, second_team = pairs[:, 0], pairs[:, 1]
+
+        team_counts = self.team_counts[first_team] + self.team_counts[second_team]
+        counts = self.date_counts + team_counts
+        first = np.minimum(
+            self.date_first,
+            np.minimum(
+                self._shift(self.team_first[first_team], 1),
+                self._shift(self.team_first[second_team], 2),
+            )
+        )
+
+        # Descending count, then first occurrence
+        order = np.lexsort((first, -counts), axis=-1)
+        displayed = counts >= significance
+        hit = displayed & (team_counts > 0) & (self.date_counts > 0)
+
+        return {
+            'pairs': pairs,
+            'counts': counts,
+            'order': order,
+            'shown': displayed.sum(axis=1),
+            'hits': hit.sum(axis=1),
+            'weight': (counts * hit).sum(axis=1),
+        }
+
+    def team_scores(self, first_team: np.ndarray, second_team: np.ndarray, thresholds: list[int]) -> np.ndarray:
+        """
+        Scores both teams of many matchups at several significance thresholds in one vectorized pass.
+        A team's score is the total count of the displayed numbers its own aliases produce
+
+        Arguments:
+        first_team -- team indices of the first teams
+        second_team -- team indices of the second teams
+        thresholds -- significance thresholds, a number is displayed once its count reaches one
+
+        Returns:
+        np.ndarray -- scores, shape (thresholds, matchups, 2) with the first team's score first
+        """
+        first_counts = self.team_counts[first_team]
+        second_counts = self.team_counts[second_team]
+        counts = self.date_counts + first_counts + second_counts
+        weights = counts * (counts >= np.asarray(thresholds)[:, None, None])
+        return np.stack(((weights * (first_counts > 0)).sum(axis=-1), (weights * (second_counts > 0)).sum(axis=-1)), axis=-1)
+
+    def _shift(self, first: np.ndarray, segment: int) -> np.ndarray:
+        """
+        Moves team first-occurrence keys into the segment of team 1 or team 2
+
+        Arguments:
+        first -- first-occurrence keys recorded with segment 0
+        segment -- segment of the team
+
+        Returns:
+        np.ndarray -- shifted keys
+        """
+        return np.where(first == self.never, self.never, first + segment * self.segment)
+
+    def rank(self, significance: int = 2, limit: int = None) -> list[dict]:
+        """
+        Ranks every matchup by how many displayed numbers the teams share with the date
+
+        Arguments:
+        significance -- minimum count for a number to be displayed
+        limit -- number of matchups returned, all if None
+
+        Returns:
+        list[dict] -- team1, team2, hits, weight and the matchup's display_nums, best first
+        """
+        scores = self.scores(significance)
+        ranking = np.lexsort((-scores['weight'], -scores['hits']))
+        if limit is not None:
+            ranking = ranking[:limit]
+
+        table = []
+        for i in ranking.tolist():
+            first_team, second_team = scores['pairs'][i].tolist()
+            shown = int(scores['shown'][i])
+            numbers = scores['order'][i, :shown]
+            table.append({
+                'team1': self.teams.teams[first_team],
+                'team2': self.teams.teams[second_team],
+                'hits': int(scores['hits'][i]),
+                'weight': int(scores['weight'][i]),
+                'ranked': list(zip(map(str, numbers.tolist()), scores['counts'][i, numbers].tolist())),
+            })
+        return table
+
+
+def score_date(date: datetime.date, backend: str = 'local', ciphers: list[str] = ['chaldean'],
+               significance: int = 2, **kwargs) -> list[dict]:
+    """
+    Ranks every matchup of a date
+
+    Arguments:
+    date -- the date being analysed
+    backend -- backend the date's phrases and stats are obtained with
+    ciphers -- list of ciphers to be added
+    significance -- minimum count for a number to be displayed
+    kwargs -- passed on to WebScraper (e.g. cache, pool)
+
+    Returns:
+    list[dict] -- see MatchupScorer.rank
+    """
+    from web import WebScraper
+
+    ws = WebScraper(date, backend=backend, **kwargs)
+    ws.run(None, None, ciphers)
+    return MatchupScorer(ws.phrase_results, ws.date_stats, ws.teams).rank(significance)
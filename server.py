@@ -0,0 +1,389 @@
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from urllib.parse import parse_qs, urlsplit
+from cipher import BACKENDS, active_ciphers
+from cache import PhraseCache
+from datestore import DateStore
+from index import DATE, TEAM, NumberIndex
+from instrument import enable, tracer
+from pool import DriverPool, chrome_factory
+from replay import PAGES_PATH, REPLAY_MODES, PageCache, replay_factory
+from web import WebScraper
+import argparse
+import asyncio
+import json
+import time
+
+HOST = '127.0.0.1'
+PORT = 8765
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class ReportServer():
+
+    def __init__(self, port: int = PORT, backend: str = 'local', ciphers: list[str] = ['chaldean'],
+                 cache: PhraseCache = None, pool: DriverPool = None, max_dates: int = 366, workers: int = 4,
+                 store: DateStore = None, index: NumberIndex = None) -> None:
+        """
+        ReportServer class, serves matchup reports over HTTP on localhost.
+        Each date's phrases and stats are computed once, shared by every matchup on that date,
+        and concurrent requests for the same date wait on the same computation
+
+        Arguments:
+        port -- port listened on, 0 for any free port
+        backend -- 'browser' to use gematrinator, 'local' to compute everything in process
+        ciphers -- list of ciphers to be added
+        cache -- cache of phrase results passed on to WebScraper
+        pool -- pool browser sessions are borrowed from
+        max_dates -- number of dates kept in the report cache
+        workers -- threads the dates are computed on
+        store -- precomputed date inputs passed on to WebScraper
+        index -- number index answering /numbers, built from the teams and store on first use if None.
+                 Each date computed is indexed too, so dates the store doesn't cover can be looked up
+
+        Returns:
+        None
+        """
+        self.port = port
+        self.backend = backend
+        self.ciphers = ciphers
+        self.cache = cache
+        self.pool = pool
+        self.store = store
+        self.index = index
+        self.max_dates = max_dates
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+        self.dates = OrderedDict() # date -> WebScraper after run(None, None)
+        self.inflight = dict() # date -> future of the computation
+
+        self.counters = {'requests': 0, 'errors': 0, 'date_hits': 0, 'date_misses': 0, 'date_coalesced': 0}
+        self.latencies = deque(maxlen=10000)
+        self.server = None
+
+    async def start(self) -> None:
+        """
+        Starts listening on localhost
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        self.server = await asyncio.start_server(self.handle, HOST, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """
+        Starts listening and serves until cancelled
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self) -> None:
+        """
+        Stops listening and shuts the worker threads down
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def date_scraper(self, day: date) -> WebScraper:
+        """
+        Obtains the date-only scraper of a date, computing it at most once at a time
+
+        Arguments:
+        day -- date of the report
+
+        Returns:
+        WebScraper -- scraper after run(None, None)
+        """
+        if day in self.dates:
+            self.dates.move_to_end(day)
+            self.counters['date_hits'] += 1
+            return self.dates[day]
+
+        if day in self.inflight:
+            self.counters['date_coalesced'] += 1
+            return await asyncio.shield(self.inflight[day])
+
+        self.counters['date_misses'] += 1
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, self._compute_date, day)
+        self.inflight[day] = future
+        # Kept by a callback rather than after the await, so a cancelled request doesn't discard the result
+        future.add_done_callback(lambda done: self._keep_date(day, done))
+        return await asyncio.shield(future)
+
+    def _keep_date(self, day: date, future: asyncio.Future) -> None:
+        """
+        Caches a date once its computation finishes, on the event loop
+
+        Arguments:
+        day -- date of the report
+        future -- finished future of the computation
+
+        Returns:
+        None
+        """
+        del self.inflight[day]
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        ws = future.result()
+        self.dates[day] = ws
+        if self.index is not None:
+            self.index.add_phrases(ws.phrases, ws.phrase_results)
+        while len(self.dates) > self.max_dates:
+            self.dates.popitem(last=False)
+
+    def _compute_date(self, day: date) -> WebScraper:
+        """
+        Runs the scraper for a date's phrases and stats, on a worker thread
+
+        Arguments:
+        day -- date of the report
+
+        Returns:
+        WebScraper -- scraper after run(None, None)
+        """
+        ws = WebScraper(datetime(day.year, day.month, day.day), backend=self.backend, cache=self.cache, pool=self.pool,
+                        store=self.store)
+        ws.run(None, None, self.ciphers)
+        return ws
+
+    async def report(self, query: dict) -> tuple[int, dict]:
+        """
+        Handles /report?date=YYYY-MM-DD&team1=...&team2=...[&significance=2]
+
+        Arguments:
+        query -- parsed query string
+
+        Returns:
+        tuple -- (status, body)
+        """
+        try:
+            day = date.fromisoformat(query['date'][0])
+            team1, team2 = query['team1'][0], query['team2'][0]
+            significance = int(query.get('significance', ['2'])[0])
+        except (KeyError, ValueError):
+            return 400, {'error': 'date (YYYY-MM-DD), team1 and team2 are required'}
+
+        ws = await self.date_scraper(day)
+        try:
+            return 200, ws.matchup_report(team1, team2, significance)
+        except KeyError as error:
+            return 404, {'error': str(error.args[0]) if error.args else 'Unknown team'}
+
+    async def numbers(self, query: dict) -> tuple[int, dict]:
+        """
+        Handles /numbers?number=74[&number=...][&source=team|date], the phrases and teams producing each number
+
+        Arguments:
+        query -- parsed query string
+
+        Returns:
+        tuple -- (status, body)
+        """
+        numbers = query.get('number', [])
+        source = query.get('source', [None])[0]
+        if not numbers or not all(number.isdigit() for number in numbers) or source not in (None, TEAM, DATE):
+            return 400, {'error': 'number (digits, repeatable) is required, source must be team or date'}
+
+        if self.index is None:
+            loop = asyncio.get_running_loop()
+            index = await loop.run_in_executor(self.executor, NumberIndex.build, self.ciphers, None, self.store)
+            # Dates the store doesn't cover, as their reports were computed
+            for ws in self.dates.values():
+                index.add_phrases(ws.phrases, ws.phrase_results)
+            self.index = index
+
+        return 200, {
+            number: {
+                'phrases': [[phrase, cipher, stripped] for phrase, cipher, stripped in postings],
+                'teams': list(self.index.teams(number)),
+            }
+            for number, postings in self.index.matches(numbers, source).items()
+        }
+
+    def stats(self) -> dict:
+        """
+        Obtains request counters, latency percentiles and cache statistics
+
+        Arguments:
+        None
+
+        Returns:
+        dict -- statistics
+        """
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction: float) -> float:
+            return latencies[min(int(fraction * len(latencies)), len(latencies) - 1)] * 1000 if latencies else 0.0
+
+        stats = dict(self.counters)
+        stats['dates_cached'] = len(self.dates)
+        stats['latency_ms'] = {
+            'count': len(latencies),
+            'mean': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': latencies[-1] * 1000 if latencies else 0.0,
+        }
+        if self.cache is not None:
+            stats['phrase_cache'] = self.cache.stats()
+        if self.pool is not None:
+            stats['pool'] = self.pool.stats()
+        return stats
+
+    async def route(self, method: str, target: str) -> tuple[int, dict]:
+        """
+        Dispatches a request
+
+        Arguments:
+        method -- HTTP method
+        target -- request target (path and query string)
+
+        Returns:
+        tuple -- (status, body), a str body is sent as plain text
+        """
+        if method != 'GET':
+            return 405, {'error': 'Only GET is supported'}
+
+        url = urlsplit(target)
+        if url.path == '/report':
+            return await self.report(parse_qs(url.query))
+        if url.path == '/numbers':
+            return await self.numbers(parse_qs(url.query))
+        if url.path == '/stats':
+            return 200, self.stats()
+        if url.path == '/health':
+            return 200, {'status': 'ok'}
+        if url.path in ('/metrics', '/trace'):
+            if tracer() is None:
+                return 404, {'error': 'Instrumentation is disabled, start the server with --trace'}
+            return 200, tracer().prometheus() if url.path == '/metrics' else tracer().trace()
+        return 404, {'error': f'Unknown path {url.path}'}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves the requests of one connection, keeping it alive between requests
+
+        Arguments:
+        reader -- connection reader
+        writer -- connection writer
+
+        Returns:
+        None
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = dict()
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length > 0:
+                    await reader.readexactly(length)
+
+                start = time.perf_counter()
+                self.counters['requests'] += 1
+                if length < 0:
+                    # The body can't be skipped without its length, so the connection is closed after replying
+                    status, body, version = 400, {'error': 'Malformed Content-Length header'}, 'HTTP/1.0'
+                else:
+                    try:
+                        method, target, version = request_line.decode('latin-1').split()
+                        status, body = await self.route(method, target)
+                    except ValueError:
+                        status, body, version = 400, {'error': 'Malformed request line'}, 'HTTP/1.0'
+                    except Exception as error:
+                        status, body = 500, {'error': str(error)}
+                if status >= 400:
+                    self.counters['errors'] += 1
+
+                keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close')
+                if isinstance(body, str):
+                    payload, content_type = body.encode(), 'text/plain; version=0.0.4'
+                else:
+                    payload, content_type = json.dumps(body).encode(), 'application/json'
+                writer.write(
+                    f'HTTP/1.1 {status} {_REASONS.get(status, "")}\r\n'
+                    f'Content-Type: {content_type}\r\n'
+                    f'Content-Length: {len(payload)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode() + payload
+                )
+                await writer.drain()
+                self.latencies.append(time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=f'Serves matchup reports on http://{HOST}')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--backend', choices=BACKENDS, default='local')
+    parser.add_argument('--cipher', action='append', dest='ciphers', help='cipher to add (repeatable), defaults to the active ciphers in ciphers.json')
+    parser.add_argument('--exec-path', default='chromedriver.exe')
+    parser.add_argument('--sessions', type=int, default=2, help='browser sessions to keep open')
+    parser.add_argument('--pages', choices=('off',) + REPLAY_MODES, default='off',
+                        help="record and replay scraped pages, 'replay' works offline")
+    parser.add_argument('--pages-dir', default=PAGES_PATH, help='directory the recorded pages are kept in')
+    parser.add_argument('--store', action='store_true', help='read dates from the precomputed date store, building it if stale')
+    parser.add_argument('--trace', action='store_true', help='records stage spans and driver commands, served on /trace and /metrics')
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        enable()
+    ciphers = args.ciphers or active_ciphers()
+    store = DateStore.load(ciphers) if args.store else None
+    pool = None
+    if args.backend == 'browser':
+        factory = chrome_factory(args.exec_path, headless=True)
+        if args.pages != 'off':
+            factory = replay_factory(PageCache(args.pages_dir), args.pages, factory)
+        pool = DriverPool(factory, size=args.sessions)
+    server = ReportServer(args.port, args.backend, ciphers, PhraseCache(), pool, store=store)
+    print(f'Serving on http://{HOST}:{args.port}')
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if pool is not None:
+            pool.close()
+
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,72 @@
+import csv
+import os
+import pickle
+
+SNAPSHOT_PATH = 'ui_snapshot.bin'
+
+# Files the startup data is read from, the snapshot is rebuilt when either changes
+TEAMS_PATH = 'teams.csv'
+CIPHERS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ciphers.json')
+
+# Bumped whenever the snapshot layout changes
+SNAPSHOT_VERSION = 1
+
+
+def load_snapshot(path: str = SNAPSHOT_PATH, teams_path: str = TEAMS_PATH) -> dict:
+    """
+    Obtains the static data the UI starts with, from a snapshot taken the last time teams.csv and
+    ciphers.json were read. Only the standard library is imported on a hit, so the window can appear
+    before numpy and the scraper are loaded
+
+    Arguments:
+    path -- path of the snapshot, None to always read the files
+    teams_path -- path of teams.csv
+
+    Returns:
+    dict -- teams in teams.csv order, the active ciphers and the labels of their columns
+    """
+    signature = (SNAPSHOT_VERSION, _file_signature(teams_path), _file_signature(CIPHERS_PATH))
+    if path is not None:
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+            if data['signature'] == signature:
+                return data['snapshot']
+        except Exception:
+            # A missing, truncated or outdated snapshot is simply rebuilt
+            pass
+
+    # cipher.py reads ciphers.json as it is imported
+    from cipher import active_ciphers, column_labels
+
+    ciphers = active_ciphers()
+    with open(teams_path, newline='') as f:
+        teams = [row[0] for row in csv.reader(f) if row]
+    snapshot = {
+        'teams': teams,
+        'ciphers': ciphers,
+        'labels': column_labels(ciphers),
+    }
+    if path is not None:
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump({'signature': signature, 'snapshot': snapshot}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    return snapshot
+
+
+def _file_signature(path: str) -> tuple:
+    """
+    Obtains a cheap signature that changes whenever a file is modified
+
+    Arguments:
+    path -- path of the file
+
+    Returns:
+    tuple -- (modification time in ns, size), None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,304 @@
+from cipher import CIPHERS, CipherEngine, active_ciphers, cipher_columns, cipher_set_path
+import numpy as np
+import csv
+import os
+import pickle
+import threading
+
+TEAMS_PATH = 'teams.csv'
+NUMS_PATH = 'team_nums.csv'
+SIDECAR_PATH = 'team_store.bin'
+
+# Ciphers team_nums.csv is built with, other cipher sets have a file of their own, see nums_path_for
+NUMS_CIPHERS = ['chaldean']
+
+# Stored in place of a cipher value that is missing from team_nums.csv
+NA = -1
+
+# Bumped whenever the sidecar layout changes
+SIDECAR_VERSION = 2
+
+
+class TeamStore():
+
+    def __init__(self, teams: list[str], aliases: list[list[str]], values: np.ndarray, offsets: np.ndarray,
+                 columns: list[str] = None) -> None:
+        """
+        TeamStore class, holds every team's aliases and their cipher values, indexed by team and alias.
+        Use TeamStore.load to build one from the CSVs
+
+        Arguments:
+        teams -- canonical team names, in teams.csv order
+        aliases -- each team's aliases (canonical name first), in teams.csv order
+        values -- cipher values of every alias, one row per alias, NA where missing
+        offsets -- row of each team's first alias in values, plus the total number of rows
+        columns -- cipher column of each value, defaults to the columns of team_nums.csv
+
+        Returns:
+        None
+        """
+        self.columns = list(columns) if columns is not None else cipher_columns(NUMS_CIPHERS)
+        self.teams = teams
+        self.aliases = aliases
+        self.values = values
+        self.offsets = offsets
+
+        self.team_index = {team: i for i, team in enumerate(teams)}
+        self.alias_index = dict()
+        for i, team_aliases in enumerate(aliases):
+            for alias in team_aliases:
+                indices = self.alias_index.setdefault(alias, [])
+                if i not in indices:
+                    indices.append(i)
+
+        # Results in string format, built once so lookups don't allocate
+        self._results = [[str(value) if value != NA else 'NA' for value in row] for row in values.tolist()]
+
+    @classmethod
+    def load(cls, ciphers: list[str] = None, teams_path: str = TEAMS_PATH, nums_path: str = None,
+             sidecar_path: str = SIDECAR_PATH) -> 'TeamStore':
+        """
+        Loads the store from its binary sidecar, rebuilding the sidecar if either CSV or the ciphers changed.
+        Without a team_nums file for the ciphers, the values are computed locally
+
+        Arguments:
+        ciphers -- list of ciphers to be added, defaults to the active ciphers
+        teams_path -- path of teams.csv
+        nums_path -- path of the team_nums file, defaults to the one for the ciphers
+        sidecar_path -- path of the binary sidecar of NUMS_CIPHERS, other cipher sets have one named after it
+                        (see cipher_set_path) so switching sets doesn't rebuild a shared one. None to always read the CSVs
+
+        Returns:
+        TeamStore -- the loaded store
+        """
+        ciphers = ciphers if ciphers is not None else active_ciphers()
+        columns = cipher_columns(ciphers)
+        nums_path = nums_path if nums_path is not None else nums_path_for(ciphers)
+        nums_signature = _file_signature(nums_path) if os.path.exists(nums_path) else None
+        if sidecar_path is not None:
+            sidecar_path = cipher_set_path(sidecar_path, ciphers, NUMS_CIPHERS)
+        signature = (SIDECAR_VERSION, columns, [CIPHERS[column] for column in columns],
+                     _file_signature(teams_path), nums_signature)
+
+        if sidecar_path is not None:
+            try:
+                with open(sidecar_path, 'rb') as f:
+                    data = pickle.load(f)
+                if data['signature'] == signature:
+                    return cls(data['teams'], data['aliases'], data['values'], data['offsets'], data['columns'])
+            except Exception:
+                # Missing, truncated or from an older layout, unpickling can raise almost anything
+                pass
+
+        if nums_signature is not None:
+            store = cls.from_csv(teams_path, nums_path, ciphers)
+        else:
+            store = cls.from_engine(ciphers, teams_path)
+        if sidecar_path is not None:
+            data = {
+                'signature': signature,
+                'teams': store.teams,
+                'aliases': store.aliases,
+                'values': store.values,
+                'offsets': store.offsets,
+                'columns': store.columns,
+            }
+            temp_path = sidecar_path + '.tmp'
+            with open(temp_path, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, sidecar_path)
+        return store
+
+    @classmethod
+    def from_csv(cls, teams_path: str = TEAMS_PATH, nums_path: str = NUMS_PATH,
+                 ciphers: list[str] = NUMS_CIPHERS) -> 'TeamStore':
+        """
+        Builds the store from teams.csv and team_nums.csv.
+        Values are matched to aliases by phrase, so repeated or reordered rows are harmless
+
+        Arguments:
+        teams_path -- path of teams.csv
+        nums_path -- path of team_nums.csv
+        ciphers -- list of ciphers the team_nums file was built with
+
+        Returns:
+        TeamStore -- the built store
+        """
+        teams, aliases = _read_teams(teams_path)
+
+        phrase_values = dict()
+        n_ciphers = 0
+        with open(nums_path, newline='') as f:
+            for row in csv.reader(f):
+                if not row:
+                    continue
+                n_ciphers = max(n_ciphers, len(row) - 1)
+                phrase_values.setdefault(row[0], [int(value) if value.isdigit() else NA for value in row[1:]])
+
+        offsets = np.zeros(len(teams) + 1, dtype=np.int32)
+        offsets[1:] = np.cumsum([len(team_aliases) for team_aliases in aliases])
+        values = np.full((int(offsets[-1]), n_ciphers), NA, dtype=np.int32)
+        row = 0
+        for team_aliases in aliases:
+            for alias in team_aliases:
+                alias_values = phrase_values.get(alias, [])
+                values[row, :len(alias_values)] = alias_values
+                row += 1
+
+        return cls(teams, aliases, values, offsets, cipher_columns(ciphers))
+
+    @classmethod
+    def from_engine(cls, ciphers: list[str], teams_path: str = TEAMS_PATH) -> 'TeamStore':
+        """
+        Builds the store from teams.csv, computing every alias' values locally
+
+        Arguments:
+        ciphers -- list of ciphers to be added
+        teams_path -- path of teams.csv
+
+        Returns:
+        TeamStore -- the built store
+        """
+        teams, aliases = _read_teams(teams_path)
+        offsets = np.zeros(len(teams) + 1, dtype=np.int32)
+        offsets[1:] = np.cumsum([len(team_aliases) for team_aliases in aliases])
+        engine = CipherEngine(ciphers)
+        values = engine.compute_values([alias for team_aliases in aliases for alias in team_aliases])
+        return cls(teams, aliases, values.astype(np.int32).reshape(-1, len(engine.ciphers)), offsets, engine.ciphers)
+
+    def lookup(self, name: str) -> int:
+        """
+        Obtains the index of a team from its canonical name or an alias unique to it
+
+        Arguments:
+        name -- canonical name or alias (e.g. New York Yankees, NYY)
+
+        Returns:
+        int -- index of the team in teams.csv
+        """
+        if name in self.team_index:
+            return self.team_index[name]
+        indices = self.alias_index.get(name, [])
+        if len(indices) == 1:
+            return indices[0]
+        if indices:
+            raise KeyError(f'{name} is an alias of several teams: {[self.teams[i] for i in indices]}')
+        raise KeyError(f'Unknown team: {name}')
+
+    def team_rows(self, name: str) -> tuple[list[str], list[list[str]]]:
+        """
+        Obtains a team's aliases and their cipher values
+
+        Arguments:
+        name -- canonical name or alias unique to the team
+
+        Returns:
+        tuple -- (aliases, a 2d array of numbers in string format)
+        """
+        i = self.lookup(name)
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return list(self.aliases[i]), [list(result) for result in self._results[start:end]]
+
+    def matchup(self, team1_name: str, team2_name: str) -> tuple[list[str], list[list[str]]]:
+        """
+        Obtains the aliases and cipher values of both teams of a matchup,
+        in teams.csv order as they appear in team_nums.csv
+
+        Arguments:
+        team1_name -- name of the first team
+        team2_name -- name of the second team
+
+        Returns:
+        tuple -- (aliases, a 2d array of numbers in string format)
+        """
+        phrases = []
+        results = []
+        for i in sorted({self.lookup(team1_name), self.lookup(team2_name)}):
+            team_phrases, team_results = self.team_rows(self.teams[i])
+            phrases.extend(team_phrases)
+            results.extend(team_results)
+        return phrases, results
+
+    def matchup_values(self, team1_name: str, team2_name: str) -> tuple[list[str], np.ndarray]:
+        """
+        Obtains the aliases and cipher values of both teams of a matchup as matchup does, with the values as integers
+
+        Arguments:
+        team1_name -- name of the first team
+        team2_name -- name of the second team
+
+        Returns:
+        tuple -- (aliases, values with one row per alias, NA where missing)
+        """
+        indices = sorted({self.lookup(team1_name), self.lookup(team2_name)})
+        phrases = [alias for i in indices for alias in self.aliases[i]]
+        values = np.concatenate([self.values[self.offsets[i]:self.offsets[i + 1]] for i in indices])
+        return phrases, values
+
+
+def nums_path_for(ciphers: list[str]) -> str:
+    """
+    Obtains the path of the team_nums file built with a set of ciphers
+
+    Arguments:
+    ciphers -- list of ciphers to be added
+
+    Returns:
+    str -- team_nums.csv for NUMS_CIPHERS, see cipher_set_path for other sets
+    """
+    return cipher_set_path(NUMS_PATH, ciphers, NUMS_CIPHERS)
+
+
+def _read_teams(path: str) -> tuple[list[str], list[list[str]]]:
+    """
+    Reads teams.csv
+
+    Arguments:
+    path -- path of teams.csv
+
+    Returns:
+    tuple -- (canonical team names, each team's aliases with the canonical name first)
+    """
+    teams = []
+    aliases = []
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            if row:
+                teams.append(row[0])
+                aliases.append(row)
+    return teams, aliases
+
+
+def _file_signature(path: str) -> tuple:
+    """
+    Obtains a cheap signature that changes whenever a file is modified
+
+    Arguments:
+    path -- path of the file
+
+    Returns:
+    tuple -- (modification time in ns, size)
+    """
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+_default_stores = dict()
+_default_lock = threading.Lock()
+
+
+def default_store(ciphers: list[str] = None) -> TeamStore:
+    """
+    Obtains the process-wide store of a cipher set, loaded on first use
+
+    Arguments:
+    ciphers -- list of ciphers to be added, defaults to the active ciphers
+
+    Returns:
+    TeamStore -- the shared store
+    """
+    key = tuple(cipher_columns(ciphers if ciphers is not None else active_ciphers()))
+    with _default_lock:
+        if key not in _default_stores:
+            _default_stores[key] = TeamStore.load(ciphers)
+        return _default_stores[key]
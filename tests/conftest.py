@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository and read teams.csv and team_nums.csv relative to it
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def repo_dir(monkeypatch):
+    monkeypatch.chdir(ROOT)
@@ -0,0 +1,34 @@
+import csv
+
+import pytest
+
+from cipher import NUMBER_MODES, CipherEngine
+from teams import NUMS_CIPHERS, NUMS_PATH
+
+
+def read_nums() -> list[list[str]]:
+    with open(NUMS_PATH, newline='') as f:
+        return [row for row in csv.reader(f) if row]
+
+
+def test_compute_reproduces_team_nums():
+    engine = CipherEngine(NUMS_CIPHERS)
+    rows = read_nums()
+    assert rows
+    for row in rows:
+        assert engine.compute(row[0]) == row[1:], row[0]
+
+
+def test_compute_all_reproduces_team_nums():
+    rows = read_nums()
+    assert CipherEngine(NUMS_CIPHERS).compute_all([row[0] for row in rows]) == [row[1:] for row in rows]
+
+
+@pytest.mark.parametrize('numbers', NUMBER_MODES)
+def test_non_ascii_characters_are_worth_nothing(numbers):
+    engine = CipherEngine(NUMS_CIPHERS, numbers)
+    # Superscript and Arabic-Indic digits pass isdigit(), the Kelvin sign lowers to 'k'
+    phrases = ['x\u00b2y', 'NYY \u0661\u0662', '\u212aing', 'Game 7', 'pi']
+    assert [engine.compute(phrase) for phrase in phrases] == engine.compute_all(phrases)
+    assert engine.compute('x\u00b2y') == engine.compute('xy')
+    assert engine.compute('\u212aing') == engine.compute('ing')
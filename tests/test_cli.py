@@ -0,0 +1,36 @@
+import json
+
+import instrument
+from cli import main
+
+
+def test_trace_is_streamed_and_metrics_keep_no_traces(tmp_path, capsys):
+    trace_path = tmp_path / 'trace.json'
+    metrics_path = tmp_path / 'metrics.txt'
+    try:
+        main(['--start', '2025-04-01', '--end', '2025-04-02', '--matchup', 'New York Yankees:New York Mets',
+              '--no-cache', '--trace', str(trace_path), '--metrics', str(metrics_path)])
+        tracer = instrument.tracer()
+    finally:
+        instrument.disable()
+
+    reports = capsys.readouterr().out.splitlines()
+    traces = json.loads(trace_path.read_text())
+    assert len(reports) == 2
+    assert len(traces) >= 2
+    assert len(tracer.traces) == 0
+    assert 'stage_seconds_total' in metrics_path.read_text()
+
+
+def test_metrics_only_writes_no_trace(tmp_path, capsys):
+    metrics_path = tmp_path / 'metrics.txt'
+    try:
+        main(['--start', '2025-04-01', '--matchup', 'New York Yankees:New York Mets',
+              '--no-cache', '--metrics', str(metrics_path)])
+        tracer = instrument.tracer()
+    finally:
+        instrument.disable()
+
+    assert tracer.sink is None
+    assert len(tracer.traces) == 0
+    assert list(tmp_path.iterdir()) == [metrics_path]
@@ -0,0 +1,117 @@
+import csv
+import os
+
+import pytest
+
+import database
+from database import WebScraperDatabase, build_parallel
+
+CIPHERS = ['chaldean']
+
+
+def read_rows(path) -> list[list[str]]:
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+
+def recording_builder(batches: list) -> WebScraperDatabase:
+    builder = WebScraperDatabase(backend='local')
+    read_batch = builder.read_batch
+
+    def record(phrases):
+        batches.append(list(phrases))
+        return read_batch(phrases)
+
+    builder.read_batch = record
+    return builder
+
+
+@pytest.fixture(scope='module')
+def expected(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('nums') / 'team_nums.csv')
+    builder = WebScraperDatabase(backend='local')
+    builder.generate_phrases()
+    builder.read_phrase_results(CIPHERS, path=path)
+    return read_rows(path)
+
+
+def test_rows_follow_teams_csv(expected):
+    builder = WebScraperDatabase(backend='local')
+    builder.generate_phrases()
+    assert [row[0] for row in expected] == builder.phrases
+    assert expected == read_rows('team_nums.csv')
+
+
+@pytest.mark.parametrize('batch_size', [1, 7, 200])
+def test_batch_size_does_not_change_the_file(expected, tmp_path, batch_size):
+    path = str(tmp_path / 'team_nums.csv')
+    batches = []
+    builder = recording_builder(batches)
+    builder.generate_phrases()
+    builder.read_phrase_results(CIPHERS, batch_size, path)
+
+    assert read_rows(path) == expected
+    assert all(len(batch) <= batch_size for batch in batches)
+    # Duplicate phrases in teams.csv are read once
+    entered = [phrase for batch in batches for phrase in batch]
+    assert sorted(entered) == sorted(set(builder.phrases))
+
+
+def test_resume_from_partial(expected, tmp_path):
+    path = str(tmp_path / 'team_nums.csv')
+    with open(path + '.partial', 'w', newline='') as f:
+        csv.writer(f, lineterminator='\n').writerows(expected[:40])
+
+    batches = []
+    builder = recording_builder(batches)
+    builder.generate_phrases()
+    builder.read_phrase_results(CIPHERS, 5, path)
+
+    assert read_rows(path) == expected
+    assert not os.path.exists(path + '.partial')
+    entered = {phrase for batch in batches for phrase in batch}
+    assert entered == set(builder.phrases) - {row[0] for row in expected[:40]}
+
+
+def test_rerun_reads_nothing(expected, tmp_path):
+    path = str(tmp_path / 'team_nums.csv')
+    for _ in range(2):
+        batches = []
+        builder = recording_builder(batches)
+        builder.generate_phrases()
+        builder.read_phrase_results(CIPHERS, 5, path)
+
+    assert batches == []
+    assert read_rows(path) == expected
+
+
+def flaky_shard(*args):
+    # The first shard to start fails once, as a crashed browser would
+    try:
+        os.close(os.open(os.environ['FLAKY_SHARD_MARKER'], os.O_CREAT | os.O_EXCL))
+    except FileExistsError:
+        return database._shard_results(*args)
+    raise RuntimeError('browser crashed')
+
+
+def test_build_parallel_retries_shards_and_merges_in_order(expected, tmp_path, monkeypatch):
+    path = str(tmp_path / 'team_nums.csv')
+    monkeypatch.setenv('FLAKY_SHARD_MARKER', str(tmp_path / 'failed'))
+    monkeypatch.setattr(database, '_shard_results', database._build_shard, raising=False)
+    monkeypatch.setattr(database, '_build_shard', flaky_shard)
+
+    build_parallel(workers=3, ciphers=CIPHERS, backend='local', batch_size=4, path=path)
+
+    assert os.path.exists(tmp_path / 'failed')
+    assert read_rows(path) == expected
+    assert not os.path.exists(path + '.partial')
+
+
+def failing_shard(*args):
+    raise RuntimeError('browser crashed')
+
+
+def test_build_parallel_gives_up_after_retries(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, '_build_shard', failing_shard)
+    with pytest.raises(RuntimeError, match='failed 2 times'):
+        build_parallel(workers=2, ciphers=CIPHERS, backend='local', retries=1, path=str(tmp_path / 'team_nums.csv'))
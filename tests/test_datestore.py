@@ -0,0 +1,93 @@
+from datetime import date, datetime
+
+import pytest
+
+import cipher
+from cipher import register_cipher
+from datestore import STORE_PATH, DateStore, build_store, signature, store_path_for
+from moon import TABLE_END, TABLE_START, moon_sign
+from web import WebScraper
+
+CIPHERS = ['chaldean']
+
+
+@pytest.fixture(scope='module')
+def store_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('store') / 'date_store.bin')
+    build_store(CIPHERS, path)
+    return path
+
+
+def local_scraper(day: date) -> WebScraper:
+    ws = WebScraper(datetime(day.year, day.month, day.day), backend='local')
+    ws.run(None, None, CIPHERS)
+    return ws
+
+
+@pytest.mark.parametrize('day', [TABLE_START, date(2025, 4, 1), date(2028, 2, 29), TABLE_END])
+def test_store_matches_local_backend(store_path, day):
+    store = DateStore.load(CIPHERS, store_path, build=False)
+    ws = local_scraper(day)
+
+    assert store.phrases(day) == (ws.phrases, ws.phrase_results)
+    assert store.date_stats(day) == ws.date_stats
+    assert store.moon_sign(day) == moon_sign(day)
+
+
+
+def test_store_run_reports_no_stages(store_path):
+    store = DateStore.load(CIPHERS, store_path, build=False)
+    stages = []
+    ws = WebScraper(datetime(2025, 4, 1), backend='local', store=store)
+    ws.run(None, None, CIPHERS, progress=stages.append)
+
+    assert stages == []
+    assert set(ws.timings) == {'store', 'total'}
+    assert ws.phrase_dict == local_scraper(date(2025, 4, 1)).phrase_dict
+
+def test_covers(store_path):
+    store = DateStore.load(CIPHERS, store_path, build=False)
+    assert store.covers(TABLE_START, CIPHERS)
+    assert store.covers(TABLE_END, CIPHERS)
+    assert not store.covers(date(TABLE_START.year - 1, 12, 31), CIPHERS)
+    assert not store.covers(date(TABLE_END.year + 1, 1, 1), CIPHERS)
+    assert not store.covers(TABLE_START, ['sumerian'])
+
+
+def test_stale_store_is_rebuilt(store_path, tmp_path):
+    path = str(tmp_path / 'date_store.bin')
+    with open(store_path, 'rb') as source, open(path, 'wb') as f:
+        f.write(source.read())
+
+    assert DateStore.load([], path, build=False) is None
+    store = DateStore.load([], path)
+    assert store.signature == signature([])
+    assert store.columns == cipher.DEFAULT_CIPHERS
+
+
+def test_missing_store_is_not_built_unless_asked(tmp_path):
+    assert DateStore.load(CIPHERS, str(tmp_path / 'missing.bin'), build=False) is None
+
+
+def test_closed_store_releases_its_arrays(store_path):
+    store = DateStore.load(CIPHERS, store_path, build=False)
+    store.close()
+    assert store.arrays == {} and store.values is None
+
+
+def test_each_cipher_set_and_letters_has_its_own_path():
+    assert store_path_for(CIPHERS) == STORE_PATH
+    assert store_path_for(['sumerian']) != store_path_for(['reverse sumerian'])
+
+    try:
+        register_cipher('test cipher', list(range(26)))
+        before = store_path_for(['test cipher'])
+        register_cipher('test cipher', list(range(1, 27)))
+        after = store_path_for(['test cipher'])
+    finally:
+        cipher.CIPHERS.pop('test cipher', None)
+        cipher.LABELS.pop('test cipher', None)
+        cipher._letters_keys.clear()
+
+    assert before != after
+    assert before.startswith('date_store_test-cipher_') and before.endswith('.bin')
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from fake import FakeDriver
+from instrument import disable, enable
+from pool import DriverPool
+
+
+def test_released_session_is_reused():
+    pool = DriverPool(FakeDriver, size=2)
+    driver = pool.acquire()
+    pool.release(driver)
+
+    assert pool.acquire() is driver
+    assert pool.stats()['created'] == 1
+    assert pool.stats()['reused'] == 1
+
+
+def test_session_discarded_on_error():
+    pool = DriverPool(FakeDriver, size=1)
+    with pytest.raises(RuntimeError):
+        with pool.session() as driver:
+            raise RuntimeError('page failed')
+
+    assert driver.closed
+    assert pool.acquire() is not driver
+
+
+def test_dead_session_is_replaced():
+    pool = DriverPool(FakeDriver, size=1)
+    driver = pool.acquire()
+    pool.release(driver)
+    # Health check fails once the session is gone, e.g. Chrome crashed while idle
+    driver.quit()
+
+    replacement = pool.acquire()
+    assert replacement is not driver
+    assert pool.stats()['created'] == 2
+    assert pool.stats()['discarded'] == 1
+
+
+def test_idle_session_is_evicted():
+    pool = DriverPool(FakeDriver, size=1, idle_timeout=0.05)
+    driver = pool.acquire()
+    pool.release(driver)
+    time.sleep(0.1)
+    pool.evict_idle()
+
+    assert driver.closed
+    assert pool.stats()['idle'] == 0
+    assert pool.acquire() is not driver
+
+
+def test_size_is_enforced():
+    pool = DriverPool(FakeDriver, size=1)
+    pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+
+
+def test_close_quits_idle_sessions():
+    pool = DriverPool(FakeDriver, size=2)
+    drivers = [pool.acquire(), pool.acquire()]
+    for driver in drivers:
+        pool.release(driver)
+    pool.close()
+
+    assert all(driver.closed for driver in drivers)
+
+
+def test_health_check_runs_outside_the_lock():
+    pool = DriverPool(FakeDriver, size=1)
+    pool.release(pool.acquire())
+    held = []
+
+    def probe():
+        acquired = pool.condition.acquire(blocking=False)
+        if acquired:
+            pool.condition.release()
+        held.append(not acquired)
+
+    def healthy(driver):
+        checker = threading.Thread(target=probe)
+        checker.start()
+        checker.join()
+        return True
+
+    pool._healthy = healthy
+    pool.release(pool.acquire())
+    assert held == [False, False]
+
+
+def test_checkout_and_chrome_start_are_traced():
+    pool = DriverPool(FakeDriver, size=1)
+    tracer = enable()
+    try:
+        with pool.session():
+            pass
+        with pool.session():
+            pass
+    finally:
+        disable()
+
+    first, second = tracer.trace()
+    assert first['name'] == 'driver_session'
+    assert [child['name'] for child in first['children']] == ['chrome_start']
+    assert second['children'] == []
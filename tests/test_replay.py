@@ -0,0 +1,118 @@
+from datetime import datetime
+import time
+
+import pytest
+
+from fake import fake_factory
+from pool import DriverPool
+from replay import PageCache, PageNotRecorded, ReplayDriver, replay_factory
+from web import WebScraper
+
+DATE = datetime(2025, 4, 1)
+TEAM1 = 'New York Yankees'
+TEAM2 = 'New York Mets'
+
+
+def scrape(pages: PageCache, mode: str, factory=None) -> WebScraper:
+    pool = DriverPool(replay_factory(pages, mode, factory), size=1)
+    ws = WebScraper(DATE, pool=pool)
+    ws.run(TEAM1, TEAM2, ['chaldean'])
+    pool.close()
+    return ws
+
+
+def test_recorded_run_replays_offline(tmp_path):
+    pages = PageCache(str(tmp_path))
+    recorded = scrape(pages, 'record', fake_factory)
+
+    def offline():
+        raise AssertionError('replay mode started a driver')
+
+    replayed = scrape(PageCache(str(tmp_path)), 'replay', offline)
+    assert replayed.phrase_dict == recorded.phrase_dict
+    assert replayed.date_stats == recorded.date_stats
+
+
+def test_replay_matches_local_backend(tmp_path):
+    scrape(PageCache(str(tmp_path)), 'record', fake_factory)
+    replayed = scrape(PageCache(str(tmp_path)), 'replay')
+
+    local = WebScraper(DATE, backend='local')
+    local.run(TEAM1, TEAM2, ['chaldean'])
+    assert replayed.phrase_dict == local.phrase_dict
+    assert replayed.date_stats == local.date_stats
+
+
+def test_auto_mode_fetches_only_misses(tmp_path):
+    pages = PageCache(str(tmp_path))
+    driver = ReplayDriver(pages, fake_factory, 'auto')
+    driver.get('https://gematrinator.com/date-calculator')
+    source = driver.page_source
+    assert driver.fetched == 1
+
+    driver = ReplayDriver(pages, fake_factory, 'auto')
+    driver.get('https://gematrinator.com/date-calculator')
+    assert driver.page_source == source
+    assert driver.replayed == 1
+    assert driver.live is None
+
+
+def test_unrecorded_page_raises_in_replay_mode(tmp_path):
+    driver = ReplayDriver(PageCache(str(tmp_path)), mode='replay')
+    driver.get('https://gematrinator.com/date-calculator')
+    with pytest.raises(PageNotRecorded):
+        driver.page_source
+
+
+def test_different_input_is_not_replayed(tmp_path):
+    pages = PageCache(str(tmp_path))
+    driver = ReplayDriver(pages, fake_factory, 'record')
+    driver.get('https://gematrinator.com/calculator')
+    driver.find_element('id', 'EntryField').send_keys('pi')
+    driver.page_source
+
+    driver = ReplayDriver(pages, mode='replay')
+    driver.get('https://gematrinator.com/calculator')
+    driver.find_element('id', 'EntryField').send_keys('kill')
+    with pytest.raises(PageNotRecorded):
+        driver.page_source
+
+
+def test_recordings_expire(tmp_path):
+    pages = PageCache(str(tmp_path), ttl=0.05)
+    pages.put('page', 'value')
+    assert pages.get('page') == (True, 'value')
+
+    time.sleep(0.1)
+    assert pages.get('page') == (False, None)
+    assert pages.stats()['expired'] == 1
+    # Replay mode keeps serving expired recordings, so offline runs don't break
+    assert pages.get('page', ignore_ttl=True) == (True, 'value')
+
+
+def test_least_recently_used_recording_is_evicted(tmp_path):
+    pages = PageCache(str(tmp_path), max_bytes=350)
+    for key in ('a', 'b', 'c'):
+        pages.put(key, 'x' * 50)
+    assert pages.stats()['evicted'] == 0
+
+    # Reading 'a' makes 'b' the least recently used
+    pages.get('a')
+    pages.put('d', 'x' * 50)
+
+    assert pages.stats()['evicted'] == 1
+    assert pages.get('b') == (False, None)
+    assert pages.get('a')[0] and pages.get('c')[0] and pages.get('d')[0]
+    assert pages.stats()['bytes'] <= 350
+
+
+def test_eviction_order_survives_restart(tmp_path):
+    pages = PageCache(str(tmp_path), max_bytes=350)
+    for key in ('a', 'b', 'c'):
+        pages.put(key, 'x' * 50)
+        time.sleep(0.01)
+
+    reopened = PageCache(str(tmp_path), max_bytes=350)
+    reopened.put('d', 'x' * 50)
+    assert reopened.get('a') == (False, None)
+    assert reopened.get('b')[0]
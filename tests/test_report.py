@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from report import Report
+from web import NumberCounter, WebScraper
+
+DATES = [datetime(2025, 4, 1), datetime(2025, 7, 4), datetime(2026, 1, 31)]
+TEAM1 = 'New York Yankees'
+TEAM2 = 'Boston Red Sox'
+
+
+def local_scraper(date: datetime, team1: str = TEAM1, team2: str = TEAM2) -> WebScraper:
+    ws = WebScraper(date, backend='local')
+    ws.run(team1, team2, ['chaldean'])
+    return ws
+
+
+@pytest.mark.parametrize('date', DATES)
+@pytest.mark.parametrize('ranked, significance', [(True, 2), (True, 1), (False, 1)])
+def test_from_report_matches_display_nums(date, ranked, significance):
+    ws = local_scraper(date)
+    expected = NumberCounter(ws.date, ws.phrase_results, ws.date_stats).display_nums(ranked, significance)
+
+    assert NumberCounter.from_report(ws.report).display_nums(ranked, significance) == expected
+
+
+@pytest.mark.parametrize('date', DATES)
+def test_matchup_report_matches_display_nums(date):
+    ws = WebScraper(date, backend='local')
+    ws.run(None, None, ['chaldean'])
+    ranked = ws.matchup_report(TEAM1, TEAM2)['ranked']
+
+    full = local_scraper(date)
+    assert ranked == NumberCounter(full.date, full.phrase_results, full.date_stats).display_nums()
+    # Tied counts keep NumberCounter's first-occurrence order
+    assert any(first[1] == second[1] for first, second in zip(ranked, ranked[1:]))
+
+
+def test_from_values_matches_from_results():
+    ws = local_scraper(DATES[0])
+    report = Report.from_results(ws.date, ws.columns, ws.phrases, ws.phrase_results, ws.date_stats)
+
+    assert np.array_equal(ws.report.numbers, report.numbers)
+    assert ws.report.phrase_dict() == ws.phrase_dict
+    assert ws.report.date_stats() == ws.date_stats
+    assert np.array_equal(Report.from_bytes(ws.report.to_bytes()).numbers, report.numbers)
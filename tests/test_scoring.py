@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from scoring import MatchupScorer
+from web import NumberCounter, WebScraper
+
+DATES = [datetime(2025, 4, 1), datetime(2025, 7, 4), datetime(2026, 1, 31)]
+
+
+def date_scraper(date: datetime) -> WebScraper:
+    ws = WebScraper(date, backend='local')
+    ws.run(None, None, ['chaldean'])
+    return ws
+
+
+def matchup_counter(ws: WebScraper, team1: str, team2: str) -> NumberCounter:
+    _, results = ws.teams.matchup(team1, team2)
+    return NumberCounter(ws.date, ws.phrase_results + results, ws.date_stats)
+
+
+def has_tie(ranked: list[tuple]) -> bool:
+    return any(first[1] == second[1] for first, second in zip(ranked, ranked[1:]))
+
+
+@pytest.mark.parametrize('date', DATES)
+@pytest.mark.parametrize('significance', [1, 2])
+def test_rank_matches_display_nums(date, significance):
+    ws = date_scraper(date)
+    table = MatchupScorer(ws.phrase_results, ws.date_stats, ws.teams).rank(significance)
+
+    assert len(table) == len(ws.teams.teams) * (len(ws.teams.teams) - 1) // 2
+    for row in table:
+        expected = matchup_counter(ws, row['team1'], row['team2']).display_nums(significance=significance)
+        assert row['ranked'] == expected
+    # Tied counts must keep NumberCounter's first-occurrence order
+    assert any(has_tie(row['ranked']) for row in table)
+
+
+@pytest.mark.parametrize('date', DATES)
+def test_team_scores_match_display_nums(date):
+    ws = date_scraper(date)
+    scorer = MatchupScorer(ws.phrase_results, ws.date_stats, ws.teams)
+    teams = ws.teams.teams
+    pairs = [(0, 1), (3, 17), (28, 29)]
+    thresholds = [1, 2, 3]
+    scores = scorer.team_scores(np.array([i for i, _ in pairs]), np.array([j for _, j in pairs]), thresholds)
+
+    for k, threshold in enumerate(thresholds):
+        for m, (i, j) in enumerate(pairs):
+            shown = matchup_counter(ws, teams[i], teams[j]).display_nums(significance=threshold)
+            for side, team in enumerate((i, j)):
+                own = NumberCounter(ws.date, ws.teams.matchup(teams[team], teams[team])[1], {}).counter
+                assert scores[k, m, side] == sum(count for num, count in shown if num in own)
@@ -0,0 +1,98 @@
+from datetime import date, datetime
+from urllib.parse import urlencode
+import asyncio
+import json
+
+from server import HOST, ReportServer
+from web import WebScraper
+
+DAY = date(2025, 4, 1)
+TEAM1 = 'New York Yankees'
+TEAM2 = 'New York Mets'
+
+
+async def request(server: ReportServer, line: str, headers: str = '') -> tuple[int, object]:
+    reader, writer = await asyncio.open_connection(HOST, server.port)
+    writer.write(f'{line}\r\n{headers}\r\n'.encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(payload)
+
+
+def serve(test) -> None:
+    async def main():
+        server = ReportServer(port=0)
+        await server.start()
+        try:
+            await test(server)
+        finally:
+            await server.close()
+
+    asyncio.run(main())
+
+
+def test_endpoints():
+    async def test(server):
+        query = urlencode({'date': DAY, 'team1': TEAM1, 'team2': TEAM2})
+        status, body = await request(server, f'GET /report?{query} HTTP/1.0')
+        ws = WebScraper(datetime(DAY.year, DAY.month, DAY.day), backend='local')
+        ws.run(None, None, ['chaldean'])
+        assert status == 200
+        assert body == json.loads(json.dumps(ws.matchup_report(TEAM1, TEAM2)))
+
+        assert (await request(server, 'GET /report?date=2025-04-01 HTTP/1.0'))[0] == 400
+        assert (await request(server, f'GET /report?date={DAY}&team1=Nobody&team2=Mets HTTP/1.0'))[0] == 404
+        assert (await request(server, 'GET /health HTTP/1.0')) == (200, {'status': 'ok'})
+        assert (await request(server, 'GET /missing HTTP/1.0'))[0] == 404
+        assert (await request(server, 'POST /health HTTP/1.0'))[0] == 405
+        assert (await request(server, 'GET /numbers?number=x HTTP/1.0'))[0] == 400
+
+        status, body = await request(server, 'GET /numbers?number=74 HTTP/1.0')
+        assert status == 200 and set(body) <= {'74'}
+
+        status, body = await request(server, 'GET /stats HTTP/1.0')
+        assert status == 200
+        assert body['date_misses'] == 1 and body['date_hits'] == 1 and body['dates_cached'] == 1
+
+    serve(test)
+
+
+def test_malformed_content_length_is_rejected():
+    async def test(server):
+        status, body = await request(server, 'GET /health HTTP/1.1', 'Content-Length: ten\r\n')
+        assert status == 400
+        assert 'Content-Length' in body['error']
+        # The server is still answering
+        assert (await request(server, 'GET /health HTTP/1.0'))[0] == 200
+
+    serve(test)
+
+
+def test_concurrent_requests_for_a_date_are_coalesced():
+    async def test(server):
+        first, second = await asyncio.gather(server.date_scraper(DAY), server.date_scraper(DAY))
+        assert first is second
+        assert server.counters['date_misses'] == 1
+        assert server.counters['date_coalesced'] == 1
+        assert await server.date_scraper(DAY) is first
+        assert server.counters['date_hits'] == 1
+
+    serve(test)
+
+
+def test_cancelled_request_keeps_the_date():
+    async def test(server):
+        task = asyncio.create_task(server.date_scraper(DAY))
+        await asyncio.sleep(0)
+        future = server.inflight[DAY]
+        task.cancel()
+        await asyncio.wait([future])
+        await asyncio.sleep(0)
+
+        assert DAY in server.dates
+        assert DAY not in server.inflight
+        assert await server.date_scraper(DAY) is future.result()
+
+    serve(test)
@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+from bench import IMPORT_BUDGET
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on the first Submit or by the background warm-up, never before the window appears
+DEFERRED_MODULES = ['numpy', 'selenium', 'num2words', 'web']
+
+SCRIPT = (
+    'import sys, time, json\n'
+    'start = time.perf_counter()\n'
+    'import ui\n'
+    'elapsed = time.perf_counter() - start\n'
+    'print(json.dumps({"seconds": elapsed, "modules": sorted(sys.modules)}))\n'
+)
+
+
+def import_ui() -> dict:
+    result = subprocess.run([sys.executable, '-c', SCRIPT], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def test_ui_import_defers_heavy_modules():
+    modules = import_ui()['modules']
+    loaded = [name for name in DEFERRED_MODULES if name in modules]
+    assert not loaded, f'importing ui loaded {loaded}'
+
+
+def test_ui_import_within_budget():
+    # Best of a few fresh interpreters, so one slow start on a busy machine doesn't fail the budget
+    seconds = min(import_ui()['seconds'] for _ in range(3))
+    assert seconds < IMPORT_BUDGET, f'importing ui took {seconds * 1000:.0f} ms, budget is {IMPORT_BUDGET * 1000:.0f} ms'
@@ -0,0 +1,35 @@
+import os
+
+from teams import NUMS_CIPHERS, TeamStore
+
+
+def test_sidecar_round_trip(tmp_path):
+    sidecar = str(tmp_path / 'team_store.bin')
+    built = TeamStore.load(NUMS_CIPHERS, sidecar_path=sidecar)
+    loaded = TeamStore.load(NUMS_CIPHERS, sidecar_path=sidecar)
+
+    assert os.path.exists(sidecar)
+    assert loaded.teams == built.teams and loaded.aliases == built.aliases
+    assert (loaded.values == built.values).all()
+
+
+def test_each_cipher_set_has_its_own_sidecar(tmp_path):
+    sidecar = str(tmp_path / 'team_store.bin')
+    TeamStore.load(NUMS_CIPHERS, sidecar_path=sidecar)
+    TeamStore.load(['sumerian'], sidecar_path=sidecar)
+    modified = os.stat(sidecar).st_mtime_ns
+
+    files = sorted(os.listdir(tmp_path))
+    assert len(files) == 2 and files[0] == 'team_store.bin' and files[1].startswith('team_store_sumerian_')
+    # Loading the default set again reads its own sidecar rather than rebuilding it
+    TeamStore.load(NUMS_CIPHERS, sidecar_path=sidecar)
+    assert os.stat(sidecar).st_mtime_ns == modified
+
+
+def test_unreadable_sidecar_is_rebuilt(tmp_path):
+    sidecar = tmp_path / 'team_store.bin'
+    expected = TeamStore.load(NUMS_CIPHERS, sidecar_path=None)
+    for data in (b'', b'not a pickle', b'\x80\x04\x95\x10\x00\x00\x00\x00\x00\x00\x00\x8c\x08builtins\x8c\x05nopex\x93.'):
+        sidecar.write_bytes(data)
+        store = TeamStore.load(NUMS_CIPHERS, sidecar_path=str(sidecar))
+        assert store.teams == expected.teams and (store.values == expected.values).all()
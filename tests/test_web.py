@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+from cache import PhraseCache
+from fake import FakeDriver
+from pool import DriverPool
+from web import WebScraper
+
+DATE = datetime(2025, 4, 1)
+TEAM1 = 'New York Yankees'
+TEAM2 = 'New York Mets'
+
+
+def run(ciphers: list[str], date: datetime = DATE, concurrent: bool = False, **kwargs) -> WebScraper:
+    ws = WebScraper(date, **kwargs)
+    ws.run(TEAM1, TEAM2, ciphers, concurrent=concurrent)
+    return ws
+
+
+@pytest.mark.parametrize('sequence', [
+    [['chaldean'], ['chaldean']],
+    [['chaldean', 'sumerian'], ['chaldean']],
+    [['chaldean'], ['sumerian', 'chaldean'], ['sumerian']],
+])
+def test_reused_session_selects_exactly_the_ciphers(sequence):
+    pool = DriverPool(FakeDriver, size=1)
+    for ciphers in sequence:
+        ws = run(ciphers, pool=pool)
+        assert ws.phrase_dict == run(ciphers, backend='local').phrase_dict
+    assert pool.stats()['created'] == 1
+
+
+def test_cipher_missing_from_site_raises():
+    class NoSumerian(FakeDriver):
+        def execute_script(self, script, *args):
+            result = super().execute_script(script, *args)
+            return [cipher for cipher in result if cipher != 'sumerian'] if isinstance(result, list) else result
+
+    with pytest.raises(ValueError, match='sumerian'):
+        run(['chaldean', 'sumerian'], pool=DriverPool(NoSumerian, size=1))
+
+
+def test_leftover_history_is_ignored():
+    pool = DriverPool(FakeDriver, size=1)
+    first = run(['chaldean'], pool=pool)
+    second = run(['chaldean'], pool=pool, date=datetime(2025, 4, 2))
+    # The second report's rows sit above the first report's on the reused page
+    assert len(pool.acquire().history) == len(first.pending_phrases) + len(second.pending_phrases)
+    assert second.phrase_dict == run(['chaldean'], backend='local', date=datetime(2025, 4, 2)).phrase_dict
+
+
+def test_cache_hits_borrow_no_session_for_phrases():
+    pool = DriverPool(FakeDriver, size=2)
+    cache = PhraseCache(':memory:')
+    run(['chaldean'], pool=pool, cache=cache, concurrent=True)
+    before = pool.stats()
+
+    stages = []
+    ws = WebScraper(DATE, pool=pool, cache=cache)
+    ws.run(TEAM1, TEAM2, ['chaldean'], concurrent=True, progress=stages.append)
+    # Only the date stats stage needs the browser
+    assert pool.stats()['created'] == before['created']
+    assert pool.stats()['reused'] == before['reused'] + 1
+    assert ws.pending_phrases == []
+    assert sorted(stages) == ['date stats', 'moon sign', 'phrases']
+    assert 'generate_phrases' in ws.timings
@@ -1,8 +1,17 @@
 from datetime import datetime
 from tkinter import ttk
-from web import WebScraper, NumberCounter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from instrument import TRACE_ENV, enable, span, tracer
+from snapshot import load_snapshot
+from widgets import GridTable
 import tkinter as tk
-import csv
+import threading
+import queue
+import os
+
+# Stages reported by WebScraper.run, in the order they usually finish
+STAGES = ['moon sign', 'phrases', 'date stats']
 
 def assign_colour(num: str, sig_nums: list[str], notable_nums: list[str]) -> str:
 
@@ -15,71 +24,286 @@ def assign_colour(num: str, sig_nums: list[str], notable_nums: list[str]) -> str
     else:
         return 'white'
 
-def create_tables():
-    team1 = team1_combo.get()
-    team2 = team2_combo.get()
-    date = datetime.strptime(f'{day_combo.get()} {month_combo.get()} {year_combo.get()}','%d %B %Y')
-    ws = WebScraper(date)
-    ws.run(team1, team2)
-    nc = NumberCounter(date, ws.phrase_results, ws.date_stats)
-    ranked_tups = nc.display_nums()
-    sig_tups = [tup for tup in ranked_tups if tup[1] > 2]
-    sig_nums = [tup[0] for tup in sig_tups]
-    notable_nums = [tup[0] for tup in ranked_tups if tup[0] not in sig_nums]
-
-    # Create the date-cipher table
-    ## Column Names
-    col_names = ['Phrase', 'Ordinal', 'Reduction', 'Reverse' , 'Rev. Red', 'Chaldean']
-    for i, col_name in enumerate(col_names):
-        cell = tk.Label(cipher_frame, text=col_name, bg='light grey', borderwidth=1, relief="solid", padx=5, pady=5)
-        cell.grid(row=0, column=i, sticky='nsew')
-
-    for i, key in enumerate(ws.phrase_dict.keys()):
-        cell = tk.Label(cipher_frame, text=key, borderwidth=1, relief="solid", padx=5, pady=5)
-        cell.grid(row=i+1, column=0, sticky="nsew")
-        for j, num in enumerate(list(ws.phrase_dict.values())[i]):
-            # Create a label for each cell
-            bg_colour = assign_colour(num, sig_nums, notable_nums)
-            cell = tk.Label(cipher_frame, text=num, bg=bg_colour, borderwidth=1, relief="solid", padx=5, pady=5)
-            cell.grid(row=i+1, column=j+1, sticky="nsew")
-
-    # Create the date-stats table
-    ## Column Names
-    col_names = ['Statistic', 'No.1', 'No.2']
-    for i, col_name in enumerate(col_names):
-        cell = tk.Label(stats_frame, text=col_name, bg='light grey', borderwidth=1, relief="solid", padx=5, pady=5)
-        cell.grid(row=0, column=i, sticky='nsew')
-
-    for i, key in enumerate(ws.date_stats.keys()):
-        cell = tk.Label(stats_frame, text=key, borderwidth=1, relief="solid", padx=5, pady=5)
-        cell.grid(row=i+1, column=0, sticky="nsew")
-        for j, num in enumerate(list(ws.date_stats.values())[i]):
-            # Create a label for each cell
-            bg_colour = assign_colour(num, sig_nums, notable_nums)
-            cell = tk.Label(stats_frame, text=num, bg=bg_colour, borderwidth=1, relief="solid", padx=5, pady=5)
-            cell.grid(row=i+1, column=j+1, sticky="nsew")
-
-    # Create the ranked table
-    ## Column Names
-    col_names = ['Number', 'Freq.']
-    for i, col_name in enumerate(col_names):
-        cell = tk.Label(ranked_frame, text=col_name, bg='light grey', borderwidth=1, relief="solid", padx=5, pady=5)
-        cell.grid(row=0, column=i, sticky='nsew')
-
-    for i, row in enumerate(sig_tups):
-        for j, value in enumerate(row):
-            # Create a label for each cell
-            if j < 1:
-                bg_colour = assign_colour(value, sig_nums, notable_nums)
-            else:
-                bg_colour = 'white'
-            cell = tk.Label(ranked_frame, text=value, bg=bg_colour, borderwidth=1, relief="solid", padx=5, pady=5)
-            cell.grid(row=i+1, column=j, sticky="nsew")
+def load_backend() -> None:
+    """
+    Imports the scraper (selenium, num2words, numpy) and opens the phrase cache, date store, number index
+    and driver pool. Run on the worker thread as the window opens, so the first report waits for it instead of startup
+
+    Arguments:
+    None
+
+    Returns:
+    None
+    """
+    global phrase_cache, date_store, number_index, driver_pool
+    from cache import PhraseCache
+    from datestore import DateStore
+    from index import NumberIndex
+    from pool import DriverPool
+    import web
+
+    phrase_cache = PhraseCache()
+    # Built with 'python datestore.py', dates it covers need no scraping
+    date_store = DateStore.load(ciphers, build=False)
+    number_index = NumberIndex.build(ciphers, store=date_store)
+    driver_pool = DriverPool(size=2, headless=True)
+
+def generate_report(date: datetime.date, team1: str, team2: str, progress, cancel: threading.Event) -> tuple:
+    """
+    Scrapes and counts a report, run on the worker thread
+
+    Arguments:
+    date -- date of the matchup
+    team1 -- name of the first team
+    team2 -- name of the second team
+    progress -- called with the name of each stage as it finishes
+    cancel -- stops the scrape before its next stage once set
+
+    Returns:
+    tuple -- (WebScraper, ranked tuples from NumberCounter.display_nums)
+    """
+    from web import NumberCounter, WebScraper
+
+    ws = WebScraper(date, cache=phrase_cache, pool=driver_pool, store=date_store)
+    ws.run(team1, team2, ciphers, concurrent=True, progress=progress, cancel=cancel)
+    nc = NumberCounter.from_report(ws.report)
+    return ws, nc.display_nums()
+
+def create_tables(ws: 'WebScraper', ranked_tups: list[tuple]):
+    with span('create_tables'):
+        sig_tups = [tup for tup in ranked_tups if tup[1] > 2]
+        sig_nums = [tup[0] for tup in sig_tups]
+        notable_nums = [tup[0] for tup in ranked_tups if tup[0] not in sig_nums]
+
+        # Date-cipher and date-stats tables, views of the report only format the rows drawn
+        def colour(num: str) -> str:
+            return assign_colour(num, sig_nums, notable_nums)
+
+        cipher_table.update(ws.report.phrase_rows(), ws.report.phrase_rows(colour))
+        stats_table.update(ws.report.stat_rows(), ws.report.stat_rows(colour))
+
+        # Ranked table
+        rows = [[num, str(freq)] for num, freq in sig_tups]
+        colours = [[assign_colour(num, sig_nums, notable_nums), 'white'] for num, _ in sig_tups]
+        ranked_table.update(rows, colours)
+
+        # Dates the store doesn't cover are only indexed once a report has computed their phrases
+        number_index.add_phrases(ws.phrases, ws.phrase_results)
+
+        # Teams matching the significant numbers
+        rows = []
+        colours = []
+        for num in sig_nums:
+            for team, postings in number_index.teams(num).items():
+                for alias, cipher, _ in postings:
+                    rows.append([num, team, alias, cipher])
+                    colours.append([assign_colour(num, sig_nums, notable_nums), None, None, None])
+        matches_table.update(rows, colours)
     
+class ReportRunner():
+
+    def __init__(self, window: tk.Tk, on_progress, on_done, on_error) -> None:
+        """
+        ReportRunner class, generates reports on a worker thread and hands the results back to Tk.
+        Clicks made while a report is running are coalesced, only the latest one runs next
+
+        Arguments:
+        window -- Tk window the results are marshalled to
+        on_progress -- called with (stage, stages finished) on the Tk thread
+        on_done -- called with the result of generate_report on the Tk thread
+        on_error -- called with a message on the Tk thread
+
+        Returns:
+        None
+        """
+        self.window = window
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.events = queue.Queue()
+        self.current = None # (job id, request, cancel event)
+        self.pending = None
+        self.job_id = 0
+        self.finished_stages = 0
+        self.setup = None
+
+        self.window.after(50, self.poll)
+
+    def warm(self, setup: Callable) -> None:
+        """
+        Runs setup on the worker thread ahead of every report, e.g. to load the backend while the window opens.
+        Reports fail with its error if it raised
+
+        Arguments:
+        setup -- function called without arguments
+
+        Returns:
+        None
+        """
+        self.setup = self.executor.submit(setup)
+
+    def submit(self, request: tuple) -> None:
+        """
+        Requests a report, queuing it behind the running one.
+        Repeating the running request does nothing
+
+        Arguments:
+        request -- (date, team1, team2)
+
+        Returns:
+        None
+        """
+        if self.current is None:
+            self._start(request)
+        elif self.current[1] != request:
+            self.pending = request
+
+    def cancel(self) -> None:
+        """
+        Cancels the running report and drops any queued one
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        self.pending = None
+        if self.current is not None:
+            self.current[2].set()
+
+    def shutdown(self) -> None:
+        """
+        Cancels everything and stops the worker thread
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _start(self, request: tuple) -> None:
+        """
+        Starts a report on the worker thread
+
+        Arguments:
+        request -- (date, team1, team2)
+
+        Returns:
+        None
+        """
+        self.job_id += 1
+        job_id = self.job_id
+        cancel = threading.Event()
+        self.current = (job_id, request, cancel)
+        self.finished_stages = 0
+        self.on_progress('starting', 0)
+
+        def progress(stage: str) -> None:
+            self.events.put(('progress', job_id, stage))
+
+        def work() -> None:
+            try:
+                if self.setup is not None:
+                    self.setup.result()
+                from web import ScrapeCancelled
+            except Exception as error:
+                self.events.put(('error', job_id, error))
+                return
+
+            try:
+                result = generate_report(*request, progress, cancel)
+                self.events.put(('done', job_id, result))
+            except ScrapeCancelled:
+                self.events.put(('cancelled', job_id, None))
+            except Exception as error:
+                self.events.put(('error', job_id, error))
+
+        self.executor.submit(work)
+
+    def poll(self) -> None:
+        """
+        Handles events from the worker thread, rescheduling itself on the Tk event loop
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        while True:
+            try:
+                kind, job_id, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if self.current is None or job_id != self.current[0]:
+                continue
+
+            if kind == 'progress':
+                self.finished_stages += 1
+                self.on_progress(payload, self.finished_stages)
+                continue
+
+            self.current = None
+            if kind == 'done':
+                self.on_done(payload)
+            elif kind == 'error':
+                self.on_error(f'Report failed: {payload}')
+            else:
+                self.on_error('Report cancelled')
+
+            if self.pending is not None:
+                request, self.pending = self.pending, None
+                self._start(request)
+
+        self.window.after(50, self.poll)
+
 def submit():
-    create_tables()
+    try:
+        date = datetime.strptime(f'{day_combo.get()} {month_combo.get()} {year_combo.get()}','%d %B %Y')
+    except ValueError:
+        status_label.config(text='Invalid date')
+        return
+    runner.submit((date, team1_combo.get(), team2_combo.get()))
+
+def show_progress(stage: str, finished: int):
+    progress_bar['value'] = finished
+    status_label.config(text=f'{stage.capitalize()} done' if finished else 'Working...')
+
+def show_report(result: tuple):
+    progress_bar['value'] = len(STAGES)
+    status_label.config(text='Done')
+    create_tables(*result)
+
+def show_error(message: str):
+    progress_bar['value'] = 0
+    status_label.config(text=message)
+
+def close():
+    runner.shutdown()
+    if driver_pool is not None:
+        driver_pool.close()
+    if trace_path:
+        tracer().write_trace(trace_path)
+        with open(os.path.splitext(trace_path)[0] + '.prom', 'w') as f:
+            f.write(tracer().prometheus())
+    window.destroy()
 
 if __name__=="__main__":
+    # e.g. BASEBALL_TRACE=trace.json, the trace and counters are written when the window closes
+    trace_path = os.environ.get(TRACE_ENV)
+    if trace_path:
+        enable()
+    # Teams and column labels come from a snapshot, the backend is loaded by runner.warm
+    snapshot = load_snapshot()
+    ciphers = snapshot['ciphers']
+    phrase_cache = date_store = number_index = driver_pool = None
+
     window = tk.Tk()
     window.title('Baseball Predictor')
     window.geometry('980x980')
@@ -108,12 +332,8 @@ if __name__=="__main__":
     year_combo.grid(row=0, column=2, padx=10, pady=10)
 
     # Teams
-    teams = []
-    with open('teams.csv', newline='') as csvfile:
-        reader = csv.reader(csvfile)
-        for row in reader:
-            teams.append(row[0])
-    
+    teams = snapshot['teams']
+
     team1_combo = ttk.Combobox(input_frame, values=teams, width=12)
     team1_combo.set('Team 1')
     team1_combo.grid(row=1, column=0, padx=10, pady=10)
@@ -127,19 +347,37 @@ if __name__=="__main__":
     
     input_frame.pack()
 
-    submit_button = ttk.Button(window, text='Submit', command=create_tables)
-    submit_button.pack()
+    button_frame = ttk.Frame(window)
+    submit_button = ttk.Button(button_frame, text='Submit', command=submit)
+    submit_button.grid(row=0, column=0, padx=5)
+    cancel_button = ttk.Button(button_frame, text='Cancel', command=lambda: runner.cancel())
+    cancel_button.grid(row=0, column=1, padx=5)
+    button_frame.pack()
+
+    progress_frame = ttk.Frame(window)
+    progress_bar = ttk.Progressbar(progress_frame, maximum=len(STAGES), length=200)
+    progress_bar.grid(row=0, column=0, padx=5, pady=5)
+    status_label = ttk.Label(progress_frame, text='')
+    status_label.grid(row=0, column=1, padx=5, pady=5)
+    progress_frame.pack()
 
     output_frame = ttk.Frame(window)
     
-    cipher_frame = ttk.Frame(output_frame)
-    stats_frame = ttk.Frame(output_frame)
-    cipher_frame.pack(side='left', padx=10)
-    stats_frame.pack(side='left', padx=10)
+    cipher_table = GridTable(output_frame, ['Phrase'] + snapshot['labels'], visible_rows=25)
+    stats_table = GridTable(output_frame, ['Statistic', 'No.1', 'No.2'], visible_rows=10)
+    cipher_table.pack(side='left', padx=10)
+    stats_table.pack(side='left', padx=10)
+
+    ranked_table = GridTable(output_frame, ['Number', 'Freq.'], visible_rows=25)
+    ranked_table.pack(side='left', padx=10)
 
-    ranked_frame = ttk.Frame(output_frame)
-    ranked_frame.pack(side='left', padx=10)
+    matches_table = GridTable(output_frame, ['Number', 'Team', 'Alias', 'Cipher'], visible_rows=25)
+    matches_table.pack(side='left', padx=10)
 
     output_frame.pack()
 
+    runner = ReportRunner(window, show_progress, show_report, show_error)
+    runner.warm(load_backend)
+    window.protocol('WM_DELETE_WINDOW', close)
+
     window.mainloop()
\ No newline at end of file
@@ -1,24 +1,51 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from datetime import datetime
 from num2words import num2words
+from extract import SELECT_CIPHERS_SCRIPT, element_html, parse_date_stats, parse_history_table
+from cipher import BACKENDS, CIPHERS, DEFAULT_CIPHERS, CipherEngine, cipher_columns
+from cache import PhraseCache
+from pool import DriverPool, default_pool
+from teams import TeamStore, default_store
+from datestore import DateStore
+from report import NA, TEXTS, VARIANTS, Report, encode
+from collections import Counter
+from itertools import chain
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from moon import moon_sign
+from numerology import date_stats
+from instrument import TimedWait, span, wrap_driver
+import numpy as np
+import contextvars
+import threading
 import time
-import csv
+
+
+class ScrapeCancelled(Exception):
+    """
+    Raised by WebScraper.run when its cancel event is set between stages
+    """
 
 
 class WebScraper():
 
-    def __init__(self, date: datetime.date, exec_path: str = 'chromedriver.exe') -> None:
+    def __init__(self, date: datetime.date, exec_path: str = 'chromedriver.exe', backend: str = 'browser',
+                 cache: PhraseCache = None, pool: DriverPool = None, teams: TeamStore = None,
+                 store: DateStore = None) -> None:
         """
         WebScraper class, takes path for browser driver executable
 
         Arguments:
         date -- date which the scraper will scrape for
         exec_path -- path of the driver's executable
+        backend -- 'browser' to use gematrinator, 'local' to compute cipher values and date stats in process
+        cache -- cache of phrase results, only phrases missing from it are sent to the backend
+        pool -- pool browser sessions are borrowed from, defaults to the shared pool for exec_path
+        teams -- team aliases and their cipher values, defaults to the shared store
+        store -- precomputed date inputs, dates it covers skip the phrase and date stats stages
 
         Returns:
         None
@@ -39,14 +66,91 @@ class WebScraper():
             'pisces': ['neptune']
         }
 
-        self.service = Service(executable_path=exec_path)
-        self.driver = webdriver.Chrome(service=self.service)
+        if backend not in BACKENDS:
+            raise ValueError(f'Unknown backend: {backend}')
+
+        # Each thread borrows its own session, see driver
+        self._local = threading.local()
+        self.driver = None
+        self.pool = None
+        if backend == 'browser':
+            self.pool = pool if pool is not None else default_pool(exec_path)
+        self.backend = backend
+        self.engine = None
+        self.cache = cache
+        self.teams = teams if teams is not None else default_store()
+        self.store = store
+        self.columns = []
+        self.cached_results = dict()
+        self.pending_phrases = []
         self.date = date
         self.phrases = []
-        self.phrase_results = []
-        self.phrase_dict = dict()
+        self.values = [] # blocks of cipher values, one row per phrase in order, NA where missing
+        self.stat_values = None # values of date_stats, two per statistic, when read as integers
+        self._phrase_results = None
 
         self.date_stats = dict()
+        self.report = None
+        self.timings = dict()
+        self.progress = None
+        self.cancel = None
+
+    @property
+    def phrase_results(self) -> list[list[str]]:
+        """
+        Cipher values of the phrases in string format, formatted from values when first read
+        """
+        if self._phrase_results is None:
+            self._phrase_results = [list(map(TEXTS.__getitem__, row)) for row in self.phrase_values().tolist()]
+        return self._phrase_results
+
+    @property
+    def phrase_dict(self) -> dict:
+        """
+        Phrases and their cipher values in string format
+        """
+        return {phrase: result for phrase, result in zip(self.phrases, self.phrase_results)}
+
+    def phrase_values(self) -> np.ndarray:
+        """
+        Obtains the cipher values of the phrases read so far
+
+        Arguments:
+        None
+
+        Returns:
+        np.ndarray -- values with one row per phrase, NA where missing
+        """
+        if not self.values:
+            return np.empty((0, len(self.columns)), dtype=np.int32)
+        return np.concatenate(self.values)
+
+    def _add_values(self, phrases: list[str], values: np.ndarray) -> None:
+        """
+        Appends phrases, unless already in self.phrases, and their cipher values
+
+        Arguments:
+        phrases -- phrases added, None if they are already in self.phrases
+        values -- their cipher values, one row per phrase
+
+        Returns:
+        None
+        """
+        if phrases is not None:
+            self.phrases.extend(phrases)
+        self.values.append(np.asarray(values, dtype=np.int32).reshape(-1, len(self.columns)))
+        self._phrase_results = None
+
+    @property
+    def driver(self):
+        """
+        Browser session borrowed by the current thread, None outside of session()
+        """
+        return getattr(self._local, 'driver', None)
+
+    @driver.setter
+    def driver(self, driver) -> None:
+        self._local.driver = driver
 
     def generate_phrases(self) -> None:
         """
@@ -68,8 +172,8 @@ class WebScraper():
         month = self.date.strftime('%B') # e.g. January
         year = self.date.strftime('%Y') # e.g. 2005
 
-        moon_sign = self.obtain_moon_sign(day_of_month, month, year) # e.g. Gemini
-        planets = self.zodiac_to_planet[moon_sign]
+        sign = moon_sign(self.date) # e.g. gemini
+        planets = self.zodiac_to_planet[sign]
 
         # Generating phrases
         self.phrases.append(f'{day_of_month} {month} {year}')
@@ -79,34 +183,90 @@ class WebScraper():
         self.phrases.append(f'{day_of_month_ordinal} {month}')
         for planet in planets:
             self.phrases.append(f'{planet}')
-        self.phrases.append(f'{moon_sign}')
-        self.phrases.append(f'moon in {moon_sign}')
+        self.phrases.append(f'{sign}')
+        self.phrases.append(f'moon in {sign}')
         self.phrases.append(f'{day_of_week}')
         self.phrases.extend(['pi', 'kill', 'sweep', 'comeback'])
 
     def enter_phrases(self, ciphers: list[str] = ['chaldean']) -> None:
         """
-        Inputs phrases into provided input element
+        Inputs phrases into provided input element.
+        Phrases found in the cache are skipped, with the local backend the rest are computed in process instead
 
         Arguments:
+        ciphers -- list of ciphers to be added
+
+        Returns:
         None
+        """
+        self._split_cached(ciphers)
+        self._enter_pending(ciphers)
+
+    def _split_cached(self, ciphers: list[str]) -> None:
+        """
+        Splits the phrases into cached_results and the pending_phrases still to be read
+
+        Arguments:
+        ciphers -- list of ciphers to be added
 
         Returns:
         None
         """
+        self.columns = cipher_columns(ciphers)
+        self._match_teams(ciphers)
+        self.cached_results = dict()
+        self.pending_phrases = []
+        for phrase in self.phrases:
+            if phrase in self.cached_results or phrase in self.pending_phrases:
+                continue
+            result = self.cache.get(phrase, self.columns) if self.cache is not None else None
+            if result is None:
+                self.pending_phrases.append(phrase)
+            else:
+                self.cached_results[phrase] = result
+
+        if self.backend == 'local':
+            self.engine = CipherEngine(ciphers)
+
+    def _enter_pending(self, ciphers: list[str]) -> None:
+        """
+        Inputs the pending phrases into gematrinator
+
+        Arguments:
+        ciphers -- list of ciphers to be added
+
+        Returns:
+        None
+        """
+        if self.backend == 'local' or not self.pending_phrases:
+            return
+
         self.driver.get("https://gematrinator.com/calculator")
         self.add_ciphers(ciphers)
 
-        WebDriverWait(self.driver, 10).until(
+        TimedWait(self.driver, 10).until(
             EC.element_to_be_clickable((By.ID, "EntryField"))
         )
 
         input_element = self.driver.find_element(By.ID, "EntryField")
         
-        for phrase in self.phrases:
+        for phrase in self.pending_phrases:
             input_element.clear()
             input_element.send_keys(phrase + Keys.ENTER)
 
+    def _match_teams(self, ciphers: list[str]) -> None:
+        """
+        Switches to the shared team store of the ciphers if the team values have other columns
+
+        Arguments:
+        ciphers -- list of ciphers to be added
+
+        Returns:
+        None
+        """
+        if self.teams.columns != self.columns:
+            self.teams = default_store(ciphers)
+
     def add_ciphers(self, ciphers: list[str]) -> None:
         """
         Inputs phrases into provided input element
@@ -117,7 +277,7 @@ class WebScraper():
         Returns:
         None
         """
-        WebDriverWait(self.driver, 10).until(
+        TimedWait(self.driver, 10).until(
             EC.element_to_be_clickable((By.CLASS_NAME, "calcMenuItem"))
         )
 
@@ -128,34 +288,36 @@ class WebScraper():
             if element.text.lower() == 'ciphers ':
                 element.click()
 
-                WebDriverWait(self.driver, 10).until(
+                TimedWait(self.driver, 10).until(
                     EC.element_to_be_clickable((By.ID, 'CancelCiphers'))
                 )
                 self.driver.find_element(By.ID, 'CancelCiphers').click()
 
-                WebDriverWait(self.driver, 10).until(
+                TimedWait(self.driver, 10).until(
                     EC.element_to_be_clickable((By.CLASS_NAME, "calcMenuItem"))
                 )
                 element.click()
 
         # Applying all ciphers
         
-        WebDriverWait(self.driver, 10).until(
+        TimedWait(self.driver, 10).until(
             EC.element_to_be_clickable((By.ID, 'cipherBox'))
         )
 
-        li_elements = self.driver.find_element(By.ID, 'cipherBox').find_elements(By.TAG_NAME, 'li')
-        for li in li_elements:
-            text = li.find_element(By.TAG_NAME, 'font').text
-            if text.lower() in ciphers:
-                li.find_element(By.TAG_NAME, 'input').click()
-        
-        #Update Click
-        self.driver.find_element(By.ID, 'SaveCiphers').click()        
+        # Ticking ciphers and saving in one round-trip. A reused session may still have other ciphers ticked
+        wanted = [cipher.lower() for cipher in ciphers]
+        unwanted = [cipher for cipher in CIPHERS if cipher not in DEFAULT_CIPHERS and cipher not in wanted]
+        ticked = self.driver.execute_script(SELECT_CIPHERS_SCRIPT, wanted, unwanted)
+
+        # A cipher only defined in ciphers.json would leave its column out and misalign the rest
+        missing = [cipher for cipher in wanted if cipher not in DEFAULT_CIPHERS and cipher not in ticked]
+        if missing:
+            raise ValueError(f"gematrinator has no {', '.join(missing)} cipher, use the local backend")
 
     def obtain_moon_sign(self, day_of_month:str, month:str, year: str) -> str:
         """
-        Obtains moon sign, and returns as string
+        Obtains moon sign from astro-seek, and returns as string.
+        generate_phrases uses the offline table in moon.py, this is kept to check it against the site
 
         Arguments:
         day_of_month -- day of month (e.g. 25)
@@ -168,73 +330,84 @@ class WebScraper():
 
         self.driver.get(f'https://mooncalendar.astro-seek.com/moon-phase-day-{day_of_month}-{month.lower()}-{year}')
 
-        WebDriverWait(self.driver, 10).until(
+        TimedWait(self.driver, 10).until(
             EC.element_to_be_clickable((By.CLASS_NAME, "astro_symbol"))
         )
 
         elements = self.driver.find_elements(By.CLASS_NAME, 'astro_symbol')
         for element in elements:
-            moon_sign = element.get_attribute('alt').lower()
-            if moon_sign in self.zodiac_to_planet.keys():
-                return moon_sign
+            sign = element.get_attribute('alt').lower()
+            if sign in self.zodiac_to_planet.keys():
+                return sign
         return ''
 
     def read_phrase_results(self, team1_name: str, team2_name: str) -> None:
         """
-        Reads the results of the phrases from gematrinator
+        Reads the results of the phrases from gematrinator, then adds both teams' aliases
 
         Arguments:
-        None
+        team1_name -- name of the first team, None with team2_name for the date's phrases only
+        team2_name -- name of the second team
 
         Returns:
         None
         """
 
-        WebDriverWait(self.driver, 10).until(
+        if not self.pending_phrases:
+            values = []
+        elif self.backend == 'local':
+            values = self.engine.compute_values(self.pending_phrases).tolist()
+        else:
+            values = [encode(result) for result in self._scrape_phrase_results()]
+
+        if self.cache is not None and values:
+            self.cache.put_many(self.pending_phrases, [list(map(TEXTS.__getitem__, row)) for row in values], self.columns)
+
+        phrase_values = {phrase: encode(result) for phrase, result in self.cached_results.items()}
+        phrase_values.update(zip(self.pending_phrases, values))
+        self._add_values(None, [phrase_values[phrase] for phrase in self.phrases])
+
+        if team1_name is not None or team2_name is not None:
+            self._add_values(*self.teams.matchup_values(team1_name, team2_name))
+
+    def _scrape_phrase_results(self) -> list[list[str]]:
+        """
+        Scrapes the results of the entered phrases from gematrinator's history table
+
+        Arguments:
+        None
+
+        Returns:
+        list[list[str]] -- a 2d array of numbers in string format, in the order the phrases were entered
+        """
+        TimedWait(self.driver, 10).until(
             EC.element_to_be_clickable((By.ID, "printHistoryTable"))
         )
 
-        tr_elements = self.driver.find_element(By.ID, 'printHistoryTable').find_elements(By.TAG_NAME, 'tr')[1:]
-        for tr in tr_elements:
-            td_elements = tr.find_elements(By.TAG_NAME, 'td')
-            cipher_results = []
-            for td in td_elements:
-                if td.get_attribute('class') == 'HistorySum':
-                    cipher_result = td.find_element(By.ID, 'finalBreakNum').text
-                    cipher_results.append(cipher_result)
-            self.phrase_results.append(cipher_results)
-        
-        self.phrase_results.reverse()
-
-        phrases = []
-        results = []
-        counter = 5
-        with open('team_nums.csv', 'r') as f:
-            reader = csv.reader(f)
-            for row in reader:
-
-                if row[0] == team1_name or row[0] == team2_name:
-                    phrases.append(row[0])
-                    results.append(row[1:])
-                    counter = 1
-                elif counter < 5:
-                    phrases.append(row[0])
-                    results.append(row[1:])
-                    counter += 1
-        
-        self.phrase_results.extend(results)
-        self.phrases.extend(phrases)
-        self.phrase_dict = {phrase: result for phrase, result in zip(self.phrases, self.phrase_results)}
-        # print(self.phrase_dict)
+        results = parse_history_table(element_html(self.driver, 'printHistoryTable'), len(self.pending_phrases))
+
+        # History table lists the newest phrase first
+        results.reverse()
+        return results
 
     def get_date_stats(self) -> None:
         """
-        Obtains date statistics
+        Obtains date statistics.
+        With the local backend, the statistics are computed in process instead
 
+        Arguments:
+        None
+
+        Returns:
+        None
         """
+        if self.backend == 'local':
+            self.date_stats.update(date_stats(self.date))
+            return
+
         self.driver.get("https://gematrinator.com/date-calculator")
 
-        WebDriverWait(self.driver, 10).until(
+        TimedWait(self.driver, 10).until(
             EC.element_to_be_clickable((By.ID, "Month1"))
         )
         
@@ -266,22 +439,153 @@ class WebScraper():
         input_element.clear()
         input_element.send_keys(datetime.strftime(self.date, '%Y'))
         
-        # Retrieving stats from table
-        table_element = self.driver.find_elements(By.CLASS_NAME, 'ClassicDateTable')[1]
-        tr_elements = table_element.find_element(By.TAG_NAME, 'tbody').find_elements(By.TAG_NAME, 'tr')
-        for tr in tr_elements:
-            key = tr.find_element(By.CLASS_NAME, 'NumString').text
-            value = tr.find_element(By.CLASS_NAME, 'SumString').text
-            self.date_stats[key] = [value, 'NA']
+        # Retrieving stats from the page source in one round-trip
+        self.date_stats.update(parse_date_stats(self.driver.page_source))
+
+    def run(self, team1_name: str, team2_name: str, ciphers: list[str] = ['chaldean'],
+            concurrent: bool = False, progress: Callable = None, cancel: threading.Event = None) -> None:
+        """
+        Runs the scraper class, the results are packed into self.report.
+        Time taken by each stage is recorded into self.timings
+
+        Arguments:
+        team1_name -- name of the first team
+        team2_name -- name of the second team
+        ciphers -- list of ciphers to be added
+        concurrent -- runs the phrase and date stats stages at the same time, each in its own session
+        progress -- called with the name of each stage ('moon sign', 'phrases', 'date stats') as it finishes,
+                    none are reported when the report is read from the store
+        cancel -- raises ScrapeCancelled before the next stage once set
+
+        Returns:
+        None
+        """
+        with span('report', date=self.date.strftime('%Y-%m-%d'), team1=team1_name, team2=team2_name, backend=self.backend):
+            start = time.perf_counter()
+            self.timings = dict()
+            self.progress = progress
+            self.cancel = cancel
+
+            self._check_cancelled()
+            if self.store is not None and self.store.covers(self.date, ciphers):
+                with self.timed('store'):
+                    self.read_store(team1_name, team2_name, ciphers)
+                self.report = self.build_report()
+                self.timings['total'] = time.perf_counter() - start
+                return
+
+            # The moon sign is looked up while generating the phrases
+            with self.timed('generate_phrases'):
+                self.generate_phrases()
+            self._report('moon sign')
+
+            if concurrent:
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    # Stages run in copies of this context, so their spans nest under the report's
+                    cipher_stage = executor.submit(contextvars.copy_context().run, self._cipher_stage, team1_name, team2_name, ciphers)
+                    date_stage = executor.submit(contextvars.copy_context().run, self._date_stage)
+                    cipher_stage.result()
+                    date_stage.result()
+            else:
+                with self.session():
+                    self._cipher_stage(team1_name, team2_name, ciphers)
+                    self._date_stage()
+
+            self.report = self.build_report()
+            self.timings['total'] = time.perf_counter() - start
+
+    def build_report(self) -> Report:
+        """
+        Packs the phrases, their results and the date stats into a Report
+
+        Arguments:
+        None
+
+        Returns:
+        Report -- the report of what has been read so far
+        """
+        stats = self.stat_values
+        if stats is None:
+            stats = encode(chain.from_iterable(self.date_stats.values()))
+        return Report.from_values(self.date, self.columns, self.phrases, self.phrase_values(), list(self.date_stats), stats)
+
+    def read_store(self, team1_name: str, team2_name: str, ciphers: list[str] = ['chaldean']) -> None:
+        """
+        Reads the date's phrases, their results and the date stats from the precomputed store,
+        in place of generate_phrases, enter_phrases, read_phrase_results and get_date_stats
+
+        Arguments:
+        team1_name -- name of the first team, None with team2_name for the date's phrases only
+        team2_name -- name of the second team
+        ciphers -- list of ciphers to be added
+
+        Returns:
+        None
+        """
+        self.columns = cipher_columns(ciphers)
+        self._match_teams(ciphers)
+        ids, values = self.store.phrase_values(self.date)
+        self._add_values(self.store.texts(ids), values)
+        if team1_name is not None or team2_name is not None:
+            self._add_values(*self.teams.matchup_values(team1_name, team2_name))
+
+        # Statistics are formatted for display, the report takes their values as they are
+        ids, self.stat_values = self.store.stat_values(self.date)
+        self.date_stats.update(zip(self.store.texts(ids), ([TEXTS[value] for value in row] for row in self.stat_values.tolist())))
+
+    def _check_cancelled(self) -> None:
+        """
+        Raises ScrapeCancelled if the run has been cancelled
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        if self.cancel is not None and self.cancel.is_set():
+            raise ScrapeCancelled()
+
+    def _report(self, stage: str) -> None:
+        """
+        Reports a finished stage to the progress callback
+
+        Arguments:
+        stage -- name of the stage
 
-        duration_elements = self.driver.find_elements(By.CLASS_NAME, 'DurNum')
-        self.date_stats['Months Days'] = [duration_elements[8].text, duration_elements[9].text]
-        self.date_stats['Weeks Days'] = [duration_elements[10].text, duration_elements[11].text]
-        self.date_stats['Days'] = [duration_elements[12].text, 'NA']
+        Returns:
+        None
+        """
+        if self.progress is not None:
+            self.progress(stage)
 
-    def run(self, team1_name: str, team2_name: str, ciphers: list[str] = ['chaldean']) -> None:
+    def _cipher_stage(self, team1_name: str, team2_name: str, ciphers: list[str]) -> None:
         """
-        Runs the scraper class
+        Enters and reads the phrases, in a session of its own unless one is already borrowed.
+        No session is borrowed when every phrase is a cache hit
+
+        Arguments:
+        team1_name -- name of the first team
+        team2_name -- name of the second team
+        ciphers -- list of ciphers to be added
+
+        Returns:
+        None
+        """
+        self._check_cancelled()
+        with self.timed('cache_lookup'):
+            self._split_cached(ciphers)
+        with self.session() if self.pending_phrases else nullcontext():
+            with self.timed('enter_phrases'):
+                self._enter_pending(ciphers)
+            self._check_cancelled()
+            with self.timed('read_phrase_results'):
+                self.read_phrase_results(team1_name, team2_name)
+        self._report('phrases')
+
+    def _date_stage(self) -> None:
+        """
+        Obtains the date statistics, in a session of its own unless one is already borrowed
 
         Arguments:
         None
@@ -289,13 +593,76 @@ class WebScraper():
         Returns:
         None
         """
-        self.generate_phrases()
-        self.enter_phrases(ciphers)
-        self.read_phrase_results(team1_name, team2_name)
+        self._check_cancelled()
+        with self.session():
+            with self.timed('date_stats'):
+                self.get_date_stats()
+        self._report('date stats')
+
+    @contextmanager
+    def timed(self, stage: str):
+        """
+        Records the time taken by a with block into self.timings, and as a span while instrumentation is enabled
 
-        self.get_date_stats()
+        Arguments:
+        stage -- name of the stage
+
+        Returns:
+        None
+        """
+        start = time.perf_counter()
+        try:
+            with span(stage):
+                yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
+
+    def matchup_report(self, team1_name: str, team2_name: str, significance: int = 2) -> dict:
+        """
+        Builds the report of a matchup from a scraper that has run for the date only (run(None, None)),
+        so one date's results can be shared by all its matchups
 
-        self.driver.quit()
+        Arguments:
+        team1_name -- name of the first team
+        team2_name -- name of the second team
+        significance -- minimum count for a number to be ranked
+
+        Returns:
+        dict -- date, teams, phrase_dict, date_stats and ranked numbers
+        """
+        report = self.report.extend(*self.teams.matchup_values(team1_name, team2_name))
+        nc = NumberCounter.from_report(report)
+        return {
+            'date': self.date.strftime('%Y-%m-%d'),
+            'team1': team1_name,
+            'team2': team2_name,
+            'phrase_dict': report.phrase_dict(),
+            'date_stats': self.date_stats,
+            'ranked': nc.display_nums(significance=significance),
+        }
+
+    @contextmanager
+    def session(self):
+        """
+        Borrows a browser session from the pool as self.driver for the duration of a with block.
+        Does nothing with the local backend
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        if self.pool is None or self.driver is not None:
+            yield
+            return
+
+        with self.pool.session() as driver:
+            self.driver = wrap_driver(driver)
+            try:
+                yield
+            finally:
+                self.driver = None
 
     def _ordinal_suffix(self, numberStr: str) -> str:
         """
@@ -339,10 +706,38 @@ class NumberCounter():
         self.date_stats = [num for stat in date_stats.values() for num in stat]
         self.date_stats = [num for num in self.date_stats if num != '0']
 
-        self.add_additional_numbers()
+        with span('number_counter'):
+            self.add_additional_numbers()
+
+            self.counter = dict()
+            self.count_nums()
+
+    @classmethod
+    def from_report(cls, report: Report) -> 'NumberCounter':
+        """
+        Counts a report's numbers straight from its integer buffer, with the same counts and order as
+        NumberCounter(date, phrase_results, date_stats). Only counter is kept, not results or all_nums
+
+        Arguments:
+        report -- the report
 
-        self.counter = dict()
-        self.count_nums()
+        Returns:
+        NumberCounter -- the counter
+        """
+        nc = cls.__new__(cls)
+        nc.date = report.date
+        with span('number_counter'):
+            # Results then stats, stats of 0 are not counted
+            numbers = report.numbers.tolist()
+            n_values = report.values.size
+            counter = Counter(numbers[:n_values])
+            counter.update(filter(None, numbers[n_values:]))
+            counter.pop(NA, None)
+
+            # Zero-stripped variants are counted after every number, as add_additional_numbers appends them
+            counter.update(filter(None, map(VARIANTS.__getitem__, numbers)))
+            nc.counter = dict(zip(map(TEXTS.__getitem__, counter), counter.values()))
+        return nc
 
     def add_additional_numbers(self) -> None:
         """
@@ -387,10 +782,11 @@ class NumberCounter():
         Returns:
         None
         """
-        nums_tuple = list(zip(self.counter.keys(), self.counter.values()))
-        if ranked:
-            nums_tuple.sort(key=lambda x: x[1], reverse=True)
-        return [tup for tup in nums_tuple if tup[1] >= significance]
+        with span('display_nums'):
+            nums_tuple = list(zip(self.counter.keys(), self.counter.values()))
+            if ranked:
+                nums_tuple.sort(key=lambda x: x[1], reverse=True)
+            return [tup for tup in nums_tuple if tup[1] >= significance]
 
 
 if __name__=="__main__":
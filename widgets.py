@@ -0,0 +1,159 @@
+from tkinter import ttk
+import tkinter as tk
+
+HEADER_COLOUR = 'light grey'
+
+
+class GridTable():
+
+    def __init__(self, master, columns: list[str], visible_rows: int = 25) -> None:
+        """
+        GridTable class, a table of labels allocated once and reused for every report.
+        Only visible_rows rows of cells exist, longer reports are scrolled through them
+
+        Arguments:
+        master -- frame the table is drawn in
+        columns -- column names
+        visible_rows -- number of rows shown at once
+
+        Returns:
+        None
+        """
+        self.frame = ttk.Frame(master)
+        self.visible_rows = visible_rows
+        self.columns = []
+        self.header = []
+        self.cells = [] # visible_rows x columns labels
+        self.shown = [] # (text, colour) last drawn in each cell, to skip unchanged cells
+        self.row_visible = []
+        self.default_colour = None
+
+        self.rows = []
+        self.colours = []
+        self.offset = 0
+
+        self.scrollbar = ttk.Scrollbar(self.frame, orient='vertical', command=self.scroll)
+        self.frame.bind('<MouseWheel>', self._wheel)
+        self.set_columns(columns)
+
+    def pack(self, **kwargs) -> None:
+        self.frame.pack(**kwargs)
+
+    def set_columns(self, columns: list[str]) -> None:
+        """
+        Changes the column names, cells are only rebuilt when the number of columns changes
+
+        Arguments:
+        columns -- column names
+
+        Returns:
+        None
+        """
+        if len(columns) != len(self.columns):
+            for label in self.header + [cell for row in self.cells for cell in row]:
+                label.destroy()
+            self.header = [self._label(0, j, HEADER_COLOUR) for j in range(len(columns))]
+            self.cells = [[self._label(i + 1, j) for j in range(len(columns))] for i in range(self.visible_rows)]
+            self.shown = [[None] * len(columns) for _ in range(self.visible_rows)]
+            self.row_visible = [True] * self.visible_rows
+            self.default_colour = self.cells[0][0].cget('bg') if self.cells and columns else None
+            self.scrollbar.grid(row=0, column=len(columns), rowspan=self.visible_rows + 1, sticky='ns')
+
+        for label, column in zip(self.header, columns):
+            label.config(text=column)
+        self.columns = list(columns)
+        self._draw()
+
+    def update(self, rows: list[list[str]], colours: list[list[str]] = None) -> None:
+        """
+        Shows new rows, only the text and background of the existing cells change
+
+        Arguments:
+        rows -- cell texts, one list per row
+        colours -- cell backgrounds in the same shape, None for the default background
+
+        Returns:
+        None
+        """
+        self.rows = rows
+        self.colours = colours if colours is not None else [[None] * len(row) for row in rows]
+        self.offset = 0
+        self._draw()
+
+    def scroll(self, action: str, amount, unit: str = None) -> None:
+        """
+        Scrollbar command, moves the window of rows shown
+
+        Arguments:
+        action -- 'moveto' or 'scroll'
+        amount -- fraction for 'moveto', number of units for 'scroll'
+        unit -- 'units' (rows) or 'pages'
+
+        Returns:
+        None
+        """
+        hidden = max(len(self.rows) - self.visible_rows, 0)
+        if action == 'moveto':
+            offset = round(float(amount) * len(self.rows))
+        else:
+            step = self.visible_rows if unit == 'pages' else 1
+            offset = self.offset + int(amount) * step
+        self.offset = min(max(offset, 0), hidden)
+        self._draw()
+
+    def _wheel(self, event) -> None:
+        self.scroll('scroll', -1 if event.delta > 0 else 1, 'units')
+
+    def _label(self, row: int, column: int, colour: str = None) -> tk.Label:
+        """
+        Creates a cell
+
+        Arguments:
+        row -- grid row
+        column -- grid column
+        colour -- background, None for the default background
+
+        Returns:
+        tk.Label -- the cell
+        """
+        options = {'bg': colour} if colour is not None else {}
+        label = tk.Label(self.frame, borderwidth=1, relief="solid", padx=5, pady=5, **options)
+        label.grid(row=row, column=column, sticky='nsew')
+        label.bind('<MouseWheel>', self._wheel)
+        return label
+
+    def _draw(self) -> None:
+        """
+        Draws the rows from the current offset into the cells
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        for i, (cells, shown) in enumerate(zip(self.cells, self.shown)):
+            index = self.offset + i
+            visible = index < len(self.rows)
+            if visible != self.row_visible[i]:
+                for cell in cells:
+                    if visible:
+                        cell.grid()
+                    else:
+                        cell.grid_remove()
+                self.row_visible[i] = visible
+            if not visible:
+                continue
+
+            row, colours = self.rows[index], self.colours[index]
+            for j, cell in enumerate(cells):
+                text = row[j] if j < len(row) else ''
+                colour = (colours[j] if j < len(colours) else None) or self.default_colour
+                if shown[j] != (text, colour):
+                    cell.config(text=text, bg=colour)
+                    shown[j] = (text, colour)
+
+        if len(self.rows) > self.visible_rows:
+            self.scrollbar.set(self.offset / len(self.rows), (self.offset + self.visible_rows) / len(self.rows))
+        else:
+            self.scrollbar.set(0, 1)